@@ -0,0 +1,74 @@
+"""
+In-process read caches for the hottest catalogue queries.
+
+    trending_cache      /tracks/trending payloads, keyed by limit
+    hot_tracks_cache    /tracks/{id} payloads, keyed by track id
+    autocomplete_cache  first page of /tracks/search (the search-as-you-type box),
+                        keyed by (lower-cased query, page size)
+
+The catalogue only changes on ETL runs, so entries simply expire after a TTL;
+incremental ETL runs also evict what they changed (app/change_listener.py).
+Every lookup is counted in /metrics (`cache_lookups_total`, `cache_hit_ratio`)
+and timed as the `cache` Server-Timing span. The caches are per worker process
+and are filled on startup by app/warmup.py.
+
+Settings (env):
+    CACHE_TTL_S   entry lifetime in seconds (default 300)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from .metrics import record_cache_lookup
+from .timing import span
+
+CACHE_TTL_S = float(os.getenv("CACHE_TTL_S", "300"))
+
+
+class TTLCache:
+    """LRU cache whose entries expire `ttl` seconds after they were set."""
+
+    def __init__(self, name: str, maxsize: int, ttl: float = CACHE_TTL_S):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[object]:
+        with span("cache"):
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] < time.monotonic():
+                    del self.entries[key]
+                    entry = None
+                if entry is not None:
+                    self.entries.move_to_end(key)
+        record_cache_lookup(self.name, entry is not None)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: Hashable, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+trending_cache = TTLCache("trending", maxsize=64)
+hot_tracks_cache = TTLCache("hot_tracks", maxsize=10_000)
+autocomplete_cache = TTLCache("autocomplete", maxsize=5_000)
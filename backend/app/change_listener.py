@@ -0,0 +1,81 @@
+"""
+Cache invalidation for incremental ETL runs (scripts/etl/incremental.py).
+
+Each run commits its changes together with a `track_changes` log and a
+`NOTIFY track_changes, '{"run_id": ..., "insert": n, "update": n, "delete": n}'`.
+This listener, started from the app lifespan, LISTENs on that channel and for
+every run:
+
+    hot_tracks_cache    evicts exactly the changed / deleted track ids
+    trending_cache      cleared (any changed row may move in the ranking)
+    autocomplete_cache  cleared (names / artists may have changed)
+
+If the connection drops it reconnects with backoff; notifications sent while
+disconnected are missed, but the cache TTL bounds how stale entries can get.
+
+Settings (env):
+    CHANGE_LISTENER   "0" disables the listener (default "1")
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import List
+
+from .cache import trending_cache, hot_tracks_cache, autocomplete_cache
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LISTENER = os.getenv("CHANGE_LISTENER", "1") == "1"
+CHANGES_CHANNEL = "track_changes"
+RECONNECT_BACKOFF_S = 1.0
+MAX_RECONNECT_BACKOFF_S = 60.0
+
+
+def parse_notification(payload: str) -> dict:
+    """The run id and per-op counts of a notification ({} if it is malformed)."""
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) and data.get("run_id") else {}
+
+
+def evict_changed(track_ids: List[str]) -> int:
+    """Drops the changed tracks and every cached listing; returns how many track entries were cached."""
+    evicted = sum(hot_tracks_cache.pop(track_id) is not None for track_id in track_ids)
+    trending_cache.clear()
+    autocomplete_cache.clear()
+    return evicted
+
+
+async def _handle(conn, payload: str):
+    run = parse_notification(payload)
+    if not run:
+        logger.warning("Ignoring malformed %s notification: %r", CHANGES_CHANNEL, payload)
+        return
+    cur = await conn.execute("SELECT track_id FROM track_changes WHERE run_id = %s", (run["run_id"],))
+    track_ids = [row[0] for row in await cur.fetchall()]
+    evicted = evict_changed(track_ids)
+    logger.info("ETL run %s changed %d tracks, %d were cached", run["run_id"], len(track_ids), evicted)
+
+
+async def listen_for_changes():
+    """Runs until cancelled on shutdown."""
+    import psycopg
+    from .dependencies import get_db_connection_string
+
+    backoff = RECONNECT_BACKOFF_S
+    while True:
+        try:
+            async with await psycopg.AsyncConnection.connect(get_db_connection_string(), autocommit=True) as conn:
+                await conn.execute(f"LISTEN {CHANGES_CHANNEL}")
+                backoff = RECONNECT_BACKOFF_S
+                async for notify in conn.notifies():
+                    await _handle(conn, notify.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Change listener disconnected (%s), retrying in %.0fs", e, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_RECONNECT_BACKOFF_S)
@@ -1,54 +1,109 @@
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import text
+from sqlalchemy.orm import declarative_base
+from functools import lru_cache
+from typing import Dict, FrozenSet, List
 import os
-from dotenv import load_dotenv
+import time
 
-# Load env vars
-load_dotenv()
+from .metrics import record_pool_checkout
 
-# Config
-# Use the same connection string logic as dev_seed.py
-POSTGRES_USER = os.getenv('POSTGRES_USER', 'admin')
-POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'admin')
-POSTGRES_DB = os.getenv('POSTGRES_DB', 'music_discovery')
-POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'db')
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+# The engine (and the psycopg2 driver behind it) is created on first use rather
+# than at import, to keep API cold start / --reload fast. `database.engine` and
+# `database.SessionLocal` still work as attributes (module __getattr__ below).
+# SQLAlchemy itself stays an eager import: FastAPI resolves the `db: Session`
+# parameters of every route and the declarative `User` model is built when the
+# routers are included, so deferring it here would save nothing.
 
-# Create Engine
-# pool_pre_ping=True handles disconnected connections gracefully
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def get_database_url() -> str:
+    # Load env vars
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    # Use the same connection string logic as dev_seed.py
+    POSTGRES_USER = os.getenv('POSTGRES_USER', 'admin')
+    POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', 'admin')
+    POSTGRES_DB = os.getenv('POSTGRES_DB', 'music_discovery')
+    POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'db')
+    return f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:5432/{POSTGRES_DB}"
+
+@lru_cache(maxsize=None)
+def get_engine():
+    from sqlalchemy import create_engine
+    from .metrics import instrument_engine
+    from . import query_log
+
+    # pool_pre_ping=True handles disconnected connections gracefully
+    engine = create_engine(get_database_url(), pool_pre_ping=True)
+    instrument_engine(engine)
+    query_log.instrument_engine(engine)
+    return engine
+
+@lru_cache(maxsize=None)
+def get_sessionmaker():
+    from sqlalchemy.orm import sessionmaker
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    if name == "SessionLocal":
+        return get_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def get_db():
-    db = SessionLocal()
+    db = get_sessionmaker()()
     try:
+        # Check out the connection up front so pool waits show up in /metrics
+        start = time.perf_counter()
+        db.connection()
+        record_pool_checkout(time.perf_counter() - start)
         yield db
     finally:
         db.close()
 
-# Get table info to understand the schema (Updated for Postgres)
-def get_table_schema():
-    with engine.connect() as conn:
-        # Get table names (public schema)
-        query = text("""
-            SELECT table_name 
-            FROM information_schema.tables 
+# ==================== SCHEMA METADATA ====================
+# Read once and cached until the generation changes (invalidate_schema(), e.g.
+# after an ETL run added columns). Routes use it to build their SELECT lists
+# instead of probing every row for optional columns.
+
+_schema_generation = 0
+
+def _load_schema() -> Dict[str, List[dict]]:
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("""
+            SELECT table_name, column_name, data_type
+            FROM information_schema.columns
             WHERE table_schema = 'public'
-        """)
-        tables = conn.execute(query).fetchall()
-        
-        schema = {}
-        for table in tables:
-            table_name = table[0]
-            # Get columns
-            col_query = text("""
-                SELECT column_name, data_type 
-                FROM information_schema.columns 
-                WHERE table_name = :table_name
-            """)
-            columns = conn.execute(col_query, {"table_name": table_name}).fetchall()
-            schema[table_name] = [{"name": col[0], "type": col[1]} for col in columns]
-            
-        return schema
+            ORDER BY table_name, ordinal_position
+        """)).fetchall()
+    schema: Dict[str, List[dict]] = {}
+    for table_name, column_name, data_type in rows:
+        schema.setdefault(table_name, []).append({"name": column_name, "type": data_type})
+    return schema
+
+@lru_cache(maxsize=1)
+def _schema_at(generation: int) -> Dict[str, List[dict]]:
+    return _load_schema()
+
+@lru_cache(maxsize=64)
+def _columns_at(generation: int, table: str) -> FrozenSet[str]:
+    return frozenset(col["name"] for col in _schema_at(generation).get(table, []))
+
+def get_table_schema() -> Dict[str, List[dict]]:
+    """{table: [{"name", "type"}, ...]} for the public schema (cached)."""
+    return _schema_at(_schema_generation)
+
+def table_columns(table: str) -> FrozenSet[str]:
+    return _columns_at(_schema_generation, table)
+
+def select_columns(table: str, columns: List[str], optional: List[str]) -> str:
+    """SELECT list with `optional` columns replaced by NULL when the table lacks them."""
+    present = table_columns(table)
+    return ", ".join(columns + [c if c in present else f"NULL AS {c}" for c in optional])
+
+def invalidate_schema():
+    """Starts a new schema generation; the next lookup re-reads the catalog."""
+    global _schema_generation
+    _schema_generation += 1
@@ -4,6 +4,8 @@ from psycopg_pool import AsyncConnectionPool
 from typing import AsyncGenerator
 from fastapi import Request
 
+from .timed_cursors import AsyncTimedCursor
+
 # Global pool variable
 pool: AsyncConnectionPool = None
 
@@ -17,7 +19,10 @@ async def init_db_pool():
     global pool
     conn_str = get_db_connection_string()
     print(f"🔌 Connecting to DB: {conn_str.replace(os.getenv('POSTGRES_PASSWORD', 'admin'), '******')}")
-    pool = AsyncConnectionPool(conn_str, open=False, min_size=1, max_size=20)
+    pool = AsyncConnectionPool(
+        conn_str, open=False, min_size=1, max_size=20,
+        kwargs={"cursor_factory": AsyncTimedCursor},  # slow-query log
+    )
     await pool.open()
     print("✅ DB Connection Pool Created.")
 
@@ -1,14 +1,38 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from .routes import tracks, auth, recommendations
+from .routes import tracks, auth, recommendations, albums, artists, admin
 from .database import get_table_schema
 from .users_database import init_users_db
+from . import metrics, warmup, change_listener
+from .timing import server_timing_middleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize users database on startup
+    init_users_db()
+    # Warm pools, index pages and caches in the background; /ready reports when done
+    tasks = [asyncio.create_task(warmup.run_warmup())]
+    # Evict rows changed by incremental ETL runs from the caches
+    if change_listener.CHANGE_LISTENER:
+        tasks.append(asyncio.create_task(change_listener.listen_for_changes()))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
 
 app = FastAPI(
     title="Music Discovery API",
     description="AI-powered music recommendation engine with 8M Spotify tracks",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS middleware for frontend
@@ -20,15 +44,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize users database on startup
-@app.on_event("startup")
-async def startup_event():
-    init_users_db()
+# Request latency / DB time per route, exposed on /metrics
+app.middleware("http")(metrics.metrics_middleware)
+# Per-stage latency breakdown in the Server-Timing header
+app.middleware("http")(server_timing_middleware)
 
 # Include routers
 app.include_router(tracks.router)
 app.include_router(auth.router)
 app.include_router(recommendations.router)
+app.include_router(albums.router)
+app.include_router(artists.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -43,6 +70,16 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the startup warm-up has finished."""
+    return JSONResponse(warmup.state.snapshot(), status_code=200 if warmup.state.ready else 503)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of request, DB, pool and cache metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/schema")
 async def get_schema():
     """Get the database schema for debugging."""
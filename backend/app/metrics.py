@@ -0,0 +1,224 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Hand-rolled (no prometheus_client dependency): counters, gauges and histograms
+keyed by label values, rendered by `render()` for the `/metrics` endpoint.
+
+What is recorded:
+- HTTP: request count / latency histogram per (method, route template, status),
+  requests in flight per method.
+- DB: query time and query count per route (SQLAlchemy cursor events), pool
+  checkout wait (timed in `get_db`), pool occupancy for the SQLAlchemy engine
+  and the psycopg pool (read at scrape time).
+- Caches: hit / miss counters via `record_cache_lookup()`, hit ratio at scrape time.
+"""
+import time
+import threading
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Per-request accumulator shared with the DB hooks. The middleware sets a fresh
+# dict; handlers (and the threadpool workers they call into) see the same object.
+_request_stats: ContextVar[Optional[dict]] = ContextVar("request_stats", default=None)
+
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help, labels
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with _lock:
+            self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values, value: float):
+        with _lock:
+            self.values[label_values] = value
+
+    def dec(self, *label_values, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, tuple(buckets)
+        # label values -> [bucket counts..., +Inf count, sum]
+        self.values: Dict[tuple, list] = {}
+
+    def observe(self, *label_values, value: float):
+        with _lock:
+            state = self.values.get(label_values)
+            if state is None:
+                state = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self):
+        for key, state in sorted(self.values.items()):
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, state):
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {count}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {state[-2]}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {state[-1]}"
+
+
+REQUESTS = Counter("http_requests_total", "HTTP requests", ("method", "route", "status"))
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served", ("method",))
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ("route",))
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "Time per SQL statement", ("route",), DB_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Total SQL time per request", ("route",), DB_BUCKETS)
+POOL_CHECKOUT_WAIT = Histogram("db_pool_checkout_wait_seconds", "Time to obtain a pooled connection", ("route",), DB_BUCKETS)
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups", ("cache", "result"))
+
+METRICS = [REQUESTS, REQUEST_LATENCY, IN_FLIGHT, DB_QUERIES, DB_QUERY_TIME,
+           DB_TIME_PER_REQUEST, POOL_CHECKOUT_WAIT, CACHE_LOOKUPS]
+
+UNMATCHED_ROUTE = "unmatched"
+NO_ROUTE = "background"
+
+
+# ==================== HOOKS ====================
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Call on every cache read; the hit ratio is derived at scrape time."""
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+def record_pool_checkout(seconds: float):
+    stats = _request_stats.get()
+    if stats is not None:
+        stats["checkout_waits"].append(seconds)
+    else:
+        POOL_CHECKOUT_WAIT.observe(NO_ROUTE, value=seconds)
+
+
+def instrument_engine(engine):
+    """Times every statement on `engine` and attributes it to the current request."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["queries"].append(elapsed)
+        else:
+            DB_QUERIES.inc(NO_ROUTE)
+            DB_QUERY_TIME.observe(NO_ROUTE, value=elapsed)
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Per-request latency / status / DB time, labelled by the matched route template.
+
+    The route is only known once routing has run, so DB timings are collected
+    into a per-request dict and observed under the route label at the end.
+    """
+    method = request.method
+    stats = {"queries": [], "checkout_waits": []}
+    token = _request_stats.set(stats)
+    IN_FLIGHT.inc(method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _request_stats.reset(token)
+        IN_FLIGHT.dec(method)
+        route = request.scope.get("route")
+        label = route.path if route is not None else UNMATCHED_ROUTE
+        REQUESTS.inc(method, label, str(status))
+        REQUEST_LATENCY.observe(method, label, value=elapsed)
+        for seconds in stats["checkout_waits"]:
+            POOL_CHECKOUT_WAIT.observe(label, value=seconds)
+        if stats["queries"]:
+            DB_QUERIES.inc(label, amount=len(stats["queries"]))
+            for seconds in stats["queries"]:
+                DB_QUERY_TIME.observe(label, value=seconds)
+            DB_TIME_PER_REQUEST.observe(label, value=sum(stats["queries"]))
+
+
+# ==================== EXPOSITION ====================
+
+def _pool_samples():
+    from . import database, dependencies
+
+    lines = []
+    pool = database.get_engine().pool
+    for name, getter in (("size", "size"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        if hasattr(pool, getter):
+            lines.append(f"# TYPE db_pool_{name} gauge")
+            lines.append(f"db_pool_{name} {getattr(pool, getter)()}")
+
+    if dependencies.pool is not None:
+        for stat, value in sorted(dependencies.pool.get_stats().items()):
+            lines.append(f"# TYPE psycopg_pool_{stat} gauge")
+            lines.append(f"psycopg_pool_{stat} {value}")
+    return lines
+
+
+def _cache_ratio_samples():
+    totals: Dict[str, list] = {}
+    for (cache, result), value in CACHE_LOOKUPS.values.items():
+        totals.setdefault(cache, [0.0, 0.0])[0 if result == "hit" else 1] += value
+    if not totals:
+        return []
+    lines = ["# HELP cache_hit_ratio Cache hits / lookups since start", "# TYPE cache_hit_ratio gauge"]
+    for cache, (hits, misses) in sorted(totals.items()):
+        lines.append(f'cache_hit_ratio{{cache="{cache}"}} {hits / (hits + misses):.4f}')
+    return lines
+
+
+def render() -> str:
+    lines = []
+    with _lock:
+        for metric in METRICS:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        lines.extend(_cache_ratio_samples())
+    lines.extend(_pool_samples())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,89 @@
+"""
+Partition layout for scoped vector search.
+
+A single HNSW index over all of `tracks` loses recall when a query adds a
+WHERE clause: the graph walk returns the global top-k and the filter throws
+most of them away. Instead, each popularity tier and each common genre gets
+its own *partial* HNSW index. A query routed to a partition repeats the
+index predicate verbatim, so the planner can pick the matching index.
+
+The predicates below are the single source of truth for both the schema
+tooling (`scripts/etl/partition_indexes.py`) and the API routes.
+"""
+import hashlib
+from typing import Collection, Optional
+
+# Popularity buckets (Spotify popularity is 0-100). Ranges are inclusive.
+POPULARITY_TIERS = {
+    "hits": (70, 100),
+    "popular": (40, 69),
+    "niche": (15, 39),
+    "deep_cuts": (0, 14),
+}
+
+# Only the most common genres get a dedicated index; rarer genres are small
+# enough that a filtered scan is cheap anyway.
+GENRE_PARTITION_LIMIT = 25
+
+TIER_INDEX_PREFIX = "tracks_embedding_tier_"
+GENRE_INDEX_PREFIX = "tracks_embedding_genre_"
+
+
+def quote_literal(value: str) -> str:
+    """Quote a string as a SQL literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def tier_predicate(tier: str) -> str:
+    """SQL predicate for a popularity tier (must match the index definition)."""
+    low, high = POPULARITY_TIERS[tier]
+    return f"popularity BETWEEN {low} AND {high}"
+
+
+def genre_predicate(genre: str) -> str:
+    """SQL predicate for a genre partition (must match the index definition)."""
+    return f"genre = {quote_literal(genre)}"
+
+
+def genre_index_name(genre: str) -> str:
+    """
+    Stable, identifier-safe index name for a genre partition. The slug keeps it
+    readable; the hash of the exact genre keeps "hip hop" and "hip-hop" apart.
+    """
+    slug = "".join(c if c.isalnum() else "_" for c in genre.lower()).strip("_")
+    digest = hashlib.md5(genre.encode()).hexdigest()[:8]
+    return f"{GENRE_INDEX_PREFIX}{slug[:30]}_{digest}"
+
+
+def partition_filter(genre: Optional[str] = None, popularity_tier: Optional[str] = None,
+                     columns: Optional[Collection[str]] = None) -> str:
+    """
+    Build the WHERE fragment that routes a KNN query to its partition.
+
+    Predicates are inlined as literals rather than bound parameters: the planner
+    only picks a partial index when it can prove the query predicate implies the
+    index predicate, which it cannot do for a generic parameterised plan.
+
+    `columns` are the columns `tracks` actually has (database.table_columns);
+    a filter on a missing column is refused instead of failing in Postgres.
+    Raises ValueError for an unknown tier or a missing column.
+    """
+    clauses = []
+    for value, column in ((popularity_tier, "popularity"), (genre, "genre")):
+        if value and columns is not None and column not in columns:
+            raise ValueError(
+                f"Filtering by {column} is not available: tracks has no '{column}' column "
+                f"(run scripts/etl/partition_indexes.py)"
+            )
+    if popularity_tier is not None:
+        if popularity_tier not in POPULARITY_TIERS:
+            raise ValueError(
+                f"Unknown popularity_tier '{popularity_tier}'. "
+                f"Expected one of: {', '.join(POPULARITY_TIERS)}"
+            )
+        clauses.append(tier_predicate(popularity_tier))
+    if genre:
+        clauses.append(genre_predicate(genre.strip().lower()))
+    if not clauses:
+        return ""
+    return " AND " + " AND ".join(clauses)
@@ -0,0 +1,135 @@
+"""
+On-demand profiling of the live worker process (served by /admin/profile/*).
+
+- CPU: a pure-Python sampler that reads every thread's stack through
+  `sys._current_frames()` at a fixed interval, from a background thread, and
+  aggregates the samples into flamegraph-compatible collapsed stacks
+  ("root;caller;leaf count", the input format of flamegraph.pl / speedscope).
+  Unlike cProfile it needs no tracing hooks, so the overhead stays low and the
+  process keeps serving requests while it is profiled.
+- Memory: two tracemalloc snapshots N seconds apart, diffed by allocation site.
+
+Only one profile runs at a time per process.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List
+
+TRACEMALLOC_FRAMES = 10
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    # ';' separates frames in the collapsed format, ' ' separates the count
+    return f"{code.co_name} ({short}:{code.co_firstlineno})".replace(";", ":").replace(" ", "_")
+
+
+def _stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Dict[str, int]:
+    """
+    Samples all threads (except the sampler itself) for `seconds`.
+
+    Returns:
+        {collapsed stack: sample count}, stacks prefixed with the thread name.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        me = threading.get_ident()
+        counts: Counter = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                counts[f"{names.get(thread_id, thread_id)};{_stack(frame)}"] += 1
+            time.sleep(interval)
+        return dict(counts)
+    finally:
+        _profile_lock.release()
+
+
+def collapsed(stacks: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda kv: -kv[1]))
+
+
+def top_functions(stacks: Dict[str, int], limit: int = 30) -> List[dict]:
+    """Self (leaf) and total (anywhere on the stack) sample counts per function."""
+    self_counts: Counter = Counter()
+    total_counts: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")[1:]
+        if not frames:
+            continue
+        self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+    samples = sum(stacks.values()) or 1
+    return [
+        {
+            "function": label,
+            "self": self_counts[label],
+            "total": total_counts[label],
+            "self_pct": round(100 * self_counts[label] / samples, 1),
+        }
+        for label, _ in self_counts.most_common(limit)
+    ]
+
+
+async def memory_diff(seconds: float, limit: int = 25, key_type: str = "lineno") -> dict:
+    """Allocation growth by site over `seconds` (tracemalloc is started for the window if needed)."""
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        current, peak = tracemalloc.get_traced_memory()
+
+        stats = after.compare_to(before, key_type)
+        return {
+            "seconds": seconds,
+            "traced_current_kb": round(current / 1024, 1),
+            "traced_peak_kb": round(peak / 1024, 1),
+            "tracing_started_for_window": started_here,
+            "top": [
+                {
+                    "site": [f"{f.filename}:{f.lineno}" for f in stat.traceback],
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "size_kb": round(stat.size / 1024, 1),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:limit]
+            ],
+        }
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _profile_lock.release()
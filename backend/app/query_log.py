@@ -0,0 +1,193 @@
+"""
+Slow-query log with automatic EXPLAIN capture.
+
+Every statement run through an instrumented SQLAlchemy engine (`instrument_engine`)
+or a psycopg connection created with `cursor_factory=TimedCursor / AsyncTimedCursor`
+(from `app.timed_cursors`, kept separate so psycopg is not imported at startup)
+is timed. Statements slower than SLOW_QUERY_MS are recorded, with their parameters,
+in an in-memory ring buffer served by `GET /admin/slow-queries`.
+
+A sample of slow SELECTs also gets an `EXPLAIN (ANALYZE, BUFFERS)` plan. The plan
+is taken right away on the same connection, inside a savepoint, so it sees the same
+session settings (e.g. `SET LOCAL hnsw.ef_search`). EXPLAIN ANALYZE runs the query
+again, so captures are sampled (SLOW_QUERY_SAMPLE_RATE) and rate-limited
+(SLOW_QUERY_EXPLAINS_PER_MINUTE). Only SELECTs (including `WITH ... SELECT`) are
+explained; ANALYZE would apply writes for other statements, so CTEs that modify
+data are skipped too.
+
+Settings (env):
+    SLOW_QUERY_MS                   threshold in ms (default 200, 0 disables the log)
+    SLOW_QUERY_SAMPLE_RATE          share of slow SELECTs to explain (default 1.0)
+    SLOW_QUERY_EXPLAINS_PER_MINUTE  explain budget (default 6)
+    SLOW_QUERY_BUFFER_SIZE          ring buffer capacity (default 100)
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+import re
+from typing import Optional
+
+from sqlalchemy import event
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE", "1.0"))
+SLOW_QUERY_EXPLAINS_PER_MINUTE = float(os.getenv("SLOW_QUERY_EXPLAINS_PER_MINUTE", "6"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "100"))
+
+MAX_STATEMENT_CHARS = 4000
+MAX_PARAM_CHARS = 200
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) "
+SAVEPOINT = "slow_query_explain"
+# A data-modifying CTE (WITH moved AS (DELETE ... RETURNING *) SELECT ...) is still a write
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+class TokenBucket:
+    """Allows `per_minute` events per minute, with bursts up to the same number."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(per_minute, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, sample_rate: float, explains_per_minute: float, size: int):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.explain_budget = TokenBucket(explains_per_minute)
+        self.entries = deque(maxlen=size)
+        self.total_slow = 0
+        self.lock = threading.Lock()
+
+    def is_slow(self, duration_ms: float) -> bool:
+        return self.threshold_ms > 0 and duration_ms >= self.threshold_ms
+
+    def explain_decision(self, statement: str) -> Optional[str]:
+        """None if the statement should be explained, otherwise the reason it is not."""
+        if not is_read_only(statement):
+            return "not a SELECT"
+        if random.random() >= self.sample_rate:
+            return "not sampled"
+        if not self.explain_budget.take():
+            return "rate limited"
+        return None
+
+    def record(self, source: str, statement: str, params, duration_ms: float,
+               plan: Optional[str] = None, explain_skipped: Optional[str] = None):
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "source": source,
+            "duration_ms": round(duration_ms, 2),
+            "statement": " ".join(statement.split())[:MAX_STATEMENT_CHARS],
+            "params": format_params(params),
+            "plan": plan,
+            "explain_skipped": explain_skipped,
+        }
+        with self.lock:
+            self.entries.append(entry)
+            self.total_slow += 1
+
+    def snapshot(self, limit: int = 50) -> dict:
+        with self.lock:
+            entries = list(self.entries)[-limit:][::-1]
+            total = self.total_slow
+        return {
+            "threshold_ms": self.threshold_ms,
+            "sample_rate": self.sample_rate,
+            "total_slow": total,
+            "entries": entries,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    SLOW_QUERY_MS, SLOW_QUERY_SAMPLE_RATE, SLOW_QUERY_EXPLAINS_PER_MINUTE, SLOW_QUERY_BUFFER_SIZE
+)
+
+
+def format_params(params):
+    """Parameters as JSON-friendly values, with long values (vectors, id lists) truncated."""
+    def short(value):
+        text = repr(value)
+        return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + f"... ({len(text)} chars)"
+
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {str(k): short(v) for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [short(v) for v in params]
+    return short(params)
+
+
+def is_read_only(statement: str) -> bool:
+    """True for a SELECT, or a WITH ... SELECT whose CTEs do not write."""
+    head = statement.lstrip().upper()
+    if head.startswith("SELECT"):
+        return True
+    return head.startswith("WITH") and not WRITE_KEYWORDS.search(statement)
+
+
+def plan_text(rows) -> str:
+    return "\n".join(row[0] for row in rows)
+
+
+# ==================== SQLALCHEMY ====================
+
+def instrument_engine(engine):
+    """Adds slow-query timing (and EXPLAIN on Postgres) to a SQLAlchemy engine."""
+    explainable = engine.dialect.name == "postgresql"
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+        log = slow_query_log
+        if executemany or not log.is_slow(duration_ms):
+            return
+        skipped = log.explain_decision(statement) if explainable else "not Postgres"
+        plan = None
+        if skipped is None:
+            plan, skipped = _explain_dbapi(conn.connection.dbapi_connection, statement, parameters)
+        log.record("sqlalchemy", statement, parameters, duration_ms, plan, skipped)
+
+
+def _explain_dbapi(dbapi_conn, statement, parameters):
+    """EXPLAIN on the request's own connection, isolated by a savepoint."""
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute(f"SAVEPOINT {SAVEPOINT}")
+        try:
+            cur.execute(EXPLAIN_PREFIX + statement, parameters)
+            plan = plan_text(cur.fetchall())
+            cur.execute(f"RELEASE SAVEPOINT {SAVEPOINT}")
+            return plan, None
+        except Exception as e:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {SAVEPOINT}")
+            return None, f"explain failed: {e}"
+    except Exception as e:
+        return None, f"explain failed: {e}"
+    finally:
+        cur.close()
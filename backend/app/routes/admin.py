@@ -0,0 +1,62 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from .auth import get_admin_user
+from ..database import invalidate_schema
+from ..query_log import slow_query_log
+from ..profiling import ProfilerBusy, sample_stacks, collapsed, top_functions, memory_diff
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_admin_user)])
+
+@router.get("/slow-queries")
+async def get_slow_queries(limit: int = Query(50, ge=1, le=1000)):
+    """Most recent slow statements (newest first), with parameters and EXPLAIN plans when captured."""
+    return slow_query_log.snapshot(limit)
+
+@router.delete("/slow-queries")
+async def clear_slow_queries():
+    """Empty the slow-query ring buffer."""
+    slow_query_log.clear()
+    return {"status": "cleared"}
+
+@router.delete("/schema-cache")
+async def clear_schema_cache():
+    """Re-read table metadata on next use (after migrations / ETL schema changes)."""
+    invalidate_schema()
+    return {"status": "cleared"}
+
+@router.get("/profile/cpu")
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(5, ge=1, le=100),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+):
+    """
+    Sample this worker's thread stacks for `seconds`.
+
+    `collapsed` returns flamegraph.pl / speedscope input; `json` returns the
+    top functions by self time.
+    """
+    try:
+        # The sampler runs in a thread so the event loop keeps serving (and gets sampled)
+        stacks = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if format == "json":
+        return {"samples": sum(stacks.values()), "top": top_functions(stacks)}
+    return PlainTextResponse(collapsed(stacks))
+
+@router.get("/profile/memory")
+async def profile_memory(
+    seconds: float = Query(10, gt=0, le=300),
+    limit: int = Query(25, ge=1, le=200),
+    key_type: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+):
+    """Diff two tracemalloc snapshots taken `seconds` apart (top allocation growth)."""
+    try:
+        return await memory_diff(seconds, limit, key_type)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from pydantic import BaseModel
+from typing import List
+
+from ..database import get_db
+from ..schemas import SimilarAlbumResponse
+
+router = APIRouter(prefix="/albums", tags=["albums"])
+
+# ivfflat only scans `probes` of its 100 lists; the default of 1 misses too
+# many neighbours for a small catalogue like the dev seed
+IVFFLAT_PROBES = 10
+
+class AlbumsLikeTracksRequest(BaseModel):
+    track_ids: List[str]
+    limit: int = 10
+
+def row_to_album(row) -> dict:
+    """Convert an albums row (with a `distance` column) to a similar-album dict."""
+    distance = float(row.distance) if row.distance is not None else 0
+    return {
+        "id": str(row.album_id),
+        "name": row.name,
+        "artist": row.artist,
+        "popularity": row.popularity,
+        "track_count": row.track_count,
+        # Same normalisation as /tracks/{id}/similar
+        "similarity": round(max(0, 1 - (distance / 2)), 3),
+    }
+
+@router.get("/{album_id}/similar", response_model=list[SimilarAlbumResponse])
+async def get_similar_albums(
+    album_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Get albums whose centroid embedding is closest to this album's (ivfflat index).
+
+    Albums without a centroid (none of their tracks seeded yet) are skipped.
+    """
+    source = db.execute(
+        text("SELECT avg_embedding FROM albums WHERE album_id = :id"),
+        {"id": album_id}
+    ).fetchone()
+
+    if not source:
+        raise HTTPException(status_code=404, detail="Album not found")
+    if source.avg_embedding is None:
+        return []
+
+    db.execute(text(f"SET LOCAL ivfflat.probes = {IVFFLAT_PROBES}"))
+    result = db.execute(
+        text("""
+            SELECT
+                album_id, name, artist, popularity, track_count,
+                avg_embedding <-> (SELECT avg_embedding FROM albums WHERE album_id = :id) as distance
+            FROM albums
+            WHERE album_id != :id AND avg_embedding IS NOT NULL
+            ORDER BY avg_embedding <-> (SELECT avg_embedding FROM albums WHERE album_id = :id)
+            LIMIT :limit
+        """),
+        {"id": album_id, "limit": limit}
+    ).fetchall()
+
+    return [row_to_album(row) for row in result]
+
+@router.post("/similar", response_model=list[SimilarAlbumResponse])
+async def get_albums_like_tracks(
+    request: AlbumsLikeTracksRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Get albums that sound like a set of tracks.
+
+    The tracks' average embedding is matched against album centroids; albums
+    that already contain one of the seed tracks are excluded.
+    """
+    if not request.track_ids:
+        raise HTTPException(status_code=400, detail="At least one track_id is required")
+
+    seed = db.execute(
+        text("SELECT AVG(audio_embedding)::text as centroid FROM tracks WHERE track_id = ANY(:ids)"),
+        {"ids": request.track_ids}
+    ).fetchone()
+
+    if not seed or seed.centroid is None:
+        raise HTTPException(status_code=404, detail="No valid tracks found")
+
+    db.execute(text(f"SET LOCAL ivfflat.probes = {IVFFLAT_PROBES}"))
+    result = db.execute(
+        text("""
+            SELECT
+                album_id, name, artist, popularity, track_count,
+                avg_embedding <-> CAST(:centroid AS vector) as distance
+            FROM albums a
+            WHERE a.avg_embedding IS NOT NULL AND NOT EXISTS (
+                SELECT 1 FROM album_tracks at
+                WHERE at.album_id = a.album_id AND at.track_id = ANY(:ids)
+            )
+            ORDER BY avg_embedding <-> CAST(:centroid AS vector)
+            LIMIT :limit
+        """),
+        {"centroid": seed.centroid, "ids": request.track_ids, "limit": request.limit}
+    ).fetchall()
+
+    return [row_to_album(row) for row in result]
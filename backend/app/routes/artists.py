@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from pydantic import BaseModel
+from typing import List
+
+from ..database import get_db
+
+router = APIRouter(prefix="/artists", tags=["artists"])
+
+class SimilarArtistResponse(BaseModel):
+    artist: str
+    track_count: int
+    similarity: float
+
+@router.get("/{artist}/similar", response_model=List[SimilarArtistResponse])
+async def get_similar_artists(
+    artist: str,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Get artists with a similar sonic profile.
+
+    Served from the materialised `artist_centroids` table (see
+    scripts/etl/centroids.py) instead of aggregating the artist's tracks.
+    """
+    source = db.execute(
+        text("SELECT centroid FROM artist_centroids WHERE artist = :artist"),
+        {"artist": artist}
+    ).fetchone()
+
+    if not source or source.centroid is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+
+    result = db.execute(
+        text("""
+            SELECT
+                artist, track_count,
+                centroid <-> (SELECT centroid FROM artist_centroids WHERE artist = :artist) as distance
+            FROM artist_centroids
+            WHERE artist != :artist
+            ORDER BY centroid <-> (SELECT centroid FROM artist_centroids WHERE artist = :artist)
+            LIMIT :limit
+        """),
+        {"artist": artist, "limit": limit}
+    ).fetchall()
+
+    return [
+        {
+            "artist": row.artist,
+            "track_count": row.track_count,
+            # Same normalisation as /tracks/{id}/similar
+            "similarity": round(max(0, 1 - (float(row.distance) / 2)), 3),
+        }
+        for row in result
+    ]
@@ -1,16 +1,30 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
+import numpy as np
 
-from ..database import get_db
+from ..database import get_db, select_columns, table_columns
+from ..partitions import partition_filter
+from ..services.ranking import mmr_rerank, profile_centroids, allocate_quotas, interleave
+from ..timing import span
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
+# Diversity re-ranking: fetch limit * MMR_OVERFETCH candidates (capped) and let MMR pick
+MMR_OVERFETCH = 10
+MMR_MAX_CANDIDATES = 500
+# Heterogeneous seed sets are split into at most this many taste centroids
+MAX_PROFILE_CENTROIDS = 3
+
 class TrackRecommendationRequest(BaseModel):
-    track_ids: List[str]  # User's liked track IDs
+    track_ids: List[str] = []  # User's liked track IDs
+    seed_artists: List[str] = []  # Liked artists (cold-start prior from artist_centroids)
     limit: int = 12
+    genre: Optional[str] = None  # Restrict to a genre partition
+    popularity_tier: Optional[str] = None  # hits | popular | niche | deep_cuts
+    diversity: float = Field(0.0, ge=0.0, le=1.0)  # 0 = pure similarity, 1 = max diversity (MMR)
 
 class TrackResponse(BaseModel):
     id: str
@@ -25,15 +39,19 @@ class TrackListResponse(BaseModel):
     tracks: List[TrackResponse]
     total: int
 
+def track_columns() -> str:
+    """Columns read by row_to_track; album / popularity are NULL when the schema lacks them."""
+    return select_columns("tracks", ["track_id", "name", "artist"], ["album", "popularity"])
+
 def row_to_track(row) -> dict:
-    """Convert a database row to a track dictionary."""
+    """Convert a database row (selected with track_columns()) to a track dictionary."""
     return {
-        "id": str(row.track_id) if hasattr(row, 'track_id') else "",
-        "name": row.name if hasattr(row, 'name') else "Unknown",
-        "artist": row.artist if hasattr(row, 'artist') else "Unknown",
-        "album": row.album if hasattr(row, 'album') else None,
-        "popularity": row.popularity if hasattr(row, 'popularity') else 0,
-        "score": float(row.score) if hasattr(row, 'score') and row.score else None,
+        "id": str(row.track_id),
+        "name": row.name,
+        "artist": row.artist,
+        "album": row.album,
+        "popularity": row.popularity,
+        "score": None,
         "reason": None
     }
 
@@ -50,8 +68,8 @@ async def get_tracks_selection(
     total = count_result[0] if count_result else 0
     
     result = db.execute(
-        text("""
-            SELECT track_id, name, artist, album, popularity
+        text(f"""
+            SELECT {track_columns()}
             FROM tracks
             ORDER BY popularity DESC NULLS LAST
             LIMIT :limit OFFSET :offset
@@ -75,72 +93,130 @@ async def get_track_recommendations(
     Get track recommendations based on user's liked tracks.
     
     Algorithm:
-    1. Compute average embedding of chosen tracks
-    2. Find similar tracks using pgvector L2 distance
-    3. Boost score for same artist
+    1. Compute the taste profile of chosen tracks (plus the centroids of any
+       seed artists): their average embedding, or a few k-means centroids when
+       the seeds span distinct clusters
+    2. Find similar tracks using pgvector L2 distance (optionally scoped to a
+       genre / popularity tier partition)
+    3. Merge per-centroid results with quota interleaving
+    4. Optionally re-rank with MMR (`diversity` > 0) to avoid near-duplicates
     """
-    if not request.track_ids:
-        raise HTTPException(status_code=400, detail="At least one track_id is required")
+    if not request.track_ids and not request.seed_artists:
+        raise HTTPException(status_code=400, detail="At least one track_id or seed_artist is required")
+    
+    try:
+        partition_sql = partition_filter(request.genre, request.popularity_tier, table_columns("tracks"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Format track IDs for SQL
-    track_ids_str = ", ".join([f"'{tid}'" for tid in request.track_ids])
+    track_ids_str = ", ".join([f"'{tid}'" for tid in request.track_ids]) or "''"
     
-    # Step 1: Get the average embedding of liked tracks
-    avg_embedding_result = db.execute(
-        text(f"""
-            SELECT 
-                AVG((audio_embedding::real[])[1]) as avg1,
-                AVG((audio_embedding::real[])[2]) as avg2,
-                AVG((audio_embedding::real[])[3]) as avg3,
-                AVG((audio_embedding::real[])[4]) as avg4,
-                AVG((audio_embedding::real[])[5]) as avg5,
-                STRING_AGG(DISTINCT artist, ', ') as liked_artists
-            FROM tracks
-            WHERE track_id IN ({track_ids_str})
-        """)
-    ).fetchone()
+    # Step 1: Build the taste profile from the liked tracks' embeddings
+    # (one centroid for a coherent seed set, several for heterogeneous ones)
+    with span("db-embedding"):
+        seed_rows = db.execute(
+            text(f"""
+                SELECT audio_embedding::real[] as embedding, artist
+                FROM tracks
+                WHERE track_id IN ({track_ids_str})
+            """)
+        ).fetchall()
+        
+        # Cold start: liked artists contribute their materialised centroid as a seed
+        if request.seed_artists:
+            seed_rows += db.execute(
+                text("""
+                    SELECT centroid::real[] as embedding, artist
+                    FROM artist_centroids
+                    WHERE artist = ANY(:artists)
+                """),
+                {"artists": request.seed_artists}
+            ).fetchall()
+    seed_rows = [row for row in seed_rows if row.embedding is not None]
     
-    if not avg_embedding_result or avg_embedding_result.avg1 is None:
+    if not seed_rows:
         raise HTTPException(status_code=404, detail="No valid tracks found")
     
-    # Build average embedding vector
-    avg_embedding = f"[{avg_embedding_result.avg1},{avg_embedding_result.avg2},{avg_embedding_result.avg3},{avg_embedding_result.avg4},{avg_embedding_result.avg5}]"
-    liked_artists = avg_embedding_result.liked_artists or ""
-    liked_artists_list = [a.strip() for a in liked_artists.split(",")]
+    with span("profile"):
+        seed_vectors = np.array([row.embedding for row in seed_rows], dtype=np.float64)
+        centroids, weights = profile_centroids(seed_vectors, max_k=MAX_PROFILE_CENTROIDS)
+    centroid_strs = ["[" + ",".join(f"{v:.6f}" for v in c) + "]" for c in centroids]
+    
+    liked_artists_list = sorted({
+        a.strip() for row in seed_rows if row.artist for a in row.artist.split(",")
+    })
     
     # Step 2: Find similar tracks
     # Score = audio_similarity (inverted L2 distance)
     # Filter: Exclude tracks from the same artists as the liked tracks
     
     # Format artist exclusion list for SQL array
-    quoted_artists = [f"'%{a}%'" for a in liked_artists_list]
+    quoted_artists = [f"'%{a}%'" for a in liked_artists_list] or ["''"]
     artists_str = ", ".join(quoted_artists)
     excluded_artists_array = f"ARRAY[{artists_str}]"
     
-    result = db.execute(
-        text(f"""
-            SELECT 
-                track_id,name,artist,album,popularity,
-                -- Audio similarity (inverted L2 distance)
-                1.0 / (1.0 + (audio_embedding <-> '{avg_embedding}'::vector)) as score
-            FROM tracks
-            WHERE track_id NOT IN ({track_ids_str})
-            AND NOT (artist ILIKE ANY({excluded_artists_array}))
-            ORDER BY score DESC
-            LIMIT :limit
-        """),
-        {"limit": request.limit}
-    ).fetchall()
+    # Diversity re-ranking needs a wider candidate pool to choose from
+    rerank = request.diversity > 0
+    candidate_limit = request.limit
+    if rerank:
+        candidate_limit = min(max(request.limit * MMR_OVERFETCH, request.limit), MMR_MAX_CANDIDATES)
+        # HNSW returns at most ef_search rows, so widen it for the over-fetch
+        db.execute(text(f"SET LOCAL hnsw.ef_search = {max(candidate_limit, 40)}"))
+    embedding_col = ", audio_embedding::real[] as embedding" if rerank else ""
+    
+    # One round trip: a LATERAL KNN per centroid, each served by the HNSW index
+    with span("db-knn"):
+        result = db.execute(
+            text(f"""
+                SELECT c.centroid_idx, t.*
+                FROM unnest(CAST(:centroids AS text[])) WITH ORDINALITY AS c(vec, centroid_idx)
+                CROSS JOIN LATERAL (
+                    SELECT 
+                        {track_columns()},
+                        -- Audio similarity (inverted L2 distance)
+                        1.0 / (1.0 + (audio_embedding <-> c.vec::vector)) as score
+                        {embedding_col}
+                    FROM tracks
+                    WHERE track_id NOT IN ({track_ids_str})
+                    AND NOT (artist ILIKE ANY({excluded_artists_array}))
+                    {partition_sql}
+                    -- Order by raw distance (same ranking as score DESC) so the HNSW index is used
+                    ORDER BY audio_embedding <-> c.vec::vector
+                    LIMIT :limit
+                ) t
+                ORDER BY c.centroid_idx, t.score DESC
+            """),
+            {"centroids": centroid_strs, "limit": candidate_limit}
+        ).fetchall()
+    
+    # Step 3: Merge per-centroid lists, giving each centroid a share of the
+    # page proportional to how many seeds it represents
+    with span("rerank"):
+        per_centroid = [[] for _ in centroid_strs]
+        for row in result:
+            per_centroid[row.centroid_idx - 1].append(row)
+        quotas = allocate_quotas(weights, candidate_limit)
+        result = interleave(per_centroid, quotas, candidate_limit, key=lambda row: row.track_id)
+        
+        # Step 4 (optional): MMR re-ranking to push near-duplicates down
+        if rerank and result:
+            embeddings = np.array([row.embedding for row in result], dtype=np.float32)
+            relevance = np.array([row.score for row in result], dtype=np.float32)
+            order = mmr_rerank(embeddings, relevance, request.limit, lambda_=1.0 - request.diversity)
+            result = [result[i] for i in order]
     
     tracks = []
-    for row in result:
-        track = row_to_track(row)
-        # Add reason
-        if hasattr(row, 'score') and row.score is not None and row.score > 0.8:
-            track["reason"] = "Perfect Match"
-        else:
-            track["reason"] = "Sonic Match"
-        tracks.append(track)
+    with span("serialize"):
+        for row in result:
+            track = row_to_track(row)
+            track["score"] = float(row.score) if row.score else None
+            # Add reason
+            if row.score is not None and row.score > 0.8:
+                track["reason"] = "Perfect Match"
+            else:
+                track["reason"] = "Sonic Match"
+            tracks.append(track)
     
     return {
         "tracks": tracks,
@@ -3,25 +3,28 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import Optional
 
-from ..database import get_db
+from ..cache import trending_cache, hot_tracks_cache, autocomplete_cache
+from ..database import get_db, table_columns
+from ..partitions import partition_filter
 from ..schemas import TrackResponse, TrackListResponse, SimilarTrackResponse
+from ..timing import span
 
 router = APIRouter(prefix="/tracks", tags=["tracks"])
 
 def row_to_track(row) -> dict:
-    """Convert a database row to a track dictionary."""
+    """Convert a database row (track_id, name, artist and the five audio features) to a track dictionary."""
     return {
-        "id": str(row.track_id) if hasattr(row, 'track_id') else str(row.id) if hasattr(row, 'id') else "",
-        "name": row.name if hasattr(row, 'name') else "Unknown",
-        "artist": row.artist if hasattr(row, 'artist') else "Unknown",
+        "id": str(row.track_id),
+        "name": row.name,
+        "artist": row.artist,
         "album": None,  # Not available in Postgres schema
         "genre": None,
         "duration_ms": None,
-        "danceability": float(row.danceability) if hasattr(row, 'danceability') and row.danceability else None,
-        "energy": float(row.energy) if hasattr(row, 'energy') and row.energy else None,
-        "valence": float(row.valence) if hasattr(row, 'valence') and row.valence else None,
-        "tempo": float(row.tempo) if hasattr(row, 'tempo') and row.tempo else None,
-        "acousticness": float(row.acousticness) if hasattr(row, 'acousticness') and row.acousticness else None,
+        "danceability": float(row.danceability) if row.danceability else None,
+        "energy": float(row.energy) if row.energy else None,
+        "valence": float(row.valence) if row.valence else None,
+        "tempo": float(row.tempo) if row.tempo else None,
+        "acousticness": float(row.acousticness) if row.acousticness else None,
         "instrumentalness": None,
         "liveness": None,
         "speechiness": None,
@@ -29,6 +32,58 @@ def row_to_track(row) -> dict:
         "cover_url": None,
     }
 
+# ==================== CACHED LOOKUPS ====================
+# Shared by the endpoints below and by the startup warm-up (app/warmup.py).
+
+def load_trending(db: Session, limit: int) -> list[dict]:
+    """Most popular tracks (also the hot-track set pre-loaded at startup)."""
+    result = db.execute(
+        text("""
+            SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
+            FROM tracks
+            ORDER BY popularity DESC NULLS LAST
+            LIMIT :limit
+        """),
+        {"limit": limit}
+    ).fetchall()
+    return [row_to_track(row) for row in result]
+
+def load_track(db: Session, track_id: str) -> Optional[dict]:
+    result = db.execute(
+        text("""
+            SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
+            FROM tracks
+            WHERE track_id = :id
+            LIMIT 1
+        """),
+        {"id": track_id}
+    ).fetchone()
+    return row_to_track(result) if result else None
+
+def load_search(db: Session, q: str, limit: int, offset: int = 0) -> list[dict]:
+    """Tracks whose name or artist contains `q`, most popular first."""
+    with span("db-search"):
+        result = db.execute(
+            text("""
+                SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
+                FROM tracks
+                WHERE name ILIKE :term OR artist ILIKE :term
+                ORDER BY popularity DESC NULLS LAST
+                LIMIT :limit OFFSET :offset
+            """),
+            {"term": f"%{q}%", "limit": limit, "offset": offset}
+        ).fetchall()
+    with span("serialize"):
+        return [row_to_track(row) for row in result]
+
+def normalize_query(q: str) -> str:
+    """The search term as matched and cached: ILIKE ignores case, surrounding spaces are dropped."""
+    return q.strip().lower()
+
+def autocomplete_key(term: str, page_size: int) -> tuple:
+    """Cache key of a first search page; `term` must already be normalize_query()'d."""
+    return (term, page_size)
+
 @router.get("", response_model=TrackListResponse)
 async def get_tracks(
     page: int = Query(0, ge=0),
@@ -69,17 +124,10 @@ async def get_trending_tracks(
     db: Session = Depends(get_db)
 ):
     """Get trending/popular tracks."""
-    result = db.execute(
-        text("""
-            SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
-            FROM tracks
-            ORDER BY popularity DESC NULLS LAST
-            LIMIT :limit
-        """),
-        {"limit": limit}
-    ).fetchall()
-    
-    tracks = [row_to_track(row) for row in result]
+    tracks = trending_cache.get(limit)
+    if tracks is None:
+        tracks = load_trending(db, limit)
+        trending_cache.set(limit, tracks)
     
     return {
         "tracks": tracks,
@@ -98,21 +146,19 @@ async def search_tracks(
 ):
     """Search tracks by name or artist."""
     offset = page * page_size
-    search_term = f"%{q}%"
-    
-    # Search in track names and artist names
-    result = db.execute(
-        text("""
-            SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
-            FROM tracks
-            WHERE name ILIKE :term OR artist ILIKE :term
-            ORDER BY popularity DESC NULLS LAST
-            LIMIT :limit OFFSET :offset
-        """),
-        {"term": search_term, "limit": page_size, "offset": offset}
-    ).fetchall()
+    # The same term is matched and cached, so a cache entry always holds its own query's rows
+    term = normalize_query(q)
     
-    tracks = [row_to_track(row) for row in result]
+    # Search in track names and artist names. The first page is what the
+    # search-as-you-type box asks for, so it is cached.
+    if page == 0:
+        key = autocomplete_key(term, page_size)
+        tracks = autocomplete_cache.get(key)
+        if tracks is None:
+            tracks = load_search(db, term, page_size)
+            autocomplete_cache.set(key, tracks)
+    else:
+        tracks = load_search(db, term, page_size, offset)
     
     return {
         "tracks": tracks,
@@ -125,58 +171,63 @@ async def search_tracks(
 @router.get("/{track_id}")
 async def get_track(track_id: str, db: Session = Depends(get_db)):
     """Get a single track by ID."""
-    result = db.execute(
-        text("""
-            SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
-            FROM tracks
-            WHERE track_id = :id
-            LIMIT 1
-        """),
-        {"id": track_id}
-    ).fetchone()
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="Track not found")
+    track = hot_tracks_cache.get(track_id)
+    if track is None:
+        track = load_track(db, track_id)
+        if not track:
+            raise HTTPException(status_code=404, detail="Track not found")
+        hot_tracks_cache.set(track_id, track)
     
-    return row_to_track(result)
+    return track
 
 @router.get("/{track_id}/similar", response_model=list[SimilarTrackResponse])
 async def get_similar_tracks(
     track_id: str,
     limit: int = Query(10, ge=1, le=50),
+    genre: Optional[str] = Query(None, description="Restrict to a genre partition"),
+    popularity_tier: Optional[str] = Query(None, description="hits | popular | niche | deep_cuts"),
     db: Session = Depends(get_db)
 ):
     """Get similar tracks using vector similarity (pgvector)."""
+    try:
+        partition_sql = partition_filter(genre, popularity_tier, table_columns("tracks"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Get the source track's embedding
-    source = db.execute(
-        text("SELECT audio_embedding FROM tracks WHERE track_id = :id"),
-        {"id": track_id}
-    ).fetchone()
+    with span("db-embedding"):
+        source = db.execute(
+            text("SELECT audio_embedding FROM tracks WHERE track_id = :id"),
+            {"id": track_id}
+        ).fetchone()
     
     if not source:
         raise HTTPException(status_code=404, detail="Track not found")
     
     # Use pgvector's <-> operator for L2 distance
-    result = db.execute(
-        text("""
-            SELECT 
-                track_id, name, artist, danceability, energy, valence, tempo, acousticness,
-                audio_embedding <-> (SELECT audio_embedding FROM tracks WHERE track_id = :id) as distance
-            FROM tracks
-            WHERE track_id != :id
-            ORDER BY audio_embedding <-> (SELECT audio_embedding FROM tracks WHERE track_id = :id)
-            LIMIT :limit
-        """),
-        {"id": track_id, "limit": limit}
-    ).fetchall()
+    with span("db-knn"):
+        result = db.execute(
+            text(f"""
+                SELECT 
+                    track_id, name, artist, danceability, energy, valence, tempo, acousticness,
+                    audio_embedding <-> (SELECT audio_embedding FROM tracks WHERE track_id = :id) as distance
+                FROM tracks
+                WHERE track_id != :id
+                {partition_sql}
+                ORDER BY audio_embedding <-> (SELECT audio_embedding FROM tracks WHERE track_id = :id)
+                LIMIT :limit
+            """),
+            {"id": track_id, "limit": limit}
+        ).fetchall()
     
     similar_tracks = []
-    for row in result:
-        track = row_to_track(row)
-        # Convert distance to similarity (0-1, where 1 is most similar)
-        distance = float(row.distance) if hasattr(row, 'distance') and row.distance else 0
-        similarity = max(0, 1 - (distance / 2))  # Normalize L2 distance
-        track["similarity"] = round(similarity, 3)
-        similar_tracks.append(track)
+    with span("serialize"):
+        for row in result:
+            track = row_to_track(row)
+            # Convert distance to similarity (0-1, where 1 is most similar)
+            distance = float(row.distance) if row.distance else 0
+            similarity = max(0, 1 - (distance / 2))  # Normalize L2 distance
+            track["similarity"] = round(similarity, 3)
+            similar_tracks.append(track)
     
     return similar_tracks
@@ -35,3 +35,13 @@ class TrackListResponse(BaseModel):
 
 class SimilarTrackResponse(TrackResponse):
     similarity: float
+
+class AlbumResponse(BaseModel):
+    id: str
+    name: Optional[str] = None
+    artist: Optional[str] = None
+    popularity: Optional[int] = None
+    track_count: Optional[int] = None
+
+class SimilarAlbumResponse(AlbumResponse):
+    similarity: float
@@ -0,0 +1,190 @@
+"""
+Re-ranking stages that run on an over-fetched candidate set.
+
+Everything here is vectorised NumPy over the (small) candidate matrix so a
+stage adds well under a millisecond for a few hundred candidates.
+"""
+import numpy as np
+from typing import List
+
+
+def similarity_to(embeddings: np.ndarray, sq_norms: np.ndarray, i: int) -> np.ndarray:
+    """
+    One row of the pairwise similarity matrix, on the same scale as the
+    recommendation score: 1 / (1 + L2 distance).
+
+    MMR only ever reads the rows of picked items, so computing k rows on
+    demand is far cheaper than materialising the full n x n matrix.
+    """
+    d2 = sq_norms + sq_norms[i] - 2.0 * (embeddings @ embeddings[i])
+    np.maximum(d2, 0.0, out=d2)
+    return 1.0 / (1.0 + np.sqrt(d2))
+
+
+def mmr_rerank(embeddings: np.ndarray, relevance: np.ndarray, k: int, lambda_: float = 0.7) -> List[int]:
+    """
+    Maximal Marginal Relevance selection.
+
+    Greedily picks the candidate maximising
+        lambda * relevance - (1 - lambda) * max_similarity_to_already_picked
+    so near-duplicates (same song by another uploader, remasters) are pushed
+    down in favour of sonically different tracks.
+
+    Args:
+        embeddings: (n, d) candidate vectors.
+        relevance: (n,) relevance scores, higher is better.
+        k: number of items to return.
+        lambda_: 1.0 = pure relevance, 0.0 = pure diversity.
+
+    Returns:
+        Indices into the candidate arrays, in ranked order.
+    """
+    rel = np.asarray(relevance, dtype=np.float32)
+    n = rel.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return []
+
+    x = np.asarray(embeddings, dtype=np.float32)
+    sq_norms = np.einsum("ij,ij->i", x, x)
+    picked = np.zeros(n, dtype=bool)
+    # Similarity of every candidate to its closest already-picked item
+    max_sim = np.zeros(n, dtype=np.float32)
+
+    order = []
+    first = int(np.argmax(rel))
+    order.append(first)
+    picked[first] = True
+    np.maximum(max_sim, similarity_to(x, sq_norms, first), out=max_sim)
+
+    weighted_rel = lambda_ * rel
+    for _ in range(k - 1):
+        mmr = weighted_rel - (1.0 - lambda_) * max_sim
+        mmr[picked] = -np.inf
+        nxt = int(np.argmax(mmr))
+        order.append(nxt)
+        picked[nxt] = True
+        np.maximum(max_sim, similarity_to(x, sq_norms, nxt), out=max_sim)
+
+    return order
+
+
+def kmeans(vectors: np.ndarray, k: int, iters: int = 25, seed: int = 0):
+    """
+    Small Lloyd's k-means with k-means++ seeding.
+
+    Meant for a handful of seed tracks, not for the catalogue: everything is
+    dense (n, k) distance matrices. Deterministic for a given seed.
+
+    Returns:
+        (centroids (k, d), labels (n,))
+    """
+    x = np.asarray(vectors, dtype=np.float64)
+    n = x.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+
+    # k-means++: start from the point closest to the mean, then sample by D^2
+    centroids = [x[np.argmin(((x - x.mean(axis=0)) ** 2).sum(axis=1))]]
+    for _ in range(1, k):
+        d2 = ((x[:, None, :] - np.asarray(centroids)[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        total = d2.sum()
+        if total == 0:
+            break
+        centroids.append(x[rng.choice(n, p=d2 / total)])
+    centroids = np.asarray(centroids)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for it in range(iters):
+        d2 = ((x[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        new_labels = d2.argmin(axis=1)
+        if it > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(centroids.shape[0]):
+            members = x[labels == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+
+    # Drop clusters that ended up empty and re-index labels
+    used = np.unique(labels)
+    remap = np.full(centroids.shape[0], -1)
+    remap[used] = np.arange(len(used))
+    return centroids[used], remap[labels]
+
+
+def profile_centroids(vectors: np.ndarray, max_k: int = 3, min_separation: float = 0.35):
+    """
+    Build a multi-centroid taste profile from seed embeddings.
+
+    A single average lands *between* clusters when the seeds are heterogeneous
+    (ambient + metal) and matches neither. We split the seeds with k-means and
+    keep the largest k whose centroids are at least `min_separation` apart (L2
+    in the normalised 5-d feature space); otherwise fall back to the plain mean.
+
+    Returns:
+        (centroids (k, d), weights (k,)) where weights are seed counts per centroid.
+    """
+    x = np.asarray(vectors, dtype=np.float64)
+    n = x.shape[0]
+    for k in range(min(max_k, n), 1, -1):
+        centroids, labels = kmeans(x, k)
+        if centroids.shape[0] < 2:
+            continue
+        diff = centroids[:, None, :] - centroids[None, :, :]
+        dist = np.sqrt((diff ** 2).sum(axis=2))
+        np.fill_diagonal(dist, np.inf)
+        if dist.min() >= min_separation:
+            return centroids, np.bincount(labels, minlength=centroids.shape[0])
+    return x.mean(axis=0, keepdims=True), np.array([n])
+
+
+def allocate_quotas(weights, total: int) -> List[int]:
+    """Split `total` slots proportionally to `weights` (largest-remainder method)."""
+    w = np.asarray(weights, dtype=np.float64)
+    exact = w / w.sum() * total
+    quotas = np.floor(exact).astype(int)
+    remainder = total - quotas.sum()
+    for i in np.argsort(-(exact - quotas))[:remainder]:
+        quotas[i] += 1
+    return quotas.tolist()
+
+
+def interleave(result_lists: List[list], quotas: List[int], limit: int, key=lambda item: item) -> list:
+    """
+    Merge per-centroid result lists with quota interleaving.
+
+    Lists take turns in proportion to their quota (always serving the list
+    furthest behind its share), duplicates are skipped, and once a list runs
+    dry the others fill the remaining slots.
+    """
+    cursors = [0] * len(result_lists)
+    taken = [0] * len(result_lists)
+    seen = set()
+    merged = []
+
+    def next_item(i):
+        lst = result_lists[i]
+        while cursors[i] < len(lst):
+            item = lst[cursors[i]]
+            cursors[i] += 1
+            if key(item) not in seen:
+                return item
+        return None
+
+    while len(merged) < limit:
+        live = [i for i in range(len(result_lists)) if cursors[i] < len(result_lists[i])]
+        if not live:
+            break
+        # Prefer lists still under quota, least-served (relative to quota) first
+        under = [i for i in live if taken[i] < quotas[i]]
+        pool = under or live
+        i = min(pool, key=lambda j: taken[j] / max(quotas[j], 1))
+        item = next_item(i)
+        if item is None:
+            continue
+        seen.add(key(item))
+        taken[i] += 1
+        merged.append(item)
+
+    return merged
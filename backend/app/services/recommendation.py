@@ -1,5 +1,6 @@
 import psycopg
 from app.schemas import Track
+from app.timing import span
 from typing import List, Optional
 
 class RecommendationService:
@@ -12,8 +13,9 @@ class RecommendationService:
         """
         async with self.conn.cursor() as cur:
             # 1. Get the embedding for the source track
-            await cur.execute("SELECT audio_embedding FROM tracks WHERE track_id = %s", (track_id,))
-            result = await cur.fetchone()
+            with span("db-embedding"):
+                await cur.execute("SELECT audio_embedding FROM tracks WHERE track_id = %s", (track_id,))
+                result = await cur.fetchone()
             
             if not result:
                 return [] # Track not found
@@ -22,26 +24,28 @@ class RecommendationService:
             
             # 2. Find nearest neighbors using L2 distance (<->)
             # Exclude the track itself
-            await cur.execute("""
-                SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
-                FROM tracks
-                WHERE track_id != %s
-                ORDER BY audio_embedding <-> %s
-                LIMIT %s
-            """, (track_id, embedding, limit))
+            with span("db-knn"):
+                await cur.execute("""
+                    SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
+                    FROM tracks
+                    WHERE track_id != %s
+                    ORDER BY audio_embedding <-> %s
+                    LIMIT %s
+                """, (track_id, embedding, limit))
+                
+                rows = await cur.fetchall()
             
-            rows = await cur.fetchall()
-            
-            tracks = [
-                Track(
-                    track_id=row[0],
-                    name=row[1],
-                    artist=row[2],
-                    danceability=row[3],
-                    energy=row[4],
-                    valence=row[5],
-                    tempo=row[6],
-                    acousticness=row[7]
-                ) for row in rows
-            ]
+            with span("serialize"):
+                tracks = [
+                    Track(
+                        track_id=row[0],
+                        name=row[1],
+                        artist=row[2],
+                        danceability=row[3],
+                        energy=row[4],
+                        valence=row[5],
+                        tempo=row[6],
+                        acousticness=row[7]
+                    ) for row in rows
+                ]
             return tracks
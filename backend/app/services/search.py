@@ -1,5 +1,6 @@
 import psycopg
 from app.schemas import Track
+from app.timing import span
 from typing import List
 
 class SearchService:
@@ -16,26 +17,28 @@ class SearchService:
             # For now, simple standard matching is robust enough for Phase 2 start.
             
             # Optimization: We select specific columns to match the Track schema
-            await cur.execute("""
-                SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
-                FROM tracks
-                WHERE name ILIKE %s OR artist ILIKE %s
-                LIMIT %s
-            """, (f"%{query}%", f"%{query}%", limit))
+            with span("db-search"):
+                await cur.execute("""
+                    SELECT track_id, name, artist, danceability, energy, valence, tempo, acousticness
+                    FROM tracks
+                    WHERE name ILIKE %s OR artist ILIKE %s
+                    LIMIT %s
+                """, (f"%{query}%", f"%{query}%", limit))
             
-            rows = await cur.fetchall()
+                rows = await cur.fetchall()
             
             # Convert to Pydantic models
-            tracks = [
-                Track(
-                    track_id=row[0],
-                    name=row[1],
-                    artist=row[2],
-                    danceability=row[3],
-                    energy=row[4],
-                    valence=row[5],
-                    tempo=row[6],
-                    acousticness=row[7]
-                ) for row in rows
-            ]
+            with span("serialize"):
+                tracks = [
+                    Track(
+                        track_id=row[0],
+                        name=row[1],
+                        artist=row[2],
+                        danceability=row[3],
+                        energy=row[4],
+                        valence=row[5],
+                        tempo=row[6],
+                        acousticness=row[7]
+                    ) for row in rows
+                ]
             return tracks
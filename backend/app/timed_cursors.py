@@ -0,0 +1,83 @@
+"""
+psycopg cursors that feed the slow-query log (see app/query_log.py).
+
+    psycopg.connect(dsn, cursor_factory=TimedCursor)
+    AsyncConnectionPool(dsn, kwargs={"cursor_factory": AsyncTimedCursor})
+"""
+import time
+
+import psycopg
+from psycopg.rows import tuple_row
+
+from .query_log import slow_query_log, EXPLAIN_PREFIX, plan_text
+
+
+class TimedCursor(psycopg.Cursor):
+    """psycopg cursor that reports slow statements: `psycopg.connect(dsn, cursor_factory=TimedCursor)`."""
+
+    def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        result = super().execute(query, params, **kwargs)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if slow_query_log.is_slow(duration_ms):
+            statement = _query_text(query, self.connection)
+            skipped = slow_query_log.explain_decision(statement)
+            plan = None
+            if skipped is None:
+                plan, skipped = self._explain(statement, params)
+            slow_query_log.record("psycopg", statement, params, duration_ms, plan, skipped)
+        return result
+
+    def _explain(self, statement, params):
+        conn = self.connection
+        try:
+            # A plain cursor, so the EXPLAIN itself is not logged
+            with psycopg.Cursor(conn, row_factory=tuple_row) as cur:
+                if conn.autocommit:
+                    cur.execute(EXPLAIN_PREFIX + statement, params)
+                    return plan_text(cur.fetchall()), None
+                with conn.transaction():
+                    cur.execute(EXPLAIN_PREFIX + statement, params)
+                    return plan_text(cur.fetchall()), None
+        except Exception as e:
+            return None, f"explain failed: {e}"
+
+
+class AsyncTimedCursor(psycopg.AsyncCursor):
+    """Async twin of TimedCursor, for `AsyncConnectionPool(..., kwargs={"cursor_factory": AsyncTimedCursor})`."""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        result = await super().execute(query, params, **kwargs)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if slow_query_log.is_slow(duration_ms):
+            statement = _query_text(query, self.connection)
+            skipped = slow_query_log.explain_decision(statement)
+            plan = None
+            if skipped is None:
+                plan, skipped = await self._explain(statement, params)
+            slow_query_log.record("psycopg", statement, params, duration_ms, plan, skipped)
+        return result
+
+    async def _explain(self, statement, params):
+        conn = self.connection
+        try:
+            async with psycopg.AsyncCursor(conn, row_factory=tuple_row) as cur:
+                if conn.autocommit:
+                    await cur.execute(EXPLAIN_PREFIX + statement, params)
+                    return plan_text(await cur.fetchall()), None
+                # A nested transaction() is a savepoint
+                async with conn.transaction():
+                    await cur.execute(EXPLAIN_PREFIX + statement, params)
+                    return plan_text(await cur.fetchall()), None
+        except Exception as e:
+            return None, f"explain failed: {e}"
+
+
+def _query_text(query, conn) -> str:
+    if isinstance(query, str):
+        return query
+    if isinstance(query, bytes):
+        return query.decode()
+    # psycopg.sql.Composable
+    return query.as_string(conn)
@@ -0,0 +1,65 @@
+"""
+Per-request latency breakdown, returned in the `Server-Timing` response header.
+
+Handlers wrap their stages in `span("db-knn")` etc. The middleware collects the
+spans for the request and adds them, plus the total, to the response:
+
+    Server-Timing: db-embedding;dur=0.41, db-knn;dur=3.87, rerank;dur=0.29, serialize;dur=0.05, total;dur=5.12
+
+Browser devtools (Network -> Timing) and edge logs can then attribute latency
+without any tracing backend. Stages used across the app:
+
+    db-embedding  seed / source embedding lookups
+    db-knn        vector nearest-neighbour queries
+    db-search     text search queries
+    profile       taste-profile clustering
+    rerank        interleaving / MMR re-ranking
+    cache         cache lookups
+    serialize     building the response payload
+
+Spans with the same name are summed. Outside a request `span()` is a no-op timer.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import Request
+
+# name -> accumulated seconds, in first-recorded order
+_spans: ContextVar[Optional[Dict[str, float]]] = ContextVar("server_timing_spans", default=None)
+
+
+def record(name: str, seconds: float):
+    spans = _spans.get()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + seconds
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def header_value(spans: Dict[str, float], total: float) -> str:
+    parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in spans.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+async def server_timing_middleware(request: Request, call_next):
+    spans: Dict[str, float] = {}
+    token = _spans.set(spans)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _spans.reset(token)
+    response.headers["Server-Timing"] = header_value(spans, time.perf_counter() - start)
+    # Lets the cross-origin frontend read the timings (PerformanceServerTiming)
+    response.headers["Timing-Allow-Origin"] = "*"
+    return response
@@ -1,5 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
 import os
 
 from .models.users import Base
@@ -8,18 +7,40 @@ from .models.users import Base
 USERS_DATABASE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "users.sqlite")
 USERS_DATABASE_URL = f"sqlite:///{USERS_DATABASE_PATH}"
 
-users_engine = create_engine(USERS_DATABASE_URL, connect_args={"check_same_thread": False})
-UsersSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=users_engine)
+
+@lru_cache(maxsize=None)
+def get_users_engine():
+    """The users engine, created on first use (keeps it off the import path)."""
+    from sqlalchemy import create_engine
+    from .metrics import instrument_engine
+
+    engine = create_engine(USERS_DATABASE_URL, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    return engine
+
+
+@lru_cache(maxsize=None)
+def get_users_sessionmaker():
+    from sqlalchemy.orm import sessionmaker
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_users_engine())
+
+
+def __getattr__(name):
+    if name == "users_engine":
+        return get_users_engine()
+    if name == "UsersSessionLocal":
+        return get_users_sessionmaker()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def init_users_db():
     """Create the users database tables."""
-    Base.metadata.create_all(bind=users_engine)
+    Base.metadata.create_all(bind=get_users_engine())
 
 
 def get_users_db():
     """Dependency for getting users database session."""
-    db = UsersSessionLocal()
+    db = get_users_sessionmaker()()
     try:
         yield db
     finally:
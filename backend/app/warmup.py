@@ -0,0 +1,209 @@
+"""
+Startup warm-up, run from the app lifespan before the worker reports ready.
+
+Right after a deploy the pools are empty, the HNSW index pages are cold in
+shared_buffers and the in-process caches are empty, so the first requests pay
+for all three. The warm-up does that work up front:
+
+    pool      open the pool's steady-state connections (SQLAlchemy `pool_size`,
+              and `min_size` of the psycopg pool when it is in use)
+    prewarm   pg_prewarm the tracks table and its global embedding index(es)
+    caches    load the schema metadata and fill the trending and hot-track
+              caches (app/cache.py)
+    autocomplete
+              fill the autocomplete cache, best effort: it runs after `/ready`
+              has turned 200 (each term is an unindexed ILIKE scan of `tracks`)
+              and stops at WARMUP_AUTOCOMPLETE_BUDGET_S
+
+A failing step is logged and reported but does not keep the worker out of
+rotation; `/ready` turns 200 once every step except the AFTER_READY_STEPS has
+finished. `/health` stays a pure liveness check.
+
+Settings (env):
+    WARMUP_STEPS                comma-separated steps to run (default "pool,prewarm,caches,autocomplete", "" disables)
+    WARMUP_PREWARM_RELATIONS    relations to prewarm (default: tracks + its non-partial HNSW indexes)
+    WARMUP_TRENDING_LIMITS      trending page sizes to cache (default "10,20", as used by the frontend)
+    WARMUP_HOT_TRACKS           most popular tracks to cache by id (default 1000)
+    WARMUP_AUTOCOMPLETE_TERMS   search-box queries to cache (default 100)
+    WARMUP_AUTOCOMPLETE_BUDGET_S  time limit of the autocomplete step (default 30)
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+WARMUP_STEPS = [s.strip() for s in os.getenv("WARMUP_STEPS", "pool,prewarm,caches,autocomplete").split(",") if s.strip()]
+WARMUP_PREWARM_RELATIONS = [r.strip() for r in os.getenv("WARMUP_PREWARM_RELATIONS", "").split(",") if r.strip()]
+WARMUP_TRENDING_LIMITS = [int(n) for n in os.getenv("WARMUP_TRENDING_LIMITS", "10,20").split(",") if n.strip()]
+WARMUP_HOT_TRACKS = int(os.getenv("WARMUP_HOT_TRACKS", "1000"))
+WARMUP_AUTOCOMPLETE_TERMS = int(os.getenv("WARMUP_AUTOCOMPLETE_TERMS", "100"))
+WARMUP_AUTOCOMPLETE_BUDGET_S = float(os.getenv("WARMUP_AUTOCOMPLETE_BUDGET_S", "30"))
+
+# Steps that run once the worker is already reported ready
+AFTER_READY_STEPS = {"autocomplete"}
+
+# Page size requested by the frontend search box
+AUTOCOMPLETE_PAGE_SIZE = 5
+
+
+class WarmupState:
+    def __init__(self, steps: List[str]):
+        self.steps = steps
+        self.ready = False
+        self.results: Dict[str, dict] = {step: {"status": "pending"} for step in steps}
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "steps": self.results}
+
+
+state = WarmupState(WARMUP_STEPS)
+
+
+# ==================== STEPS ====================
+
+def warm_pool(engine) -> str:
+    """Checks out `pool_size` connections at once so each one is actually opened."""
+    size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+    conns = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+    return f"{len(conns)} SQLAlchemy connections"
+
+
+async def warm_psycopg_pool() -> str:
+    from . import dependencies
+
+    if dependencies.pool is None:
+        return ""
+    await dependencies.pool.wait()
+    return f", {dependencies.pool.min_size} psycopg connections"
+
+
+def prewarm_relations(engine, relations: List[str]) -> str:
+    with engine.connect() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_prewarm"))
+        if not relations:
+            # The global index(es) serve unfiltered KNN; partition indexes
+            # (partial, see app/partitions.py) are left to warm on demand.
+            relations = ["tracks"] + list(conn.execute(text("""
+                SELECT c.relname
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_am am ON am.oid = c.relam
+                WHERE i.indrelid = 'tracks'::regclass AND am.amname = 'hnsw' AND i.indpred IS NULL
+            """)).scalars())
+        blocks = {
+            relation: conn.execute(text("SELECT pg_prewarm(CAST(:rel AS regclass))"), {"rel": relation}).scalar()
+            for relation in relations
+        }
+        conn.commit()
+    return ", ".join(f"{relation}: {count} blocks" for relation, count in blocks.items())
+
+
+def autocomplete_terms(tracks: List[dict], limit: int) -> List[str]:
+    """What users are likely to type: artist-name prefixes (2+ chars, the box's minimum) and full names."""
+    terms: List[str] = []
+    for track in tracks:
+        artist = (track.get("artist") or "").strip().lower()
+        for term in (artist[:2], artist[:3], artist):
+            if len(term) >= 2 and term not in terms:
+                terms.append(term)
+        if len(terms) >= limit:
+            break
+    return terms[:limit]
+
+
+def fill_caches(sessionmaker) -> str:
+    from .cache import trending_cache, hot_tracks_cache
+    from .database import get_table_schema
+    from .routes.tracks import load_trending
+
+    get_table_schema()
+    db = sessionmaker()
+    try:
+        for limit in WARMUP_TRENDING_LIMITS:
+            trending_cache.set(limit, load_trending(db, limit))
+
+        hot = load_trending(db, WARMUP_HOT_TRACKS) if WARMUP_HOT_TRACKS else []
+        for track in hot:
+            hot_tracks_cache.set(track["id"], track)
+    finally:
+        db.close()
+    return f"{len(WARMUP_TRENDING_LIMITS)} trending, {len(hot)} hot tracks"
+
+
+def fill_autocomplete(sessionmaker, budget_s: float = None) -> str:
+    """Caches the first search page of likely terms, most popular artists first, until the time budget runs out."""
+    from .cache import autocomplete_cache
+    from .routes.tracks import load_trending, load_search, autocomplete_key, normalize_query
+
+    deadline = time.perf_counter() + (WARMUP_AUTOCOMPLETE_BUDGET_S if budget_s is None else budget_s)
+    db = sessionmaker()
+    try:
+        popular = load_trending(db, WARMUP_AUTOCOMPLETE_TERMS) if WARMUP_AUTOCOMPLETE_TERMS else []
+        terms = autocomplete_terms(popular, WARMUP_AUTOCOMPLETE_TERMS)
+        cached = 0
+        for term in map(normalize_query, terms):
+            if time.perf_counter() >= deadline:
+                return f"{cached}/{len(terms)} autocomplete (time budget reached)"
+            autocomplete_cache.set(autocomplete_key(term, AUTOCOMPLETE_PAGE_SIZE),
+                                   load_search(db, term, AUTOCOMPLETE_PAGE_SIZE))
+            cached += 1
+    finally:
+        db.close()
+    return f"{cached} autocomplete"
+
+
+# ==================== RUNNER ====================
+
+async def run_warmup(warmup_state: WarmupState = state):
+    """
+    Runs the configured steps in order (blocking DB work in a thread), marks the
+    worker ready, then runs the AFTER_READY_STEPS.
+    """
+    from .database import get_engine, get_sessionmaker
+
+    async def pool():
+        detail = await asyncio.to_thread(warm_pool, get_engine())
+        return detail + await warm_psycopg_pool()
+
+    steps = {
+        "pool": pool,
+        "prewarm": lambda: asyncio.to_thread(prewarm_relations, get_engine(), WARMUP_PREWARM_RELATIONS),
+        "caches": lambda: asyncio.to_thread(fill_caches, get_sessionmaker()),
+        "autocomplete": lambda: asyncio.to_thread(fill_autocomplete, get_sessionmaker()),
+    }
+
+    async def run_step(name):
+        result = warmup_state.results[name]
+        if name not in steps:
+            result.update(status="failed", error="unknown step")
+            logger.warning("Unknown warm-up step %r", name)
+            return
+        start = time.perf_counter()
+        try:
+            result.update(status="ok", detail=await steps[name]())
+            logger.info("Warm-up %s: %s", name, result["detail"])
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+            logger.warning("Warm-up %s failed: %s", name, e)
+        result["seconds"] = round(time.perf_counter() - start, 3)
+
+    for name in warmup_state.steps:
+        if name not in AFTER_READY_STEPS:
+            await run_step(name)
+    warmup_state.ready = True
+    for name in warmup_state.steps:
+        if name in AFTER_READY_STEPS:
+            await run_step(name)
@@ -0,0 +1,74 @@
+import argparse
+import json
+import sys
+
+"""
+Script: compare.py
+Description:
+    Compares two benchmark result files (from benchmarks/run.py) and flags
+    regressions. A scenario regresses when its p95 latency grows, or its QPS
+    drops, by more than the threshold. Exits with status 1 if any scenario
+    regressed, so it can gate CI.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/100k-abc123-....json benchmarks/results/100k-def456-....json
+    python -m benchmarks.compare old.json new.json --threshold 15
+"""
+
+METRICS = ["p50_ms", "p95_ms", "p99_ms", "qps"]
+
+
+def pct_change(old: float, new: float) -> float:
+    if not old:
+        return 0.0
+    return (new - old) / old * 100
+
+
+def compare(old: dict, new: dict, threshold: float) -> list:
+    """Returns a list of (scenario, metric, old, new, pct, regressed) rows."""
+    rows = []
+    for scenario, new_r in new["results"].items():
+        old_r = old["results"].get(scenario)
+        if not old_r or not old_r.get("count") or not new_r.get("count"):
+            continue
+        for metric in METRICS:
+            change = pct_change(old_r[metric], new_r[metric])
+            if metric == "p95_ms":
+                regressed = change > threshold
+            elif metric == "qps":
+                regressed = change < -threshold
+            else:
+                regressed = False
+            rows.append((scenario, metric, old_r[metric], new_r[metric], change, regressed))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed p95 / QPS change in percent")
+    args = parser.parse_args()
+
+    with open(args.old, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+
+    if old["meta"].get("scale") != new["meta"].get("scale"):
+        print(f"⚠️  Comparing different scales: {old['meta'].get('scale')} vs {new['meta'].get('scale')}")
+
+    print(f"📊 {old['meta'].get('commit')} -> {new['meta'].get('commit')} (threshold {args.threshold}%)")
+    print(f"{'scenario':<12} {'metric':<8} {'old':>10} {'new':>10} {'change':>9}")
+    rows = compare(old, new, args.threshold)
+    for scenario, metric, o, n, change, regressed in rows:
+        flag = "  ❌ REGRESSION" if regressed else ""
+        print(f"{scenario:<12} {metric:<8} {o:>10} {n:>10} {change:>+8.1f}%{flag}")
+
+    if any(r[5] for r in rows):
+        sys.exit(1)
+    print("✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import psycopg
+from dotenv import load_dotenv
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scripts.etl.partition_indexes import build_tier_indexes, build_genre_indexes
+from scripts.etl.centroids import ensure_artist_centroid_schema, rebuild_artist_centroids
+from scripts.etl.generate_synthetic_db import (
+    WORDS, GENRES, TRACKS_PER_ARTIST, ALBUMS_PER_ARTIST, SECOND_ARTIST_RATE,
+    sound_centres, sample_artists, sample_features, sample_popularity, artist_names, artist_genres,
+)
+
+"""
+Script: dataset.py
+Description:
+    Loads a reproducible synthetic catalogue into a local Postgres + pgvector
+    database for benchmarking. The schema matches what the API serves from
+    (tracks + albums + album_tracks + artist_centroids), with the same indexes.
+
+    The data is deterministic for a given (scale, seed):
+    - audio features are clustered around per-artist "sound" centres,
+    - artist and popularity distributions are heavy-tailed,
+    - ~10% of tracks have two credited artists.
+
+    The samplers are shared with scripts/etl/generate_synthetic_db.py, which
+    produces the same catalogue shape as a spotify.sqlite-style source file.
+
+    By default it writes to a SEPARATE database (`music_discovery_bench`) so dev
+    data is never touched. Point the API at it with POSTGRES_DB=music_discovery_bench.
+
+Usage:
+    python -m benchmarks.dataset --scale 100k
+    python -m benchmarks.dataset --scale 1m --seed 7
+    python -m benchmarks.dataset --scale 8m
+"""
+
+load_dotenv()
+
+SCALES = {
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "8m": 8_000_000,
+}
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+BENCH_DB = os.getenv('BENCH_POSTGRES_DB', 'music_discovery_bench')
+PG_BASE = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432"
+
+CHUNK_SIZE = 100_000
+
+TRACK_COLUMNS = (
+    "track_id, name, artist, album, album_id, popularity, genre, "
+    "danceability, energy, valence, tempo, acousticness, audio_embedding"
+)
+
+
+def generate_chunk(seed: int, chunk_idx: int, start: int, n: int, total: int) -> dict:
+    """Generates `n` tracks starting at global row `start` as column arrays."""
+    rng = np.random.default_rng([seed, chunk_idx + 1])
+    n_artists = max(total // TRACKS_PER_ARTIST, 1)
+
+    artist_idx = sample_artists(rng, n, n_artists)
+    second = rng.random(n) < SECOND_ARTIST_RATE
+    second_artist = rng.integers(0, n_artists, n)
+
+    return {
+        "ids": np.arange(start, start + n),
+        "artist_idx": artist_idx,
+        "second": second,
+        "second_artist": second_artist,
+        "features": sample_features(rng, sound_centres(seed), artist_idx),
+        "popularity": sample_popularity(rng, n),
+        "album_idx": artist_idx * ALBUMS_PER_ARTIST + rng.integers(0, ALBUMS_PER_ARTIST, n),
+        "w1": rng.integers(0, len(WORDS), n),
+        "w2": rng.integers(0, len(WORDS), n),
+        "genre": artist_genres(artist_idx),
+    }
+
+
+def format_chunk(chunk: dict) -> str:
+    """Formats a generated chunk as a COPY text block."""
+    words = np.array(WORDS, dtype=object)
+    genres = np.array(GENRES, dtype=object)
+    f = chunk["features"]
+    tempo = f[:, 3] * 250.0
+
+    artists = artist_names(chunk["artist_idx"])
+    seconds = np.char.add(",artist ", chunk["second_artist"].astype(str)).astype(object)
+    artists = np.where(chunk["second"], artists + seconds, artists)
+
+    feature_strs = [np.char.mod("%.4f", f[:, i]) for i in range(5)]
+    embeddings = ["[" + ",".join(v) + "]" for v in zip(*feature_strs)]
+
+    cols = [
+        np.char.add("bench", np.char.zfill(chunk["ids"].astype(str), 9)),
+        words[chunk["w1"]] + " " + words[chunk["w2"]],
+        artists,
+        np.char.add("album ", chunk["album_idx"].astype(str)),
+        np.char.add("alb", chunk["album_idx"].astype(str)),
+        chunk["popularity"].astype(int).astype(str),
+        genres[chunk["genre"]],
+        feature_strs[0], feature_strs[1], feature_strs[2],
+        np.char.mod("%.2f", tempo),
+        feature_strs[4],
+        embeddings,
+    ]
+    return "\n".join("\t".join(row) for row in zip(*cols)) + "\n"
+
+
+def create_database():
+    with psycopg.connect(f"{PG_BASE}/postgres", autocommit=True) as conn:
+        exists = conn.execute("SELECT 1 FROM pg_database WHERE datname = %s", (BENCH_DB,)).fetchone()
+        if not exists:
+            conn.execute(f'CREATE DATABASE "{BENCH_DB}"')
+
+
+def create_schema(conn):
+    conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    conn.execute("DROP TABLE IF EXISTS album_tracks, albums, tracks, artist_centroids CASCADE")
+    conn.execute("""
+        CREATE TABLE tracks (
+            track_id TEXT PRIMARY KEY,
+            name TEXT,
+            artist TEXT,
+            album TEXT,
+            album_id TEXT,
+            popularity INTEGER,
+            genre TEXT,
+            danceability FLOAT,
+            energy FLOAT,
+            valence FLOAT,
+            tempo FLOAT,
+            acousticness FLOAT,
+            audio_embedding VECTOR(5)
+        )
+    """)
+
+
+def load_tracks(conn, total: int, seed: int):
+    start_time = time.time()
+    loaded = 0
+    for chunk_idx, start in enumerate(range(0, total, CHUNK_SIZE)):
+        n = min(CHUNK_SIZE, total - start)
+        block = format_chunk(generate_chunk(seed, chunk_idx, start, n, total))
+        with conn.cursor() as cur:
+            with cur.copy(f"COPY tracks ({TRACK_COLUMNS}) FROM STDIN") as copy:
+                copy.write(block)
+        conn.commit()
+        loaded += n
+        rate = loaded / max(time.time() - start_time, 1e-9)
+        print(f"   🎵 {loaded:,}/{total:,} tracks ({rate:,.0f} rows/s)", flush=True)
+
+
+def build_derived(conn):
+    """Albums, album links, indexes and artist centroids, all server-side."""
+    print("💿 Building albums...")
+    conn.execute("""
+        CREATE TABLE albums AS
+        SELECT album_id, MIN(album) AS name, MIN(artist) AS artist,
+               MAX(popularity) AS popularity, AVG(audio_embedding) AS avg_embedding,
+               COUNT(*)::int AS track_count, SUM(audio_embedding) AS embedding_sum
+        FROM tracks GROUP BY album_id
+    """)
+    conn.execute("ALTER TABLE albums ADD PRIMARY KEY (album_id)")
+    conn.execute("""
+        CREATE TABLE album_tracks AS SELECT album_id, track_id FROM tracks
+    """)
+    conn.execute("ALTER TABLE album_tracks ADD PRIMARY KEY (album_id, track_id)")
+    conn.commit()
+
+    print("🧭 Building vector indexes (this is the slow part at 8M)...")
+    conn.execute("SET maintenance_work_mem = '1GB'")
+    conn.execute("CREATE INDEX tracks_embedding_idx ON tracks USING hnsw (audio_embedding vector_l2_ops)")
+    conn.execute("CREATE INDEX idx_albums_embedding ON albums USING ivfflat (avg_embedding vector_l2_ops) WITH (lists = 100)")
+    conn.commit()
+
+    build_tier_indexes(conn)
+    build_genre_indexes(conn)
+    conn.commit()
+
+    print("🎤 Building artist centroids...")
+    ensure_artist_centroid_schema(conn)
+    rebuild_artist_centroids(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def load_dataset(scale: str, seed: int):
+    total = SCALES[scale]
+    print(f"🧪 Loading synthetic dataset: {scale} ({total:,} tracks, seed={seed}) into '{BENCH_DB}'")
+    start = time.time()
+    create_database()
+    with psycopg.connect(f"{PG_BASE}/{BENCH_DB}") as conn:
+        create_schema(conn)
+        conn.commit()
+        load_tracks(conn, total, seed)
+        build_derived(conn)
+    print(f"✅ Dataset ready in {(time.time() - start) / 60:.1f} minutes.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load a synthetic benchmark dataset into Postgres.")
+    parser.add_argument("--scale", choices=SCALES.keys(), default="100k")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    load_dataset(args.scale, args.seed)
@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import polars as pl
+import psycopg
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.dataset import PG_BASE, BENCH_DB
+from scripts.etl.ingest_data import COPY_TRACKS_SQL, EMBEDDING_FEATURES, format_copy_block
+
+"""
+Script: ingest.py
+Description:
+    Throughput (rows/s) of the tracks COPY loader in scripts/etl/ingest_data.py
+    against the previous per-row loop (iter_rows + str(embedding) + write_row).
+
+    Both loaders COPY the same synthetic, process_data-shaped frame into a
+    temporary table in the benchmark database, so nothing persistent is touched.
+    --format-only skips the database and times payload preparation alone (for
+    the legacy loop that excludes psycopg's per-row formatting, so it is a lower
+    bound on its real cost).
+
+Usage:
+    python -m benchmarks.ingest --rows 1000000
+    python -m benchmarks.ingest --rows 200000 --format-only
+"""
+
+SCRATCH_TABLE = "ingest_bench_tracks"
+BATCH_SIZE = 50_000
+
+
+def synthetic_frame(rows: int, seed: int = 42) -> pl.DataFrame:
+    """A frame shaped like process_data() output."""
+    rng = np.random.default_rng(seed)
+    features = rng.random((rows, 5))
+    tempo = 60 + features[:, 3] * 140
+    ids = np.arange(rows).astype(str)
+    return pl.DataFrame({
+        "track_id": np.char.add("trk", ids),
+        "name": np.char.add("Song ", ids),
+        "artist": np.char.add("Artist ", (np.arange(rows) // 12).astype(str)),
+        "danceability": features[:, 0],
+        "energy": features[:, 1],
+        "valence": features[:, 2],
+        "tempo": tempo,
+        "acousticness": features[:, 4],
+        "tempo_norm": tempo / 250.0,
+    })
+
+
+def legacy_rows(df: pl.DataFrame):
+    """Row tuples exactly as the previous insert_data built them."""
+    for row in df.iter_rows(named=True):
+        yield (
+            row["track_id"], row["name"], row["artist"],
+            row["danceability"], row["energy"], row["valence"], row["tempo"], row["acousticness"],
+            str([row[c] for c in EMBEDDING_FEATURES]),
+        )
+
+
+def copy_legacy(cur, df: pl.DataFrame):
+    for batch in df.iter_slices(BATCH_SIZE):
+        with cur.copy(COPY_TRACKS_SQL.format(table=SCRATCH_TABLE)) as copy:
+            for item in legacy_rows(batch):
+                copy.write_row(item)
+
+
+def copy_vectorised(cur, df: pl.DataFrame):
+    for batch in df.iter_slices(BATCH_SIZE):
+        with cur.copy(COPY_TRACKS_SQL.format(table=SCRATCH_TABLE)) as copy:
+            copy.write(format_copy_block(batch))
+
+
+def timed(label: str, rows: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = rows / elapsed
+    print(f"   {label:<12} {elapsed:8.2f}s  {rate:>12,.0f} rows/s")
+    return rate
+
+
+def run(rows: int, format_only: bool):
+    df = synthetic_frame(rows)
+    print(f"📦 {rows:,} rows")
+
+    if format_only:
+        legacy = timed("legacy", rows, lambda: [sum(1 for _ in legacy_rows(b)) for b in df.iter_slices(BATCH_SIZE)])
+        vectorised = timed("vectorised", rows, lambda: [format_copy_block(b) for b in df.iter_slices(BATCH_SIZE)])
+    else:
+        with psycopg.connect(f"{PG_BASE}/{BENCH_DB}") as conn:
+            conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            conn.execute(f"""
+                CREATE TEMP TABLE {SCRATCH_TABLE} (
+                    track_id TEXT, name TEXT, artist TEXT, danceability FLOAT, energy FLOAT,
+                    valence FLOAT, tempo FLOAT, acousticness FLOAT, audio_embedding VECTOR(5)
+                )
+            """)
+            with conn.cursor() as cur:
+                legacy = timed("legacy", rows, lambda: copy_legacy(cur, df))
+                conn.execute(f"TRUNCATE {SCRATCH_TABLE}")
+                vectorised = timed("vectorised", rows, lambda: copy_vectorised(cur, df))
+            conn.rollback()
+    print(f"⚡ Speed-up: {vectorised / legacy:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tracks COPY loader.")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--format-only", action="store_true", help="Time payload preparation without a database")
+    args = parser.parse_args()
+    run(args.rows, args.format_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import html
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.stats import summarize
+from benchmarks.run import RESULTS_DIR, git_revision
+
+"""
+Script: loadtest.py
+Description:
+    Async load generator that replays a scripted user journey against a running
+    API, for capacity planning (uvicorn workers, DB pool sizes).
+
+    Journey (one "user visit"):
+        search -> track detail -> similar -> multi-seed recommend -> paginate
+
+    Load model:
+    - Open loop: journeys ARRIVE at --rate per second (Poisson), independent of
+      how fast the server answers. --concurrency caps journeys in flight; arrivals
+      beyond it queue.
+    - Closed loop: --rate 0 runs --concurrency users back to back.
+
+    Latency is recorded coordinated-omission-correct: the first step of a journey
+    is timed from its *scheduled* arrival, so time spent queued behind a slow
+    server (or a full concurrency cap) counts against it. Later steps are timed
+    from when the user issues them. Pure service time (send -> response) is
+    reported separately.
+
+    Reports: JSON + a self-contained HTML page under benchmarks/results/.
+
+Usage:
+    uvicorn app.main:app --port 8001 --workers 4
+    python -m benchmarks.loadtest --rate 50 --concurrency 200 --duration 60
+    python -m benchmarks.loadtest --rate 0 --concurrency 32 --duration 30   # closed loop
+"""
+
+STEPS = ["search", "detail", "similar", "recommend", "paginate"]
+
+
+class JourneyData:
+    """Search terms and page range sampled from the running API."""
+
+    def __init__(self, search_terms, max_page):
+        self.search_terms = search_terms
+        self.max_page = max_page
+
+    @classmethod
+    async def load(cls, client: httpx.AsyncClient):
+        first = (await client.get("/tracks", params={"page": 0, "page_size": 100})).raise_for_status().json()
+        terms = sorted({w for t in first["tracks"] for w in t["name"].lower().split() if len(w) > 2})
+        if not terms:
+            raise RuntimeError("The API returned no tracks; seed or load a dataset first")
+        return cls(terms, max(min(first["total"] // 20 - 1, 500), 0))
+
+
+class Recorder:
+    """Per-step latencies plus a per-second time series."""
+
+    def __init__(self, measure_from: float):
+        self.measure_from = measure_from
+        self.response = defaultdict(list)
+        self.service = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.journeys = 0
+        self.timeline = defaultdict(lambda: {"journeys": 0, "latencies": []})
+
+    def record(self, step: str, intended: float, sent: float, done: float, ok: bool):
+        if intended < self.measure_from:
+            return
+        if not ok:
+            self.errors[step] += 1
+            return
+        self.response[step].append((done - intended) * 1000)
+        self.service[step].append((done - sent) * 1000)
+        self.timeline[int(done - self.measure_from)]["latencies"].append((done - intended) * 1000)
+
+    def journey_done(self, intended: float, done: float):
+        if intended >= self.measure_from:
+            self.journeys += 1
+            self.timeline[int(done - self.measure_from)]["journeys"] += 1
+
+
+async def timed(recorder: Recorder, step: str, intended: float, request):
+    sent = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    recorder.record(step, intended, sent, time.perf_counter(), ok)
+    return response if ok else None
+
+
+async def journey(client: httpx.AsyncClient, data: JourneyData, recorder: Recorder, rng: random.Random,
+                  intended: float, think_s: float):
+    """search -> detail -> similar -> recommend -> paginate; stops at the first failed step."""
+    async def think():
+        if think_s:
+            await asyncio.sleep(rng.expovariate(1 / think_s))
+        return time.perf_counter()
+
+    found = await timed(recorder, "search", intended,
+                        client.get("/tracks/search", params={"q": rng.choice(data.search_terms)}))
+    tracks = found.json()["tracks"] if found else []
+    if not tracks:
+        return
+    track_id = rng.choice(tracks)["id"]
+
+    if not await timed(recorder, "detail", await think(), client.get(f"/tracks/{track_id}")):
+        return
+
+    similar = await timed(recorder, "similar", await think(),
+                          client.get(f"/tracks/{track_id}/similar", params={"limit": 10}))
+    if not similar:
+        return
+    seeds = [track_id] + [t["id"] for t in rng.sample(similar.json(), min(2, len(similar.json())))]
+
+    if not await timed(recorder, "recommend", await think(),
+                       client.post("/recommendations/tracks", json={"track_ids": seeds, "limit": 12})):
+        return
+
+    await timed(recorder, "paginate", await think(),
+                client.get("/tracks", params={"page": rng.randint(0, data.max_page), "page_size": 20}))
+    recorder.journey_done(intended, time.perf_counter())
+
+
+async def run_load(client: httpx.AsyncClient, data: JourneyData, rate: float, concurrency: int,
+                   duration: float, warmup: float, think_s: float = 0.0, seed: int = 42) -> dict:
+    """Drives journeys for warmup + duration seconds and returns the report dict."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    recorder = Recorder(measure_from=start + warmup)
+    end = start + warmup + duration
+    slots = asyncio.Semaphore(concurrency)
+
+    async def visit(intended: float, user_rng: random.Random):
+        async with slots:
+            await journey(client, data, recorder, user_rng, intended, think_s)
+
+    if rate > 0:
+        # Open loop: the schedule never waits for the server
+        tasks, next_arrival = [], start
+        while next_arrival < end:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(visit(next_arrival, random.Random(rng.random()))))
+            next_arrival += rng.expovariate(rate)
+        await asyncio.gather(*tasks)
+    else:
+        async def user(user_rng: random.Random):
+            while time.perf_counter() < end:
+                await journey(client, data, recorder, user_rng, time.perf_counter(), think_s)
+        await asyncio.gather(*(user(random.Random(rng.random())) for _ in range(concurrency)))
+
+    elapsed = max(time.perf_counter() - recorder.measure_from, 1e-9)
+    steps = {}
+    for step in STEPS:
+        stats = summarize(recorder.response[step], elapsed, recorder.errors[step])
+        service = summarize(recorder.service[step], elapsed)
+        stats["service_p50_ms"] = service.get("p50_ms")
+        stats["service_p99_ms"] = service.get("p99_ms")
+        steps[step] = stats
+
+    timeline = []
+    for second in sorted(recorder.timeline):
+        bucket = recorder.timeline[second]
+        p95 = summarize(bucket["latencies"], 1.0).get("p95_ms", 0.0)
+        timeline.append({"second": second, "journeys": bucket["journeys"], "p95_ms": p95})
+
+    return {
+        "journeys": recorder.journeys,
+        "journeys_per_s": round(recorder.journeys / elapsed, 2),
+        "steps": steps,
+        "timeline": timeline,
+    }
+
+
+def _svg_line(points, width=640, height=160, color="#1db954"):
+    if not points:
+        return ""
+    max_x = max(x for x, _ in points) or 1
+    max_y = max(y for _, y in points) or 1
+    coords = " ".join(f"{x / max_x * width:.1f},{height - y / max_y * height:.1f}" for x, y in points)
+    return (f'<svg width="{width}" height="{height}" style="border:1px solid #ddd">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="2" points="{coords}"/></svg>'
+            f'<div class="axis">max {max_y:,.1f}</div>')
+
+
+def render_html(report: dict) -> str:
+    meta, results = report["meta"], report["results"]
+    rows = "".join(
+        f"<tr><td>{html.escape(step)}</td>"
+        + "".join(f"<td>{s.get(k, '-')}</td>" for k in
+                  ("count", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms", "service_p50_ms", "service_p99_ms"))
+        + "</tr>"
+        for step, s in results["steps"].items()
+    )
+    throughput = _svg_line([(p["second"], p["journeys"]) for p in results["timeline"]])
+    latency = _svg_line([(p["second"], p["p95_ms"]) for p in results["timeline"]], color="#e45735")
+    meta_rows = "".join(f"<tr><th>{html.escape(str(k))}</th><td>{html.escape(str(v))}</td></tr>" for k, v in meta.items())
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Load test {html.escape(meta['commit'])}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+td, th {{ border: 1px solid #ddd; padding: 4px 10px; text-align: right; }}
+th {{ background: #f5f5f5; }}
+.axis {{ color: #888; font-size: 12px; margin-bottom: 1em; }}
+</style></head><body>
+<h1>Load test: {results['journeys']:,} journeys ({results['journeys_per_s']}/s)</h1>
+<table>{meta_rows}</table>
+<h2>Per step (response time, coordinated-omission corrected)</h2>
+<table><tr><th>step</th><th>count</th><th>errors</th><th>p50 ms</th><th>p95 ms</th><th>p99 ms</th><th>max ms</th>
+<th>service p50 ms</th><th>service p99 ms</th></tr>{rows}</table>
+<h2>Completed journeys per second</h2>{throughput}
+<h2>p95 response time per second (ms)</h2>{latency}
+</body></html>
+"""
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        data = await JourneyData.load(client)
+        mode = f"open loop @ {args.rate}/s" if args.rate > 0 else "closed loop"
+        print(f"🚦 Load test against {args.base_url}: {mode}, concurrency={args.concurrency}, "
+              f"{args.warmup}s warm-up + {args.duration}s")
+        results = await run_load(client, data, args.rate, args.concurrency, args.duration, args.warmup,
+                                 args.think_ms / 1000, args.seed)
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "rate": args.rate,
+            "concurrency": args.concurrency,
+            "connections": args.connections,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "think_ms": args.think_ms,
+        },
+        "results": results,
+    }
+
+    for step, s in results["steps"].items():
+        if s["count"]:
+            print(f"   {step:<10} p50={s['p50_ms']}ms p95={s['p95_ms']}ms p99={s['p99_ms']}ms "
+                  f"(service p99={s['service_p99_ms']}ms) errors={s['errors']}")
+        else:
+            print(f"   {step:<10} no successful requests (errors={s['errors']})")
+    print(f"   {results['journeys']:,} journeys completed ({results['journeys_per_s']}/s)")
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    base = os.path.join(args.out, f"loadtest-{report['meta']['commit']}-{stamp}")
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(base + ".html", "w", encoding="utf-8") as f:
+        f.write(render_html(report))
+    print(f"💾 Reports saved to {base}.json / .html")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a user-journey traffic mix against the API.")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--rate", type=float, default=20.0, help="Journey arrivals per second (0 = closed loop)")
+    parser.add_argument("--concurrency", type=int, default=100, help="Max journeys in flight (users in closed loop)")
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Seconds excluded from the results")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between journey steps")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from benchmarks.stats import summarize
+
+"""
+Script: run.py
+Description:
+    Closed-loop latency / throughput benchmark for the serving hot paths.
+
+    Runs each scenario against a live API (uvicorn) backed by the synthetic
+    benchmark database (see benchmarks/dataset.py), then reports p50/p95/p99
+    latency and QPS per endpoint. Results are written as JSON under
+    benchmarks/results/ so runs from different commits can be compared with
+    benchmarks/compare.py.
+
+    Scenarios:
+    - similar      GET  /tracks/{id}/similar
+    - recommend    POST /recommendations/tracks (3 random seeds)
+    - search       GET  /tracks/search?q=...
+    - paginate     GET  /tracks?page=N (deep OFFSET pages)
+    - auth_login   POST /auth/login
+    - auth_me      GET  /auth/me
+
+Usage:
+    POSTGRES_DB=music_discovery_bench uvicorn app.main:app --port 8001 --workers 1
+    python -m benchmarks.run --scale 100k --requests 500 --concurrency 4
+"""
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCENARIOS = ["similar", "recommend", "search", "paginate", "auth_login", "auth_me"]
+
+
+def git_revision() -> dict:
+    """Commit id and dirty flag of the working tree (best effort)."""
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": "unknown", "dirty": False}
+
+
+class Fixtures:
+    """Ids, search terms and credentials sampled from the running API."""
+
+    def __init__(self, client: httpx.Client, seed: int, sample_pages: int = 20):
+        rng = random.Random(seed)
+        first = client.get("/tracks", params={"page": 0, "page_size": 100}).raise_for_status().json()
+        self.total_tracks = first["total"]
+        tracks = list(first["tracks"])
+        max_page = max(self.total_tracks // 100 - 1, 0)
+        for page in rng.sample(range(1, max_page + 1), min(sample_pages, max_page)):
+            tracks += client.get("/tracks", params={"page": page, "page_size": 100}).json()["tracks"]
+        if not tracks:
+            raise RuntimeError("The API returned no tracks; load a dataset first (python -m benchmarks.dataset)")
+
+        self.track_ids = [t["id"] for t in tracks]
+        self.search_terms = sorted({w for t in tracks for w in t["name"].lower().split() if len(w) > 2})
+        self.max_page = min(max_page, 500)
+
+        # A throwaway user for the auth scenarios
+        suffix = uuid.uuid4().hex[:10]
+        self.email = f"bench_{suffix}@example.com"
+        self.password = "bench-password"
+        client.post("/auth/register", json={"email": self.email, "username": f"bench_{suffix}", "password": self.password})
+        login = client.post("/auth/login", json={"email": self.email, "password": self.password}).raise_for_status()
+        self.token = login.json()["access_token"]
+
+
+def make_request(name: str, client: httpx.Client, fx: Fixtures, rng: random.Random) -> httpx.Response:
+    if name == "similar":
+        return client.get(f"/tracks/{rng.choice(fx.track_ids)}/similar", params={"limit": 10})
+    if name == "recommend":
+        return client.post("/recommendations/tracks", json={"track_ids": rng.sample(fx.track_ids, 3), "limit": 12})
+    if name == "search":
+        return client.get("/tracks/search", params={"q": rng.choice(fx.search_terms)})
+    if name == "paginate":
+        return client.get("/tracks", params={"page": rng.randint(0, fx.max_page), "page_size": 20})
+    if name == "auth_login":
+        return client.post("/auth/login", json={"email": fx.email, "password": fx.password})
+    if name == "auth_me":
+        return client.get("/auth/me", headers={"Authorization": f"Bearer {fx.token}"})
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+def run_scenario(name: str, base_url: str, fx: Fixtures, requests: int, warmup: int, concurrency: int, seed: int) -> dict:
+    """Runs `requests` measured calls split across `concurrency` closed-loop workers."""
+    def worker(worker_idx: int, count: int, record: bool):
+        rng = random.Random(f"{seed}-{name}-{worker_idx}-{record}")
+        latencies, errors = [], 0
+        with httpx.Client(base_url=base_url, timeout=30.0) as client:
+            for _ in range(count):
+                start = time.perf_counter()
+                try:
+                    response = make_request(name, client, fx, rng)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if ok:
+                    latencies.append(elapsed_ms)
+                else:
+                    errors += 1
+        return latencies, errors
+
+    worker(0, warmup, record=False)
+
+    per_worker = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda args: worker(*args, record=True), enumerate(per_worker)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [ms for lat, _ in results for ms in lat]
+    errors = sum(err for _, err in results)
+    return summarize(latencies, elapsed, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API serving hot paths.")
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--scale", default="100k", help="Label of the loaded dataset (100k / 1m / 8m)")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    print(f"🏁 Benchmarking {args.base_url} (scale={args.scale}, concurrency={args.concurrency})")
+
+    with httpx.Client(base_url=args.base_url, timeout=60.0) as client:
+        fx = Fixtures(client, args.seed)
+    print(f"   Dataset: {fx.total_tracks:,} tracks, {len(fx.track_ids)} sampled ids")
+
+    results = {}
+    for name in scenarios:
+        print(f"⏱️  {name}...", end=" ", flush=True)
+        results[name] = run_scenario(name, args.base_url, fx, args.requests, args.warmup, args.concurrency, args.seed)
+        r = results[name]
+        if r["count"]:
+            print(f"p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms qps={r['qps']} errors={r['errors']}")
+        else:
+            print(f"all {r['errors']} requests failed")
+
+    report = {
+        "meta": {
+            **git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "total_tracks": fx.total_tracks,
+            "base_url": args.base_url,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "host": platform.node(),
+        },
+        "results": results,
+    }
+
+    os.makedirs(args.out, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    path = os.path.join(args.out, f"{args.scale}-{report['meta']['commit']}-{stamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
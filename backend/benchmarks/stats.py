@@ -0,0 +1,32 @@
+import numpy as np
+from typing import List
+
+"""
+Latency statistics shared by the benchmark runner and the load tester.
+"""
+
+
+def summarize(latencies_ms: List[float], elapsed_s: float, errors: int = 0) -> dict:
+    """
+    Summarise one scenario.
+
+    Args:
+        latencies_ms: per-request latencies (successful requests only).
+        elapsed_s: wall-clock time of the measured phase.
+        errors: number of failed requests.
+    """
+    lat = np.asarray(latencies_ms, dtype=np.float64)
+    if lat.size == 0:
+        return {"count": 0, "errors": errors, "qps": 0.0}
+    p50, p95, p99 = np.percentile(lat, [50, 95, 99])
+    return {
+        "count": int(lat.size),
+        "errors": errors,
+        "qps": round(lat.size / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "mean_ms": round(float(lat.mean()), 3),
+        "min_ms": round(float(lat.min()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(lat.max()), 3),
+    }
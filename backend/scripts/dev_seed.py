@@ -1,9 +1,16 @@
 import sqlite3
 import psycopg
+import polars as pl
 import os
+import sys
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'etl'))
+from centroids import add_album_track_frames, ensure_artist_centroid_schema, rebuild_artist_centroids
+from pipeline import copy_loader, fill_track_defaults, print_pipeline_summary, run_pipeline, sqlite_stream
+from stage_parquet import TRACKS_SCHEMA
+
 # Load env vars
 load_dotenv()
 
@@ -13,7 +20,8 @@ POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'db')
 PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
 BATCH_SIZE = 1000  # Commit every N rows
 TRACK_LIMIT = 10000  # Total tracks to seed
-ALBUM_LIMIT = 2000  # Total albums to seed
+ALBUM_LIMIT = int(os.getenv("DEV_SEED_ALBUM_LIMIT", "2000"))  # Total albums to seed (0 = the full catalog)
+LINK_BATCH_SIZE = 100_000  # r_albums_tracks rows per COPY chunk
 
 def run_dev_seed():
     print(f"🌱 Starting DEV SEED (Tracks: {TRACK_LIMIT}, Albums: {ALBUM_LIMIT})...")
@@ -74,7 +82,11 @@ def run_dev_seed():
                     name TEXT,
                     artist TEXT,
                     popularity INTEGER DEFAULT 0,
-                    avg_embedding VECTOR(5)
+                    avg_embedding VECTOR(5),
+                    -- Running sum/count so centroids can be updated incrementally
+                    -- (see scripts/etl/centroids.py)
+                    track_count INTEGER NOT NULL DEFAULT 0,
+                    embedding_sum VECTOR(5)
                 )
             """)
             
@@ -136,56 +148,16 @@ def run_dev_seed():
         
         final_query = f"{select_clause} {join_clause} {order_clause} {limit_clause}"
         
-        cursor = sqlite_conn.cursor()
-        cursor.execute(final_query)
-        
-        total_tracks = 0
-        pbar = tqdm(total=TRACK_LIMIT, unit="tracks", desc="🎵 Tracks")
-
-        while True:
-            rows = cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-            
-            clean_rows = []
-            for r in rows:
-                track_id = r[0]
-                name = r[1]
-                artist = r[2] or "Unknown"
-                album_id = r[3]  # Can be None
-                dance = r[4] or 0.5
-                energy = r[5] or 0.5
-                valence = r[6] or 0.5
-                tempo = r[7] or 120.0
-                acoustic = r[8] or 0.5
-                
-                tempo_norm = min(max(tempo / 250.0, 0.0), 1.0)
-                embedding = [dance, energy, valence, tempo_norm, acoustic]
-                
-                row_data = [track_id, name, artist, album_id, dance, energy, valence, tempo, acoustic, str(embedding)]
-                
-                if has_popularity:
-                    row_data.append(r[9] or 0)
-                
-                clean_rows.append(tuple(row_data))
-            
-            with pg_conn.cursor() as cur:
-                cols = "track_id, name, artist, album_id, danceability, energy, valence, tempo, acousticness, audio_embedding"
-                if has_popularity:
-                    cols += ", popularity"
-                    
-                with cur.copy(f"COPY tracks ({cols}) FROM STDIN") as copy:
-                    for row in clean_rows:
-                        copy.write_row(row)
-            
-            pg_conn.commit()
-            total_tracks += len(rows)
-            pbar.update(len(rows))
-            
-            if total_tracks >= TRACK_LIMIT:
-                break
-
-        pbar.close()
+        # Extraction, defaults (vectorised) and COPY overlap; see etl/pipeline.py
+        track_columns = ["track_id", "name", "artist", "album_id",
+                         "danceability", "energy", "valence", "tempo", "acousticness"]
+        if has_popularity:
+            track_columns.append("popularity")
+        schema = {c: TRACKS_SCHEMA.get(c, pl.Utf8) for c in track_columns}
+        summary = run_pipeline(sqlite_stream(SQLITE_DB, final_query, schema, batch=BATCH_SIZE),
+                               fill_track_defaults, copy_loader(PG_DSN, columns=track_columns), load_workers=1)
+        print_pipeline_summary(summary)
+        total_tracks = summary["rows"]
         print(f"✅ Inserted {total_tracks} tracks.")
         
         # ==================== SEED ALBUMS ====================
@@ -196,53 +168,36 @@ def run_dev_seed():
                 alb.id,
                 alb.name,
                 GROUP_CONCAT(a.name) as artist,
-                MAX(alb.popularity) as popularity,
-                AVG(af.danceability) as avg_dance,
-                AVG(af.energy) as avg_energy,
-                AVG(af.valence) as avg_valence,
-                AVG(af.tempo) as avg_tempo,
-                AVG(af.acousticness) as avg_acoustic
+                MAX(alb.popularity) as popularity
             FROM albums alb
             JOIN r_albums_tracks rat ON alb.id = rat.album_id
             JOIN tracks t ON rat.track_id = t.id
-            LEFT JOIN audio_features af ON t.id = af.id
             LEFT JOIN r_albums_artists raa ON alb.id = raa.album_id
             LEFT JOIN artists a ON raa.artist_id = a.id
             GROUP BY alb.id
             HAVING COUNT(t.id) >= 3
             ORDER BY MAX(alb.popularity) DESC
-            LIMIT {ALBUM_LIMIT}
+            {f"LIMIT {ALBUM_LIMIT}" if ALBUM_LIMIT else ""}
         """
         
+        cursor = sqlite_conn.cursor()
         cursor.execute(album_query)
         
         total_albums = 0
-        pbar = tqdm(total=ALBUM_LIMIT, unit="albums", desc="💿 Albums")
+        pbar = tqdm(total=ALBUM_LIMIT or None, unit="albums", desc="💿 Albums")
         
         while True:
             rows = cursor.fetchmany(BATCH_SIZE)
             if not rows:
                 break
             
-            album_rows = []
-            for r in rows:
-                album_id = r[0]
-                name = r[1]
-                artist = r[2] or "Unknown"
-                popularity = r[3] or 0
-                avg_dance = r[4] or 0.5
-                avg_energy = r[5] or 0.5
-                avg_valence = r[6] or 0.5
-                avg_tempo = r[7] or 120.0
-                avg_acoustic = r[8] or 0.5
-                
-                tempo_norm = min(max(avg_tempo / 250.0, 0.0), 1.0)
-                avg_embedding = [avg_dance, avg_energy, avg_valence, tempo_norm, avg_acoustic]
-                
-                album_rows.append((album_id, name, artist, popularity, str(avg_embedding)))
+            # Centroid columns start empty (track_count 0, sums NULL): they are
+            # filled from the links actually made in Postgres below, so an album
+            # only counts the tracks that were seeded
+            album_rows = [(r[0], r[1], r[2] or "Unknown", r[3] or 0) for r in rows]
             
             with pg_conn.cursor() as cur:
-                with cur.copy("COPY albums (album_id, name, artist, popularity, avg_embedding) FROM STDIN") as copy:
+                with cur.copy("COPY albums (album_id, name, artist, popularity) FROM STDIN") as copy:
                     for row in album_rows:
                         copy.write_row(row)
             
@@ -250,7 +205,7 @@ def run_dev_seed():
             total_albums += len(rows)
             pbar.update(len(rows))
             
-            if total_albums >= ALBUM_LIMIT:
+            if ALBUM_LIMIT and total_albums >= ALBUM_LIMIT:
                 break
         
         pbar.close()
@@ -259,31 +214,22 @@ def run_dev_seed():
         # ==================== SEED ALBUM-TRACK RELATIONS ====================
         print(f"\n🔗 Linking albums to tracks...")
         
-        # Get track IDs that exist in Postgres
-        with pg_conn.cursor() as cur:
-            cur.execute("SELECT track_id FROM tracks")
-            pg_track_ids = set(r[0] for r in cur.fetchall())
-            cur.execute("SELECT album_id FROM albums")
-            pg_album_ids = set(r[0] for r in cur.fetchall())
-        
-        relation_query = """
-            SELECT album_id, track_id FROM r_albums_tracks
-        """
-        cursor.execute(relation_query)
-        
-        relation_rows = []
-        for r in cursor.fetchall():
-            album_id, track_id = r[0], r[1]
-            if album_id in pg_album_ids and track_id in pg_track_ids:
-                relation_rows.append((album_id, track_id))
-        
-        with pg_conn.cursor() as cur:
-            with cur.copy("COPY album_tracks (album_id, track_id) FROM STDIN") as copy:
-                for row in relation_rows:
-                    copy.write_row(row)
+        # r_albums_tracks is streamed to the server and joined against albums /
+        # tracks there, so client memory stays flat however large the catalog is
+        link_frames = (df for _, df in sqlite_stream(SQLITE_DB, "SELECT album_id, track_id FROM r_albums_tracks",
+                                                     {"album_id": pl.Utf8, "track_id": pl.Utf8},
+                                                     batch=LINK_BATCH_SIZE))
+        link_count, centroid_count = add_album_track_frames(pg_conn, link_frames)
+        pg_conn.commit()
+        print(f"✅ Created {link_count} album-track links, {centroid_count} album centroids.")
         
+        # ==================== ARTIST CENTROIDS ====================
+        # One full build after the reseed; later ingests update it incrementally
+        print(f"\n🎤 Building artist centroids...")
+        ensure_artist_centroid_schema(pg_conn)
+        artist_count = rebuild_artist_centroids(pg_conn)
         pg_conn.commit()
-        print(f"✅ Created {len(relation_rows)} album-track links.")
+        print(f"✅ Built {artist_count} artist centroids.")
 
     except Exception as e:
         print(f"\n❌ Error during seed: {e}")
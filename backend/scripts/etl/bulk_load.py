@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+import psycopg
+from dotenv import load_dotenv
+
+"""
+Script: bulk_load.py
+Description:
+    Bulk-load mode for large tables (tracks): load first,
+    index afterwards.
+
+    Every row COPYed into a table with an HNSW index is inserted into the graph
+    one by one, and every row of a logged table is written twice (WAL + heap).
+    For an initial / full load it is much cheaper to:
+
+    1. `begin`:  save the definitions of the table's secondary and vector
+                 indexes (in `bulk_load_indexes`), drop them and switch the
+                 table to UNLOGGED. Primary key, unique and constraint indexes
+                 stay, so duplicate keys are still rejected. If the
+                 table cannot be UNLOGGED (a logged table references it), it
+                 stays logged and the load just runs without the indexes.
+    2. load with COPY.
+    3. `finish`: SET LOGGED, rebuild the saved indexes with a large
+                 `maintenance_work_mem` and parallel maintenance workers, then
+                 ANALYZE.
+
+    The saved definitions live in the database, so `finish` can run from another
+    process (or after a crashed load) and restores exactly what was dropped.
+    An UNLOGGED table is truncated after a crash, so only use this for loads that
+    can be re-run from the source.
+
+    Seeders call `bulk_load(dsn, "tracks", ...)` around their COPY phase.
+
+Settings (env):
+    BULK_MAINTENANCE_WORK_MEM   maintenance_work_mem for the rebuild (default 2GB)
+    BULK_PARALLEL_WORKERS       max_parallel_maintenance_workers (default 4)
+
+Usage:
+    python backend/scripts/etl/bulk_load.py begin tracks
+    python backend/scripts/etl/bulk_load.py finish tracks
+    python backend/scripts/etl/bulk_load.py status
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+
+BULK_MAINTENANCE_WORK_MEM = os.getenv("BULK_MAINTENANCE_WORK_MEM", "2GB")
+BULK_PARALLEL_WORKERS = int(os.getenv("BULK_PARALLEL_WORKERS", "4"))
+
+
+def ensure_registry(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bulk_load_indexes (
+            table_name TEXT NOT NULL,
+            index_name TEXT PRIMARY KEY,
+            definition TEXT NOT NULL,
+            dropped_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+
+
+def deferrable_indexes(conn, table: str) -> List[Tuple[str, str]]:
+    """(name, CREATE INDEX statement) of `table`'s non-unique indexes (constraints keep theirs)."""
+    return conn.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = %s::regclass AND NOT i.indisunique AND NOT i.indisprimary
+        AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname
+    """, (f'"{table}"',)).fetchall()
+
+
+def begin_bulk_load(conn, table: str, unlogged: bool = True) -> List[str]:
+    """Drops `table`'s deferrable indexes (saving their definitions) and makes it UNLOGGED."""
+    ensure_registry(conn)
+    dropped = []
+    for index_name, definition in deferrable_indexes(conn, table):
+        conn.execute(
+            "INSERT INTO bulk_load_indexes (table_name, index_name, definition) VALUES (%s, %s, %s) "
+            "ON CONFLICT (index_name) DO NOTHING",
+            (table, index_name, definition),
+        )
+        conn.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+        dropped.append(index_name)
+    print(f"   🗑️  {table}: deferred {len(dropped)} indexes {dropped}")
+
+    if unlogged:
+        try:
+            with conn.transaction():
+                conn.execute(f'ALTER TABLE "{table}" SET UNLOGGED')
+            print(f"   ⚡ {table}: UNLOGGED for the load")
+        except psycopg.Error as e:
+            print(f"   ℹ️  {table}: staying logged ({e.diag.message_primary or e})")
+    return dropped
+
+
+def finish_bulk_load(conn, table: str, maintenance_work_mem: str = BULK_MAINTENANCE_WORK_MEM,
+                     parallel_workers: int = BULK_PARALLEL_WORKERS) -> List[str]:
+    """SET LOGGED, rebuilds the saved indexes with tuned memory / parallelism, then ANALYZE."""
+    ensure_registry(conn)
+    persistence = conn.execute(
+        "SELECT relpersistence FROM pg_class WHERE oid = %s::regclass", (f'"{table}"',)
+    ).fetchone()[0]
+    if persistence == "u":
+        start = time.time()
+        conn.execute(f'ALTER TABLE "{table}" SET LOGGED')
+        print(f"   📝 {table}: SET LOGGED ({time.time() - start:.1f}s)")
+
+    conn.execute(f"SET maintenance_work_mem = '{maintenance_work_mem}'")
+    conn.execute(f"SET max_parallel_maintenance_workers = {int(parallel_workers)}")
+    rebuilt = []
+    saved = conn.execute(
+        "SELECT index_name, definition FROM bulk_load_indexes WHERE table_name = %s ORDER BY dropped_at, index_name",
+        (table,),
+    ).fetchall()
+    for index_name, definition in saved:
+        print(f"   🏗️  {index_name}...", end="", flush=True)
+        start = time.time()
+        # pg_get_indexdef() is a complete CREATE INDEX statement
+        conn.execute(definition.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+        conn.execute("DELETE FROM bulk_load_indexes WHERE index_name = %s", (index_name,))
+        rebuilt.append(index_name)
+        print(f" {time.time() - start:.1f}s")
+
+    conn.execute("RESET maintenance_work_mem")
+    conn.execute("RESET max_parallel_maintenance_workers")
+    start = time.time()
+    conn.execute(f'ANALYZE "{table}"')
+    print(f"   📊 {table}: ANALYZE ({time.time() - start:.1f}s)")
+    return rebuilt
+
+
+@contextmanager
+def bulk_load(dsn: str, *tables: str, unlogged: bool = True):
+    """
+    Wraps a load: indexes are deferred on entry and rebuilt on exit, also when
+    the load fails, so the tables are never left without their indexes.
+    """
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        print(f"🚚 Bulk-load mode for {', '.join(tables)}")
+        for table in tables:
+            begin_bulk_load(conn, table, unlogged)
+    try:
+        yield
+    finally:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            print(f"🔧 Rebuilding indexes for {', '.join(tables)}")
+            for table in tables:
+                finish_bulk_load(conn, table)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    tables = sys.argv[2:] or ["tracks"]
+    try:
+        with psycopg.connect(PG_DSN, autocommit=True) as conn:
+            if command == "begin":
+                for table in tables:
+                    begin_bulk_load(conn, table)
+            elif command == "finish":
+                for table in tables:
+                    finish_bulk_load(conn, table)
+            else:
+                ensure_registry(conn)
+                rows = conn.execute("SELECT table_name, index_name, dropped_at FROM bulk_load_indexes ORDER BY 1, 2").fetchall()
+                print(f"{len(rows)} deferred indexes")
+                for table, index_name, dropped_at in rows:
+                    print(f"   {table}.{index_name} (dropped {dropped_at:%Y-%m-%d %H:%M})")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,337 @@
+import os
+import sys
+import psycopg
+from dotenv import load_dotenv
+
+"""
+Script: centroids.py
+Description:
+    Materialised sonic centroids for albums and artists, maintained incrementally.
+
+    - Albums: `albums.track_count` / `albums.embedding_sum` next to `avg_embedding`.
+    - Artists: the `artist_centroids` table (artist, track_count, embedding_sum, centroid),
+      with an HNSW index on `centroid`. It backs "artists like this" and acts as a
+      cold-start prior for recommendation seed sets.
+
+    When tracks are added (or removed / changed), we only touch the affected rows:
+
+        embedding_sum += SUM(new track embeddings)
+        track_count   += number of new tracks
+        avg_embedding  = embedding_sum / track_count
+
+    This replaces aggregating over all of an artist's / album's tracks on demand or
+    recomputing with a full reseed. The work is O(changed rows), and the vector
+    indexes are updated in place.
+
+    Functions here are meant to be called by seeders / ingest jobs right after they
+    insert tracks; the loaders finish with refresh_after_load(). The CLI offers the
+    same catch-up pass for tracks whose `album_id` is set but which are not linked yet.
+
+Usage:
+    python backend/scripts/etl/centroids.py link-new   # link + update centroids for unlinked tracks
+    python backend/scripts/etl/centroids.py rebuild    # recompute all album + artist centroids from scratch
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+
+# pgvector has `vector + vector` and SUM(vector) but no vector / scalar,
+# so the mean is computed element-wise through real[]
+CENTROID_FROM_SUM = "ARRAY(SELECT x / {count} FROM unnest(({sum})::real[]) WITH ORDINALITY AS u(x, i) ORDER BY i)::vector"
+ZERO_VECTOR = "'[0,0,0,0,0]'::vector"
+
+# Multi-artist tracks store "Artist A,Artist B"; each credited artist gets the track
+TRACK_ARTISTS = "unnest(string_to_array(t.artist, ','))"
+
+
+def ensure_album_centroid_schema(conn):
+    """Adds the running-sum columns to `albums` (no-op if present)."""
+    conn.execute("ALTER TABLE albums ADD COLUMN IF NOT EXISTS track_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE albums ADD COLUMN IF NOT EXISTS embedding_sum VECTOR(5)")
+
+
+def _stage_new_links(cur):
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS _new_album_links (
+            album_id TEXT, track_id TEXT
+        ) ON COMMIT DELETE ROWS
+    """)
+    cur.execute("TRUNCATE _new_album_links")
+
+
+def _apply_new_links(cur) -> tuple:
+    """
+    Inserts links from the `_new_album_links` temp table and folds the linked
+    tracks into their albums' centroids. Links that already exist are ignored, so
+    a track is never counted twice.
+    """
+    cur.execute(f"""
+        WITH inserted AS (
+            INSERT INTO album_tracks (album_id, track_id)
+            SELECT DISTINCT n.album_id, n.track_id
+            FROM _new_album_links n
+            JOIN albums a ON a.album_id = n.album_id
+            JOIN tracks t ON t.track_id = n.track_id
+            ON CONFLICT DO NOTHING
+            RETURNING album_id, track_id
+        ),
+        delta AS (
+            SELECT i.album_id, COUNT(*) AS n, SUM(t.audio_embedding) AS s
+            FROM inserted i
+            JOIN tracks t ON t.track_id = i.track_id
+            WHERE t.audio_embedding IS NOT NULL
+            GROUP BY i.album_id
+        ),
+        updated AS (
+            UPDATE albums a SET
+                track_count = a.track_count + d.n,
+                embedding_sum = COALESCE(a.embedding_sum + d.s, d.s),
+                avg_embedding = {CENTROID_FROM_SUM.format(
+                    sum="COALESCE(a.embedding_sum + d.s, d.s)",
+                    count="(a.track_count + d.n)",
+                )}
+            FROM delta d
+            WHERE a.album_id = d.album_id
+            RETURNING a.album_id
+        )
+        SELECT (SELECT COUNT(*) FROM inserted), (SELECT COUNT(*) FROM updated)
+    """)
+    links, albums = cur.fetchone()
+    return links, albums
+
+
+def add_album_tracks(conn, links) -> tuple:
+    """
+    Links tracks to albums and updates only the affected album centroids.
+
+    Args:
+        conn: psycopg connection (the caller owns the transaction).
+        links: iterable of (album_id, track_id) pairs.
+
+    Returns:
+        (links_inserted, albums_updated)
+    """
+    with conn.cursor() as cur:
+        _stage_new_links(cur)
+        with cur.copy("COPY _new_album_links (album_id, track_id) FROM STDIN") as copy:
+            for album_id, track_id in links:
+                copy.write_row((album_id, track_id))
+        return _apply_new_links(cur)
+
+
+def add_album_track_frames(conn, frames) -> tuple:
+    """
+    add_album_tracks() for large link sets (e.g. the whole r_albums_tracks):
+    `frames` are Polars frames with (album_id, track_id) columns, COPYed as CSV
+    chunk by chunk, so client memory stays flat. Pairs whose album or track is
+    not in Postgres are dropped server-side.
+    """
+    with conn.cursor() as cur:
+        _stage_new_links(cur)
+        with cur.copy("COPY _new_album_links (album_id, track_id) FROM STDIN (FORMAT csv)") as copy:
+            for df in frames:
+                copy.write(df.select("album_id", "track_id").write_csv(include_header=False))
+        return _apply_new_links(cur)
+
+
+def link_unlinked_tracks(conn) -> tuple:
+    """Catch-up pass: links every track whose `album_id` is set but not yet in album_tracks."""
+    with conn.cursor() as cur:
+        _stage_new_links(cur)
+        cur.execute("""
+            INSERT INTO _new_album_links (album_id, track_id)
+            SELECT t.album_id, t.track_id
+            FROM tracks t
+            WHERE t.album_id IS NOT NULL
+            AND NOT EXISTS (
+                SELECT 1 FROM album_tracks at
+                WHERE at.album_id = t.album_id AND at.track_id = t.track_id
+            )
+        """)
+        return _apply_new_links(cur)
+
+
+def link_new_album_tracks(conn) -> tuple:
+    """
+    link_unlinked_tracks() for any loader of `tracks`: (0, 0) unless the schema
+    has album links (album_tracks and tracks.album_id).
+    """
+    supported = conn.execute("""
+        SELECT to_regclass('album_tracks') IS NOT NULL AND EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'tracks' AND column_name = 'album_id'
+        )
+    """).fetchone()[0]
+    if not supported:
+        return 0, 0
+    ensure_album_centroid_schema(conn)
+    return link_unlinked_tracks(conn)
+
+
+def refresh_after_load(dsn: str = PG_DSN):
+    """
+    Run by seeders / ingest once their tracks are committed: links new tracks to
+    their albums and rebuilds `artist_centroids` from the loaded table, so it is
+    complete whichever loader (or resumed run) wrote the tracks.
+    """
+    with psycopg.connect(dsn) as conn:
+        links, albums = link_new_album_tracks(conn)
+        ensure_artist_centroid_schema(conn)
+        artists = rebuild_artist_centroids(conn)
+        conn.commit()
+    print(f"🔗 Linked {links} new tracks to albums, updated {albums} album centroids.")
+    print(f"🎤 Built {artists} artist centroids.")
+
+
+def rebuild_album_centroids(conn) -> int:
+    """Full recompute from album_tracks (drift correction; not needed on the hot path)."""
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH agg AS (
+                SELECT at.album_id, COUNT(*) AS n, SUM(t.audio_embedding) AS s
+                FROM album_tracks at
+                JOIN tracks t ON t.track_id = at.track_id
+                WHERE t.audio_embedding IS NOT NULL
+                GROUP BY at.album_id
+            )
+            UPDATE albums a SET
+                track_count = agg.n,
+                embedding_sum = agg.s,
+                avg_embedding = {CENTROID_FROM_SUM.format(sum="agg.s", count="agg.n")}
+            FROM agg
+            WHERE a.album_id = agg.album_id
+        """)
+        return cur.rowcount
+
+
+def refresh_album_centroids(conn, album_ids) -> int:
+    """Recomputes the centroids of just these albums from album_tracks (after their tracks changed or were removed)."""
+    album_ids = list(album_ids)
+    if not album_ids:
+        return 0
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH agg AS (
+                SELECT a.album_id, COUNT(t.audio_embedding) AS n, SUM(t.audio_embedding) AS s
+                FROM albums a
+                LEFT JOIN album_tracks at ON at.album_id = a.album_id
+                LEFT JOIN tracks t ON t.track_id = at.track_id
+                WHERE a.album_id = ANY(%s)
+                GROUP BY a.album_id
+            )
+            UPDATE albums a SET
+                track_count = agg.n,
+                embedding_sum = agg.s,
+                avg_embedding = CASE WHEN agg.n > 0 THEN {CENTROID_FROM_SUM.format(sum="agg.s", count="agg.n")} END
+            FROM agg
+            WHERE a.album_id = agg.album_id
+        """, (album_ids,))
+        return cur.rowcount
+
+
+def ensure_artist_centroid_schema(conn):
+    """Creates the `artist_centroids` table and its vector index."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS artist_centroids (
+            artist TEXT PRIMARY KEY,
+            track_count INTEGER NOT NULL DEFAULT 0,
+            embedding_sum VECTOR(5),
+            centroid VECTOR(5)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS artist_centroids_embedding_idx
+        ON artist_centroids USING hnsw (centroid vector_l2_ops)
+    """)
+
+
+def update_artist_centroids(conn, track_ids, sign: int = 1) -> int:
+    """
+    Folds tracks into (sign=+1) or out of (sign=-1) their artists' centroids.
+
+    Reads the tracks' *current* rows, so for updates / deletes call it with
+    sign=-1 BEFORE modifying the rows and with sign=+1 after (for updates).
+
+    Args:
+        conn: psycopg connection (the caller owns the transaction).
+        track_ids: ids of the changed tracks.
+        sign: +1 to add, -1 to remove.
+
+    Returns:
+        Number of artist centroids touched.
+    """
+    track_ids = list(track_ids)
+    if not track_ids:
+        return 0
+    delta_sum = "d.s" if sign > 0 else f"({ZERO_VECTOR} - d.s)"
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            WITH d AS (
+                SELECT trim(a) AS artist, COUNT(*) AS n, SUM(t.audio_embedding) AS s
+                FROM tracks t, {TRACK_ARTISTS} AS a
+                WHERE t.track_id = ANY(%s) AND t.audio_embedding IS NOT NULL
+                GROUP BY trim(a)
+            )
+            INSERT INTO artist_centroids AS c (artist, track_count, embedding_sum, centroid)
+            SELECT d.artist, {sign} * d.n, {delta_sum}, {CENTROID_FROM_SUM.format(sum="d.s", count="d.n")}
+            FROM d
+            ON CONFLICT (artist) DO UPDATE SET
+                track_count = c.track_count + EXCLUDED.track_count,
+                embedding_sum = COALESCE(c.embedding_sum, {ZERO_VECTOR}) + EXCLUDED.embedding_sum,
+                centroid = CASE WHEN c.track_count + EXCLUDED.track_count > 0 THEN {CENTROID_FROM_SUM.format(
+                    sum=f"COALESCE(c.embedding_sum, {ZERO_VECTOR}) + EXCLUDED.embedding_sum",
+                    count="(c.track_count + EXCLUDED.track_count)",
+                )} END
+        """, (track_ids,))
+        touched = cur.rowcount
+        if sign < 0:
+            # Artists whose last track was removed
+            cur.execute(f"""
+                DELETE FROM artist_centroids
+                WHERE track_count <= 0 AND artist IN (
+                    SELECT trim(a) FROM tracks t, {TRACK_ARTISTS} AS a WHERE t.track_id = ANY(%s)
+                )
+            """, (track_ids,))
+        return touched
+
+
+def rebuild_artist_centroids(conn) -> int:
+    """Full recompute of `artist_centroids` (initial build after a bulk load / drift correction)."""
+    with conn.cursor() as cur:
+        cur.execute("TRUNCATE artist_centroids")
+        cur.execute(f"""
+            INSERT INTO artist_centroids (artist, track_count, embedding_sum, centroid)
+            SELECT artist, n, s, {CENTROID_FROM_SUM.format(sum="s", count="n")}
+            FROM (
+                SELECT trim(a) AS artist, COUNT(*) AS n, SUM(t.audio_embedding) AS s
+                FROM tracks t, {TRACK_ARTISTS} AS a
+                WHERE t.audio_embedding IS NOT NULL
+                GROUP BY trim(a)
+            ) agg
+        """)
+        return cur.rowcount
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "link-new"
+    try:
+        with psycopg.connect(PG_DSN) as conn:
+            ensure_album_centroid_schema(conn)
+            ensure_artist_centroid_schema(conn)
+            if command == "rebuild":
+                print("🔁 Rebuilding album centroids from album_tracks...")
+                count = rebuild_album_centroids(conn)
+                print(f"✅ Rebuilt {count} album centroids.")
+                print("🔁 Rebuilding artist centroids from tracks...")
+                count = rebuild_artist_centroids(conn)
+                print(f"✅ Rebuilt {count} artist centroids.")
+            else:
+                print("🔗 Linking new tracks and updating album centroids...")
+                links, albums = link_unlinked_tracks(conn)
+                print(f"✅ Linked {links} tracks, updated {albums} album centroids.")
+            conn.commit()
+    except Exception as e:
+        print(f"❌ Error: {e}")
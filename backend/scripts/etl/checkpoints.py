@@ -0,0 +1,214 @@
+import os
+import sys
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+import psycopg
+from dotenv import load_dotenv
+
+"""
+Script: checkpoints.py
+Description:
+    Durable checkpoints for long ETL runs, so a crashed or interrupted load can
+    be resumed instead of started over.
+
+    etl_runs         one row per run: run id, job (e.g. "seed"), partition count, status
+    etl_checkpoints  one row per committed partition: its key, the last source
+                     key committed in it (rowid, track id, ...) and its row count
+
+    A loader writes its checkpoint with record_checkpoint() in the SAME
+    transaction as the rows it copied, so a partition is either loaded and
+    checkpointed or neither. Resuming a run skips the checkpointed partitions
+    (and, for streamed partitions, continues after `last_key`), so nothing is
+    loaded twice.
+
+    Seeders take `--resume` (latest unfinished run of the job) or
+    `--resume RUN_ID`:
+
+        run = start_run(PG_DSN, "seed", resume=args.resume, table="tracks")
+        todo = run.pending(ranges, key=range_key)
+        summary = run_partitions(load, [(run.run_id, r) for r in todo], ...)
+        run.finish(summary)
+
+    and the load function calls record_checkpoint(conn, run_id, key, last, rows)
+    right before its COMMIT.
+
+    Progress of any run (also while it is running, from another shell) comes
+    from the checkpoint table.
+
+Usage:
+    python backend/scripts/etl/checkpoints.py status          # recent runs
+    python backend/scripts/etl/checkpoints.py status RUN_ID   # one run
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+
+
+def ensure_checkpoint_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS etl_runs (
+            run_id TEXT PRIMARY KEY,
+            job TEXT NOT NULL,
+            partitions INTEGER,
+            status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'failed', 'done')),
+            started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            finished_at TIMESTAMPTZ
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS etl_checkpoints (
+            run_id TEXT NOT NULL REFERENCES etl_runs (run_id) ON DELETE CASCADE,
+            partition TEXT NOT NULL,
+            last_key TEXT,
+            rows BIGINT NOT NULL DEFAULT 0,
+            committed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (run_id, partition)
+        )
+    """)
+
+
+def record_checkpoint(conn, run_id: Optional[str], partition: str, last_key, rows: int):
+    """
+    Records `rows` more rows committed in `partition`, up to source key `last_key`.
+    Must run in the loader's transaction (before its COMMIT). No-op without a run.
+    """
+    if run_id is None:
+        return
+    conn.execute("""
+        INSERT INTO etl_checkpoints (run_id, partition, last_key, rows) VALUES (%s, %s, %s, %s)
+        ON CONFLICT (run_id, partition) DO UPDATE SET
+            last_key = EXCLUDED.last_key,
+            rows = etl_checkpoints.rows + EXCLUDED.rows,
+            committed_at = now()
+    """, (run_id, partition, None if last_key is None else str(last_key), rows))
+
+
+class EtlRun:
+    """A started (or resumed) run and the partitions it has already committed."""
+
+    def __init__(self, dsn: str, run_id: str, job: str, committed: Dict[str, Optional[str]]):
+        self.dsn = dsn
+        self.run_id = run_id
+        self.job = job
+        self.committed = committed
+        self.resumed = bool(committed)
+
+    def last_key(self, partition: str) -> Optional[str]:
+        return self.committed.get(partition)
+
+    def pending(self, partitions: Sequence, key: Callable[[object], str] = str) -> List:
+        """`partitions` minus the ones already checkpointed; records the run's partition count."""
+        todo = [p for p in partitions if key(p) not in self.committed]
+        with psycopg.connect(self.dsn, autocommit=True) as conn:
+            conn.execute("UPDATE etl_runs SET partitions = %s WHERE run_id = %s", (len(partitions), self.run_id))
+        if self.resumed:
+            print(f"⏩ Resuming run {self.run_id}: {len(partitions) - len(todo)}/{len(partitions)} partitions already loaded")
+        return todo
+
+    def finish(self, summary: Optional[dict] = None):
+        """Marks the run done, or failed (still resumable) if partitions failed."""
+        status = "failed" if summary and summary.get("failed") else "done"
+        with psycopg.connect(self.dsn, autocommit=True) as conn:
+            conn.execute(
+                "UPDATE etl_runs SET status = %s, finished_at = now() WHERE run_id = %s", (status, self.run_id)
+            )
+            print_progress(run_progress(conn, self.run_id))
+        if status == "failed":
+            print(f"   Resume with --resume {self.run_id}")
+
+
+def start_run(dsn: str, job: str, resume: Optional[str] = None, table: Optional[str] = None) -> EtlRun:
+    """
+    Starts a new run of `job`, or resumes one: resume="latest" picks the most
+    recent unfinished run of the job (a new run if there is none), any other
+    value is a run id.
+
+    `table` is the run's target. If it is empty when resuming (an UNLOGGED
+    bulk-load table is truncated by a server crash), the checkpoints no longer
+    describe its contents and the run starts from the beginning.
+    """
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        ensure_checkpoint_schema(conn)
+        run_id = None
+        if resume == "latest":
+            row = conn.execute(
+                "SELECT run_id FROM etl_runs WHERE job = %s AND status <> 'done' ORDER BY started_at DESC LIMIT 1",
+                (job,),
+            ).fetchone()
+            run_id = row[0] if row else None
+        elif resume:
+            if conn.execute("SELECT 1 FROM etl_runs WHERE run_id = %s", (resume,)).fetchone() is None:
+                raise ValueError(f"Unknown ETL run: {resume}")
+            run_id = resume
+
+        if run_id is None:
+            run_id = f"{job}-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            conn.execute("INSERT INTO etl_runs (run_id, job) VALUES (%s, %s)", (run_id, job))
+            committed = {}
+        else:
+            conn.execute("UPDATE etl_runs SET status = 'running', finished_at = NULL WHERE run_id = %s", (run_id,))
+            committed = dict(conn.execute(
+                "SELECT partition, last_key FROM etl_checkpoints WHERE run_id = %s", (run_id,)
+            ).fetchall())
+            if committed and table and not conn.execute(f'SELECT EXISTS (SELECT 1 FROM "{table}")').fetchone()[0]:
+                print(f"⚠️  {table} is empty, discarding the checkpoints of run {run_id}")
+                conn.execute("DELETE FROM etl_checkpoints WHERE run_id = %s", (run_id,))
+                committed = {}
+    print(f"🔖 ETL run {run_id}")
+    return EtlRun(dsn, run_id, job, committed)
+
+
+def run_progress(conn, run_id: str) -> dict:
+    """Partitions / rows committed so far, throughput and a naive ETA."""
+    row = conn.execute("""
+        SELECT r.run_id, r.job, r.status, r.partitions, count(c.partition), coalesce(sum(c.rows), 0),
+               extract(epoch FROM coalesce(max(c.committed_at), now()) - r.started_at)
+        FROM etl_runs r
+        LEFT JOIN etl_checkpoints c ON c.run_id = r.run_id
+        WHERE r.run_id = %s
+        GROUP BY r.run_id
+    """, (run_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown ETL run: {run_id}")
+    run_id, job, status, partitions, done, rows, seconds = row
+    seconds = float(seconds or 0)
+    eta = None
+    if partitions and done and status == "running":
+        eta = round(seconds / done * (partitions - done), 1)
+    return {
+        "run_id": run_id, "job": job, "status": status,
+        "partitions": partitions, "done": done, "rows": int(rows),
+        "seconds": round(seconds, 1),
+        "rows_per_s": round(rows / seconds, 1) if seconds else 0.0,
+        "eta_s": eta,
+    }
+
+
+def print_progress(progress: dict):
+    total = progress["partitions"] if progress["partitions"] is not None else "?"
+    eta = f", ETA {progress['eta_s']:.0f}s" if progress["eta_s"] is not None else ""
+    print(f"   {progress['run_id']:<36} {progress['status']:<8} {progress['done']}/{total} partitions "
+          f"{progress['rows']:>12,} rows ({progress['rows_per_s']:,.0f} rows/s{eta})")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    try:
+        with psycopg.connect(PG_DSN, autocommit=True) as conn:
+            ensure_checkpoint_schema(conn)
+            if command != "status":
+                raise ValueError(f"Unknown command: {command}")
+            if len(sys.argv) > 2:
+                run_ids = [sys.argv[2]]
+            else:
+                run_ids = [r[0] for r in conn.execute("SELECT run_id FROM etl_runs ORDER BY started_at DESC LIMIT 20")]
+            print(f"{len(run_ids)} ETL runs")
+            for run_id in run_ids:
+                print_progress(run_progress(conn, run_id))
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -1,8 +1,23 @@
+import multiprocessing
 import sqlite3
 import os
+import shutil
 import sys
+import tempfile
 import time
-from tqdm import tqdm
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from scripts.etl.parallel_copy import rowid_ranges
+    from scripts.etl.stage_parquet import (
+        FLATTENED_COLUMNS, STAGE_DIR, connect_source, flattened_tracks_sql, stage_available, scan_top_popular,
+    )
+except ImportError:
+    # Running as a script from the project root / within scripts/etl
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from parallel_copy import rowid_ranges
+    from stage_parquet import FLATTENED_COLUMNS, STAGE_DIR, connect_source, flattened_tracks_sql, stage_available, scan_top_popular
 
 """
 Script: create_dev_db.py
@@ -12,6 +27,12 @@ Description:
 
     It performs the following roles:
     1. EXTRACT: Connects to the ~5GB source SQLite database.
+       The join is sharded into rowid ranges of `tracks`, run by a pool of
+       DEV_DB_WORKERS processes, each with its own read-only, memory-mapped
+       connection. Each shard writes to its own SQLite file and reports its
+       own progress; shards are merged into the target in rowid order until
+       LIMIT rows are in, so the result does not depend on which shard
+       finished first.
     2. TRANSFORM: 
        - Joins multiple normalized tables (tracks, artists, albums, audio_features).
        - Selects a subset of tracks (controlled by LIMIT).
@@ -19,6 +40,10 @@ Description:
        - Extracts key metadata including 'popularity' and 'album' name.
     3. LOAD: Writes the result to a new, smaller SQLite file (`spotify_dev.sqlite`).
 
+    If the Parquet staging layer exists (scripts/etl/stage_parquet.py), the
+    rows are read from it instead, which takes seconds rather than a join over
+    the whole dump.
+
 Usage:
     Run this script ONCE to generate the dev database.
     > python backend/scripts/etl/create_dev_db.py
@@ -33,13 +58,130 @@ Usage:
 SOURCE_DB = "backend/spotify.sqlite"
 TARGET_DB = "backend/spotify_dev.sqlite"
 LIMIT = 100000 # Number of tracks to extract
+DEV_DB_WORKERS = int(os.getenv("DEV_DB_WORKERS", str(os.cpu_count() or 4)))
+SHARD_ROWS = int(os.getenv("DEV_DB_SHARD_ROWS", "25000"))  # tracks rowids per shard
+SHARD_PROGRESS_ROWS = 5000  # a shard reports every N rows
 
-def progress_handler():
-    """Called by SQLite virtual machine every N opcodes to show activity."""
-    print(".", end="", flush=True)
+# The single FLAT table
+# This schema is "Denormalized" - optimized for easy reading/seeding, not update speed.
+DEV_TRACKS_DDL = """
+    CREATE TABLE IF NOT EXISTS dev_tracks (
+        track_id TEXT PRIMARY KEY,
+        name TEXT,
+        artist TEXT,
+        album TEXT,
+        popularity INTEGER,
+        danceability FLOAT,
+        energy FLOAT,
+        valence FLOAT,
+        tempo FLOAT,
+        acousticness FLOAT
+    )
+"""
+
+def extract_shard(task) -> tuple:
+    """Worker: runs the join over one rowid range into its own SQLite file. Returns (path, rows, seconds)."""
+    index, source, shard_dir, (first, last) = task
+    start = time.time()
+    path = os.path.join(shard_dir, f"shard_{index:06d}.sqlite")
+    src = connect_source(source)
+    dst = sqlite3.connect(path)
+    count = 0
+    try:
+        dst.execute(DEV_TRACKS_DDL)
+        cursor = src.execute(flattened_tracks_sql("WHERE t.rowid BETWEEN ? AND ?"), (first, last))
+        while True:
+            rows = cursor.fetchmany(SHARD_PROGRESS_ROWS)
+            if not rows:
+                break
+            dst.executemany("INSERT OR IGNORE INTO dev_tracks VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
+            count += len(rows)
+            print(f"   🧩 shard {index} (rowid {first}-{last}): {count:,} rows", flush=True)
+        dst.commit()
+    finally:
+        src.close()
+        dst.close()
+    return path, count, time.time() - start
+
+def merge_shard(dst, path: str, remaining: int) -> int:
+    """Appends up to `remaining` rows of a shard to the target (duplicates across shards are skipped)."""
+    dst.execute("ATTACH DATABASE ? AS shard", (path,))
+    try:
+        before = dst.total_changes
+        dst.execute(f"INSERT OR IGNORE INTO dev_tracks SELECT * FROM shard.dev_tracks ORDER BY rowid LIMIT {remaining}")
+        dst.commit()
+        return dst.total_changes - before
+    finally:
+        dst.execute("DETACH DATABASE shard")
+
+def extract_sharded(source: str, dst, limit: int = LIMIT, workers: int = DEV_DB_WORKERS) -> int:
+    """
+    Runs the shards with at most 2 * `workers` in flight and merges them in
+    order until `limit` rows are in; shards not needed any more are cancelled.
+    """
+    ranges = rowid_ranges(source, "tracks", SHARD_ROWS)
+    shard_dir = tempfile.mkdtemp(prefix="dev_db_shards_", dir=os.path.dirname(os.path.abspath(source)))
+    print(f"⚡ Extracting with {workers} workers ({len(ranges)} shards of {SHARD_ROWS:,} rowids available)...")
+    count = 0
+    tasks = iter(enumerate(ranges))
+    pending = deque()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        def submit_next():
+            task = next(tasks, None)
+            if task is not None:
+                index, bounds = task
+                pending.append(pool.submit(extract_shard, (index, source, shard_dir, bounds)))
+
+        for _ in range(2 * workers):
+            submit_next()
+        while pending and count < limit:
+            path, rows, seconds = pending.popleft().result()
+            added = merge_shard(dst, path, limit - count)
+            os.remove(path)
+            count += added
+            print(f"✅ Merged {os.path.basename(path)}: {rows:,} rows in {seconds:.1f}s "
+                  f"({rows / max(seconds, 1e-9):,.0f} rows/s) -> {count:,}/{limit:,}", flush=True)
+            if count < limit:
+                submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return count
+
+def create_dev_db_from_stage(stage_dir: str):
+    """
+    Builds dev_tracks from the staged, already-flattened tracks: the LIMIT most
+    popular ones (ties by track_id), the same subset seeding/dev_seed.py loads
+    from the stage, whatever order the partitions are read in.
+    """
+    global TARGET_DB
+    if not os.path.isdir(os.path.dirname(TARGET_DB) or "."):
+        TARGET_DB = "spotify_dev.sqlite"
+    if os.path.exists(TARGET_DB):
+        print(f"⚠️  Target DB '{TARGET_DB}' already exists. Overwriting with new schema...")
+        os.remove(TARGET_DB)
+
+    print(f"🚀 Starting Extraction: {stage_dir}/ (Parquet stage) -> {TARGET_DB}")
+    start_time = time.time()
+    df = scan_top_popular(LIMIT, stage_dir).select(FLATTENED_COLUMNS).collect()
+    dst = sqlite3.connect(TARGET_DB)
+    try:
+        dst.execute(DEV_TRACKS_DDL)
+        dst.executemany("INSERT INTO dev_tracks VALUES (?,?,?,?,?,?,?,?,?,?)", df.iter_rows())
+        dst.commit()
+    finally:
+        dst.close()
+    print(f"🏁 DONE! Created {TARGET_DB} with {df.height} rows in {time.time() - start_time:.1f}s.")
 
 def create_dev_db():
     global SOURCE_DB, TARGET_DB
+
+    for stage_dir in (os.path.join("backend", STAGE_DIR), STAGE_DIR):
+        if stage_available(stage_dir):
+            return create_dev_db_from_stage(stage_dir)
     
     if not os.path.exists(SOURCE_DB):
         # Fallback check relative to script execution?
@@ -58,89 +200,19 @@ def create_dev_db():
 
     print(f"🚀 Starting Extraction: {SOURCE_DB} -> {TARGET_DB}")
     print(f"🎯 Target: {LIMIT} rows (Flattened Schema with Album & Popularity)")
-    print(f"⏳ This involves complex JOINs on a 5GB DB. Please wait approx 5-15 mins.\n")
+    print(f"⏳ This involves complex JOINs on a 5GB DB, split across {DEV_DB_WORKERS} processes.\n")
 
-    # 1. Connect to Source
-    # We use a progress handler to give visual feedback during long queries
-    src = sqlite3.connect(SOURCE_DB)
-    src.set_progress_handler(progress_handler, 5000000) 
-    
-    # 2. Connect to Target
+    # 1. Connect to Target
     dst = sqlite3.connect(TARGET_DB)
     
     try:
         # Create the single FLAT table
-        # This schema is "Denormalized" - optimized for easy reading/seeding, not update speed.
-        dst.execute("""
-            CREATE TABLE IF NOT EXISTS dev_tracks (
-                track_id TEXT PRIMARY KEY,
-                name TEXT,
-                artist TEXT,
-                album TEXT,
-                popularity INTEGER,
-                danceability FLOAT,
-                energy FLOAT,
-                valence FLOAT,
-                tempo FLOAT,
-                acousticness FLOAT
-            )
-        """)
-        
-        # The Complex Extraction Query
-        # Notes:
-        # - GROUP_CONCAT(a.name): Handles tracks with multiple artists
-        # - JOIN r_track_album + JOIN albums: Fetches the Album name
-        # - MAX(...): Used because of GROUP BY track_id; ensures we get a single value per track
-        query = f"""
-            SELECT 
-                t.id, 
-                t.name, 
-                GROUP_CONCAT(distinct a.name) as artist,
-                MAX(alb.name) as album,
-                MAX(t.popularity) as popularity,
-                MAX(af.danceability), 
-                MAX(af.energy), 
-                MAX(af.valence), 
-                MAX(af.tempo), 
-                MAX(af.acousticness)
-            FROM tracks t
-            JOIN audio_features af ON t.id = af.id
-            JOIN r_track_artist rta ON t.id = rta.track_id
-            JOIN artists a ON rta.artist_id = a.id
-            LEFT JOIN r_albums_tracks rtalb ON t.id = rtalb.track_id
-            LEFT JOIN albums alb ON rtalb.album_id = alb.id
-            GROUP BY t.id
-            LIMIT {LIMIT}
-        """
-        
-        print("⚡ Executing Query (Extracting & Joining)...", end=" ")
+        dst.execute(DEV_TRACKS_DDL)
         
+        # 2. Sharded extraction (the join is shared with the stage and seeders, see stage_parquet.py)
         start_time = time.time()
-        cursor = src.cursor()
-        cursor.execute(query)
-        
-        print("\n✅ Query successful! Streaming results to target DB...")
-        
-        # Insert Loop with Progress Bar
-        # We fetch in batches to keep memory usage low
-        pbar = tqdm(total=LIMIT, unit="rows", desc="💾 Saving")
-        count = 0
-        BATCH_SIZE = 10000
-        
-        while True:
-            rows = cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-                
-            # Insert into the flattened table
-            # Validates that the number of ? matches the table columns
-            dst.executemany("INSERT INTO dev_tracks VALUES (?,?,?,?,?,?,?,?,?,?)", rows)
-            dst.commit()
-            
-            count += len(rows)
-            pbar.update(len(rows))
-            
-        pbar.close()
+        count = extract_sharded(SOURCE_DB, dst, LIMIT, DEV_DB_WORKERS)
+
         print(f"\n🏁 DONE! Created {TARGET_DB} with {count} rows.")
         print(f"   Schema includes: [id, name, artist, album, popularity, audio_features...]")
         print(f"⏱️  Total time: {round((time.time() - start_time)/60, 1)} minutes.")
@@ -150,7 +222,6 @@ def create_dev_db():
         import traceback
         traceback.print_exc()
     finally:
-        src.close()
         dst.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,286 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import polars as pl
+import psycopg
+from psycopg.sql import SQL, Literal
+from dotenv import load_dotenv
+
+try:
+    from scripts.etl.parallel_copy import INGEST_WORKERS, run_partitions, print_summary
+except ImportError:
+    # Running as a script from within scripts/etl
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from parallel_copy import INGEST_WORKERS, run_partitions, print_summary
+
+"""
+Script: export_tracks.py
+Description:
+    Streams the tracks table out of Postgres in constant memory, for the full
+    catalog (export_to_json.py only writes the top 5000 as one JSON document).
+
+    Rows are read through a server-side (named) cursor, EXPORT_BATCH rows per
+    fetch, turned into a Polars frame and written straight away:
+
+    ndjson   one JSON object per line; a single file (or "-" for stdout) with
+             one worker, part files in a directory otherwise
+    parquet  one file per batch in a directory; with --partition-by COLUMN
+             in hive directories (COLUMN=value/), readable with
+             pl.scan_parquet(..., hive_partitioning=True)
+    ipc      Arrow IPC files, one per batch (pl.scan_ipc / pyarrow.dataset)
+
+    --columns picks columns, --filter adds `COLUMN OP VALUE` conditions
+    (=, !=, <, <=, >, >=; values are bound parameters) and --limit caps a
+    single-worker export.
+
+    With --workers N the table is split into N ranges of heap pages (ctid
+    ranges, read with TID range scans) exported by N processes. They all
+    read the same exported snapshot, so the parts add up to one consistent
+    copy of the table even while it is being written to.
+
+    The output directory gets a _manifest.json with the row count, columns
+    and filters.
+
+Usage:
+    python backend/scripts/etl/export_tracks.py --format ndjson --output tracks.ndjson
+    python backend/scripts/etl/export_tracks.py --format parquet --output export/ --workers 8 --partition-by genre
+    python backend/scripts/etl/export_tracks.py --format ipc --output export/ --columns track_id,name,artist \
+        --filter "popularity>=50"
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "50000"))
+FORMATS = {"ndjson": ".ndjson", "parquet": ".parquet", "ipc": ".arrow"}
+
+# Postgres type -> Polars dtype; anything else (vector, timestamps, ...) is exported as text
+PG_TYPES = {
+    "text": pl.Utf8, "character varying": pl.Utf8, "integer": pl.Int64, "bigint": pl.Int64,
+    "smallint": pl.Int64, "double precision": pl.Float64, "real": pl.Float64, "numeric": pl.Float64,
+    "boolean": pl.Boolean,
+}
+FILTER_RE = re.compile(r"^\s*(\w+)\s*(>=|<=|!=|=|<|>)\s*(.*?)\s*$")
+HIVE_NULL = "__HIVE_DEFAULT_PARTITION__"
+# Characters Hive percent-encodes in partition directory names (FileUtils.escapePathName)
+HIVE_UNSAFE = set('"#%\'*/:=?\\{[]^') | {chr(c) for c in range(0x20)} | {"\x7f"}
+
+
+# ==================== QUERY ====================
+
+def table_columns(conn, table: str = "tracks") -> dict:
+    """{column: Postgres type} of `table`, in table order."""
+    rows = conn.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position", (table,)
+    ).fetchall()
+    return dict(rows)
+
+
+def parse_filter(expression: str, columns: dict) -> Tuple[str, object]:
+    """'popularity>=50' -> ('popularity >= %s', 50). Only known columns are accepted."""
+    match = FILTER_RE.match(expression)
+    if not match:
+        raise ValueError(f"Bad filter {expression!r}, expected COLUMN OP VALUE")
+    column, op, value = match.groups()
+    if column not in columns:
+        raise ValueError(f"Unknown column in filter: {column}")
+    dtype = PG_TYPES.get(columns[column], pl.Utf8)
+    if dtype == pl.Int64:
+        value = int(value)
+    elif dtype == pl.Float64:
+        value = float(value)
+    return f"{column} {op} %s", value
+
+
+def build_spec(columns: dict, selected: Optional[Sequence[str]] = None, filters: Sequence[str] = (),
+               limit: Optional[int] = None, partition_by: Optional[str] = None) -> dict:
+    """The query of an export: its columns / schema and WHERE clause, as a picklable dict for the workers."""
+    selected = list(selected) if selected else [c for c, t in columns.items() if t != "USER-DEFINED"]
+    unknown = [c for c in selected if c not in columns]
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+    if partition_by and partition_by not in selected:
+        raise ValueError(f"--partition-by {partition_by} must be one of the exported columns")
+    conditions = [parse_filter(f, columns) for f in filters]
+    return {
+        "select": ", ".join(c if columns[c] in PG_TYPES else f"{c}::text AS {c}" for c in selected),
+        "schema": {c: PG_TYPES.get(columns[c], pl.Utf8) for c in selected},
+        "where": [sql for sql, _ in conditions],
+        "params": [value for _, value in conditions],
+        "limit": limit,
+        "partition_by": partition_by,
+        "filters": list(filters),
+    }
+
+
+def range_query(spec: dict, bounds: Optional[Tuple[int, Optional[int]]] = None) -> Tuple[str, list]:
+    """The SELECT for one export range: heap pages [first, last) of tracks (None = the whole table)."""
+    where, params = list(spec["where"]), list(spec["params"])
+    if bounds is not None:
+        first, last = bounds
+        where.append("ctid >= %s::tid")
+        params.append(f"({first},0)")
+        if last is not None:
+            where.append("ctid < %s::tid")
+            params.append(f"({last},0)")
+    sql = f"SELECT {spec['select']} FROM tracks"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if spec["limit"]:
+        sql += f" LIMIT {int(spec['limit'])}"
+    return sql, params
+
+
+def page_ranges(pages: int, parts: int) -> List[Tuple[int, Optional[int]]]:
+    """[first, last) heap page ranges splitting `pages` into `parts`; the last one is open-ended."""
+    parts = max(1, min(parts, pages or 1))
+    size = -(-max(pages, 1) // parts)
+    bounds = [(start, start + size) for start in range(0, size * parts, size)]
+    bounds[-1] = (bounds[-1][0], None)  # rows appended past the current end still belong to a range
+    return bounds
+
+
+# ==================== WRITE ====================
+
+def hive_partition_value(value) -> str:
+    """A partition value as a directory name: percent-encoded the Hive way, so "AC/DC" or "../x" stay one level."""
+    if value is None or value == "":
+        return HIVE_NULL
+    return "".join(f"%{ord(c):02X}" if c in HIVE_UNSAFE else c for c in str(value))
+
+
+def write_batch(df: pl.DataFrame, fmt: str, output: str, name: str, partition_by: Optional[str] = None):
+    """Writes one batch of a parquet / ipc export as its own file (under hive directories when partitioned)."""
+    groups = {(None,): df}
+    if partition_by:
+        groups = df.partition_by(partition_by, as_dict=True, include_key=False)
+    for (value,), group in groups.items():
+        directory = output
+        if partition_by:
+            directory = os.path.join(output, f"{partition_by}={hive_partition_value(value)}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name + FORMATS[fmt])
+        if fmt == "parquet":
+            group.write_parquet(path)
+        else:
+            group.write_ipc(path)
+
+
+def export_range(task) -> int:
+    """
+    Worker: one range of the export through a named cursor, inside the
+    coordinator's snapshot. Files are named by range and batch, so a retried
+    range overwrites its own output.
+    """
+    dsn, snapshot, spec, fmt, output, part, bounds = task
+    sql, params = range_query(spec, bounds)
+    ndjson = None
+    rows = 0
+    with psycopg.connect(dsn) as conn:
+        conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        conn.read_only = True
+        if snapshot:
+            conn.execute(SQL("SET TRANSACTION SNAPSHOT {}").format(Literal(snapshot)))
+        try:
+            if fmt == "ndjson":
+                ndjson = sys.stdout if output == "-" else open(
+                    output if part is None else os.path.join(output, f"part-{part:05d}.ndjson"), "w", encoding="utf-8")
+            with conn.cursor(name=f"export_{part or 0}") as cur:
+                cur.itersize = EXPORT_BATCH
+                cur.execute(sql, params)
+                batch_no = 0
+                while True:
+                    fetched = cur.fetchmany(EXPORT_BATCH)
+                    if not fetched:
+                        break
+                    df = pl.DataFrame(fetched, schema=spec["schema"], orient="row")
+                    if ndjson is not None:
+                        ndjson.write(df.write_ndjson())
+                    else:
+                        write_batch(df, fmt, output, f"part-{part or 0:05d}-{batch_no:05d}", spec["partition_by"])
+                    rows += df.height
+                    batch_no += 1
+        finally:
+            if ndjson is not None and ndjson is not sys.stdout:
+                ndjson.close()
+    return rows
+
+
+def export_tracks(output: str, fmt: str = "ndjson", columns: Optional[Sequence[str]] = None,
+                  filters: Sequence[str] = (), limit: Optional[int] = None, partition_by: Optional[str] = None,
+                  workers: int = 1, dsn: str = PG_DSN) -> dict:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}, expected one of {', '.join(FORMATS)}")
+    if limit and workers > 1:
+        raise ValueError("--limit needs a single worker")
+    if partition_by and fmt == "ndjson":
+        raise ValueError("--partition-by applies to parquet / ipc exports")
+    start = time.time()
+
+    # The coordinator's transaction pins one snapshot for every worker
+    with psycopg.connect(dsn) as conn:
+        conn.isolation_level = psycopg.IsolationLevel.REPEATABLE_READ
+        conn.read_only = True
+        spec = build_spec(table_columns(conn), columns, filters, limit, partition_by)
+        single_file = fmt == "ndjson" and workers == 1
+        if not single_file:
+            os.makedirs(output, exist_ok=True)
+
+        if workers == 1:
+            rows = export_range((dsn, None, spec, fmt, output, None if single_file else 0, None))
+            summary = {"rows": rows, "failed": []}
+        else:
+            snapshot = conn.execute("SELECT pg_export_snapshot()").fetchone()[0]
+            pages = conn.execute(
+                "SELECT pg_relation_size('tracks') / current_setting('block_size')::int"
+            ).fetchone()[0]
+            ranges = page_ranges(pages, workers)
+            print(f"⚡ Exporting {pages:,} heap pages in {len(ranges)} ranges with {workers} workers...", file=sys.stderr)
+            summary = run_partitions(
+                export_range, [(dsn, snapshot, spec, fmt, output, i, b) for i, b in enumerate(ranges)],
+                workers=workers, processes=True, key=lambda task: f"pages {task[6][0]}-{task[6][1] or 'end'}",
+            )
+            print_summary(summary)
+            if summary["failed"]:
+                raise RuntimeError(f"{len(summary['failed'])} export ranges failed")
+
+    manifest = {
+        "format": fmt,
+        "rows": summary["rows"],
+        "columns": list(spec["schema"]),
+        "filters": spec["filters"],
+        "partition_by": partition_by,
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    if not single_file:
+        with open(os.path.join(output, "_manifest.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+    print(f"🏁 Exported {summary['rows']:,} tracks in {time.time() - start:.1f}s", file=sys.stderr)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the tracks table to NDJSON, Parquet or Arrow IPC.")
+    parser.add_argument("--output", required=True, help='File (ndjson, one worker; "-" for stdout) or directory')
+    parser.add_argument("--format", default="ndjson", choices=list(FORMATS))
+    parser.add_argument("--columns", help="Comma-separated columns (default: all but vectors)")
+    parser.add_argument("--filter", action="append", default=[], metavar="EXPR",
+                        help='A condition like "popularity>=50" (repeatable)')
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--partition-by", metavar="COLUMN")
+    parser.add_argument("--workers", type=int, default=1, help=f"Parallel range exports (e.g. {INGEST_WORKERS})")
+    args = parser.parse_args()
+    try:
+        export_tracks(args.output, args.format, args.columns.split(",") if args.columns else None,
+                      args.filter, args.limit, args.partition_by, args.workers)
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
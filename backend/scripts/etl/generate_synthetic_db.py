@@ -0,0 +1,332 @@
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+
+"""
+Script: generate_synthetic_db.py
+Description:
+    Generates a synthetic SQLite database with the same normalised schema as the
+    ~5GB `spotify.sqlite` source, at any scale, so the seeders (`seed.py`,
+    `dev_seed.py`, `create_dev_db.py`) and the ETL / serving benchmarks can run
+    without the real file.
+
+    Tables (same names and columns as the source):
+    - tracks, artists, albums, audio_features, genres
+    - r_track_artist, r_albums_tracks, r_albums_artists, r_artist_genre
+
+    The data is deterministic for a given (tracks, seed) and shaped like the real
+    catalogue:
+    - Zipfian artist sizes (a few artists own many tracks) and Zipfian play counts
+      mapped to Spotify's 0-100 popularity,
+    - ~10% of tracks credit a second artist,
+    - audio features clustered around per-artist "sound" centres,
+    - one main genre per artist (the one benchmarks/dataset.py gives its tracks),
+      and a second one for ~25% of artists.
+
+    Rows are generated column-wise with NumPy in fixed-size chunks (each with its
+    own RNG stream) and written with executemany inside one transaction per chunk,
+    with journaling off. Indexes are created once at the end. 8M tracks take a few
+    minutes.
+
+Usage:
+    python backend/scripts/etl/generate_synthetic_db.py --tracks 100000
+    python backend/scripts/etl/generate_synthetic_db.py --tracks 8000000 --output backend/spotify.sqlite
+"""
+
+DEFAULT_OUTPUT = "backend/spotify_synthetic.sqlite"
+
+# Generation happens in fixed-size chunks, each with its own RNG stream, so the
+# output does not depend on memory settings.
+CHUNK_SIZE = 200_000
+N_SOUND_CLUSTERS = 64
+TRACKS_PER_ARTIST = 12
+ALBUMS_PER_ARTIST = 4
+SECOND_ARTIST_RATE = 0.10
+SECOND_GENRE_RATE = 0.25
+
+WORDS = [
+    "love", "night", "dream", "fire", "heart", "blue", "summer", "rain", "city", "light",
+    "dance", "gold", "shadow", "river", "star", "wild", "ghost", "echo", "storm", "neon",
+    "midnight", "ocean", "velvet", "paper", "silver", "sugar", "electric", "broken", "lost", "home",
+]
+GENRES = [
+    "pop", "rock", "hip hop", "electronic", "indie", "jazz", "classical", "metal", "r&b", "country",
+    "ambient", "folk", "latin", "house", "techno", "soul", "punk", "reggae", "blues", "k-pop",
+]
+ALBUM_TYPES = ["album", "single", "compilation"]
+
+BASE62 = np.array(list("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+# Entity tags mixed into ids so tracks / artists / albums never collide
+TRACK, ARTIST, ALBUM = 0, 1, 2
+
+SCHEMA = """
+    CREATE TABLE tracks (
+        id TEXT, disc_number INTEGER, duration INTEGER, explicit INTEGER,
+        audio_feature_id TEXT, name TEXT, preview_url TEXT, track_number INTEGER,
+        popularity INTEGER, is_playable INTEGER
+    );
+    CREATE TABLE artists (
+        name TEXT, id TEXT, popularity INTEGER, followers INTEGER
+    );
+    CREATE TABLE albums (
+        id TEXT, name TEXT, album_group TEXT, album_type TEXT,
+        release_date INTEGER, popularity INTEGER
+    );
+    CREATE TABLE audio_features (
+        id TEXT, acousticness REAL, analysis_url TEXT, danceability REAL, duration INTEGER,
+        energy REAL, instrumentalness REAL, key INTEGER, liveness REAL, loudness REAL,
+        mode INTEGER, speechiness REAL, tempo REAL, time_signature INTEGER, valence REAL
+    );
+    CREATE TABLE r_track_artist (track_id TEXT, artist_id TEXT);
+    CREATE TABLE r_albums_tracks (album_id TEXT, track_id TEXT);
+    CREATE TABLE r_albums_artists (album_id TEXT, artist_id TEXT);
+    CREATE TABLE genres (id TEXT);
+    CREATE TABLE r_artist_genre (genre_id TEXT, artist_id TEXT);
+"""
+
+# Same indexes optimize_db.py creates on the real file
+INDEXES = [
+    ("idx_tracks_id", "tracks", "id"),
+    ("idx_tracks_audio_feature", "tracks", "audio_feature_id"),
+    ("idx_rta_track", "r_track_artist", "track_id"),
+    ("idx_rta_artist", "r_track_artist", "artist_id"),
+    ("idx_rat_track", "r_albums_tracks", "track_id"),
+    ("idx_rat_album", "r_albums_tracks", "album_id"),
+    ("idx_raa_album", "r_albums_artists", "album_id"),
+    ("idx_artists_id", "artists", "id"),
+    ("idx_rag_artist", "r_artist_genre", "artist_id"),
+    ("idx_albums_id", "albums", "id"),
+    ("idx_audio_features_id", "audio_features", "id"),
+    ("idx_tracks_name", "tracks", "name"),
+    ("idx_artists_name", "artists", "name"),
+]
+
+
+# ==================== SAMPLERS ====================
+# Shared with benchmarks/dataset.py so the SQLite source and the Postgres
+# benchmark catalogue have the same shape.
+
+def sound_centres(seed: int) -> np.ndarray:
+    """Cluster centres in the 5-d normalised feature space."""
+    return np.random.default_rng([seed, 0]).random((N_SOUND_CLUSTERS, 5))
+
+
+def sample_artists(rng: np.random.Generator, n: int, n_artists: int) -> np.ndarray:
+    """Heavy-tailed artist sizes: low artist indexes own most tracks."""
+    return (rng.zipf(1.3, n) - 1) % n_artists
+
+
+def sample_popularity(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Zipfian play counts mapped to Spotify's log-like 0-100 popularity (median ~13, ~5% >= 70)."""
+    plays = rng.zipf(1.3, n)
+    return np.minimum(np.round(100 * np.log(plays) / np.log(1e6)), 100).astype(np.int64)
+
+
+def sample_features(rng: np.random.Generator, centres: np.ndarray, artist_idx: np.ndarray) -> np.ndarray:
+    """
+    The 5 embedding features (danceability, energy, valence, tempo / 250,
+    acousticness) scattered around the artist's sound centre.
+    """
+    features = centres[artist_idx % len(centres)] + rng.normal(0, 0.08, (len(artist_idx), 5))
+    return np.clip(features, 0.0, 1.0, out=features)
+
+
+def artist_genres(artist_idx: np.ndarray) -> np.ndarray:
+    """Index into GENRES of each artist's main genre."""
+    return (artist_idx * 7) % len(GENRES)
+
+
+def sample_titles(rng: np.random.Generator, n: int) -> np.ndarray:
+    words = np.array(WORDS, dtype=object)
+    return words[rng.integers(0, len(WORDS), n)] + " " + words[rng.integers(0, len(WORDS), n)]
+
+
+def artist_names(artist_idx: np.ndarray) -> np.ndarray:
+    """Unique, comma-free artist names (seeders split multi-artist strings on ',')."""
+    return np.char.add("artist ", artist_idx.astype(str)).astype(object)
+
+
+def spotify_ids(kind: int, idx: np.ndarray) -> np.ndarray:
+    """
+    Deterministic, unique 22-char base62 ids (Spotify's format).
+
+    The first 11 chars are a hash (so ids don't sort by insertion order), the
+    last 11 encode (idx, kind), which keeps them unique.
+    """
+    key = idx.astype(np.uint64) * np.uint64(4) + np.uint64(kind)
+    # splitmix64 finaliser
+    h = key + np.uint64(0x9E3779B97F4A7C15)
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    h = h ^ (h >> np.uint64(31))
+
+    digits = np.empty((len(idx), 22), dtype=np.int64)
+    for pos, value in ((0, h), (11, key)):
+        v = value.copy()
+        for i in range(10, -1, -1):
+            digits[:, pos + i] = (v % np.uint64(62)).astype(np.int64)
+            v //= np.uint64(62)
+    return np.ascontiguousarray(BASE62[digits]).view("<U22").ravel()
+
+
+# ==================== GENERATORS ====================
+
+def generate_track_chunk(seed: int, chunk_idx: int, start: int, n: int, n_artists: int, centres: np.ndarray) -> dict:
+    """Generates `n` tracks starting at global row `start`, as rows per table."""
+    rng = np.random.default_rng([seed, 1, chunk_idx])
+    idx = np.arange(start, start + n)
+    artist_idx = sample_artists(rng, n, n_artists)
+    album_idx = artist_idx * ALBUMS_PER_ARTIST + rng.integers(0, ALBUMS_PER_ARTIST, n)
+
+    track_ids = spotify_ids(TRACK, idx)
+    artist_ids = spotify_ids(ARTIST, artist_idx)
+    album_ids = spotify_ids(ALBUM, album_idx)
+
+    f = sample_features(rng, centres, artist_idx)
+    duration = np.clip(rng.normal(215_000, 60_000, n), 30_000, 1_200_000).astype(np.int64)
+    popularity = sample_popularity(rng, n)
+    tids = track_ids.tolist()
+    explicit = (rng.random(n) < 0.12).astype(np.int64)
+    track_number = rng.integers(1, 15, n)
+
+    tracks = list(zip(
+        tids, np.ones(n, dtype=np.int64).tolist(), duration.tolist(), explicit.tolist(),
+        tids, sample_titles(rng, n).tolist(), [None] * n, track_number.tolist(),
+        popularity.tolist(), np.ones(n, dtype=np.int64).tolist(),
+    ))
+
+    analysis_urls = np.char.add("https://api.spotify.com/v1/audio-analysis/", track_ids)
+    audio_features = list(zip(
+        tids,
+        np.round(f[:, 4], 4).tolist(),
+        analysis_urls.tolist(),
+        np.round(f[:, 0], 4).tolist(),
+        duration.tolist(),
+        np.round(f[:, 1], 4).tolist(),
+        np.round(rng.beta(0.5, 2.0, n), 4).tolist(),
+        rng.integers(0, 12, n).tolist(),
+        np.round(rng.beta(1.5, 6.0, n), 4).tolist(),
+        np.round(-60 + 55 * f[:, 1] + rng.normal(0, 3, n), 3).tolist(),
+        (rng.random(n) < 0.65).astype(np.int64).tolist(),
+        np.round(rng.beta(1.2, 12.0, n), 4).tolist(),
+        np.round(f[:, 3] * 250.0, 3).tolist(),
+        rng.choice([3, 4, 5], n, p=[0.08, 0.88, 0.04]).tolist(),
+        np.round(f[:, 2], 4).tolist(),
+    ))
+
+    track_artists = list(zip(tids, artist_ids.tolist()))
+    second = rng.random(n) < SECOND_ARTIST_RATE
+    second_artist = rng.integers(0, n_artists, n)[second]
+    second_artist = np.where(second_artist == artist_idx[second], (second_artist + 1) % n_artists, second_artist)
+    if n_artists > 1:
+        track_artists += list(zip(track_ids[second].tolist(), spotify_ids(ARTIST, second_artist).tolist()))
+
+    album_tracks = list(zip(album_ids.tolist(), tids))
+
+    return {
+        "tracks": tracks,
+        "audio_features": audio_features,
+        "r_track_artist": track_artists,
+        "r_albums_tracks": album_tracks,
+    }
+
+
+def generate_artist_chunk(seed: int, chunk_idx: int, start: int, n: int) -> dict:
+    """Artists and their albums (ALBUMS_PER_ARTIST each) for artist rows [start, start + n)."""
+    rng = np.random.default_rng([seed, 2, chunk_idx])
+    artist_idx = np.arange(start, start + n)
+    artist_ids = spotify_ids(ARTIST, artist_idx)
+
+    # Prolific (low-index) artists are also the popular ones
+    artist_pop = np.clip(np.round(85 - 9 * np.log1p(artist_idx) + rng.normal(0, 6, n)), 0, 100).astype(np.int64)
+    followers = np.round(np.exp(artist_pop / 8.0) * rng.lognormal(0, 1, n)).astype(np.int64)
+    artists = list(zip(artist_names(artist_idx).tolist(), artist_ids.tolist(), artist_pop.tolist(), followers.tolist()))
+
+    album_idx = np.arange(start * ALBUMS_PER_ARTIST, (start + n) * ALBUMS_PER_ARTIST)
+    m = len(album_idx)
+    album_ids = spotify_ids(ALBUM, album_idx)
+    album_type = np.array(ALBUM_TYPES, dtype=object)[rng.choice(3, m, p=[0.55, 0.40, 0.05])]
+    # Unix timestamps in ms between 1960 and 2023, skewed towards recent years
+    release = (-315_619_200 + (1_672_531_200 + 315_619_200) * rng.beta(4.0, 1.5, m)).astype(np.int64) * 1000
+    album_pop = np.clip(np.repeat(artist_pop, ALBUMS_PER_ARTIST) + rng.normal(-5, 8, m), 0, 100).astype(np.int64)
+    albums = list(zip(
+        album_ids.tolist(), sample_titles(rng, m).tolist(), album_type.tolist(), album_type.tolist(),
+        release.tolist(), album_pop.tolist(),
+    ))
+    album_artists = list(zip(album_ids.tolist(), np.repeat(artist_ids, ALBUMS_PER_ARTIST).tolist()))
+
+    # Genre ids are the genre names, as in the source
+    genres = np.array(GENRES, dtype=object)
+    main = artist_genres(artist_idx)
+    second = rng.random(n) < SECOND_GENRE_RATE
+    other = (main[second] + rng.integers(1, len(GENRES), second.sum())) % len(GENRES)
+    artist_genre = list(zip(genres[main].tolist(), artist_ids.tolist()))
+    artist_genre += list(zip(genres[other].tolist(), artist_ids[second].tolist()))
+
+    return {"artists": artists, "albums": albums, "r_albums_artists": album_artists, "r_artist_genre": artist_genre}
+
+
+def insert_rows(conn, tables: dict):
+    for table, rows in tables.items():
+        if rows:
+            placeholders = ",".join("?" * len(rows[0]))
+            conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+
+def generate_database(output: str, total_tracks: int, seed: int = 42, create_indexes: bool = True):
+    if os.path.exists(output):
+        print(f"⚠️  '{output}' already exists. Overwriting...")
+        os.remove(output)
+
+    n_artists = max(total_tracks // TRACKS_PER_ARTIST, 1)
+    print(f"🧪 Generating {total_tracks:,} tracks, {n_artists:,} artists, {n_artists * ALBUMS_PER_ARTIST:,} albums -> {output}")
+    start_time = time.time()
+
+    conn = sqlite3.connect(output)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    conn.executescript(SCHEMA)
+    with conn:
+        insert_rows(conn, {"genres": [(genre,) for genre in GENRES]})
+
+    try:
+        artist_chunk = max(CHUNK_SIZE // ALBUMS_PER_ARTIST, 1)
+        for chunk_idx, start in enumerate(range(0, n_artists, artist_chunk)):
+            with conn:
+                insert_rows(conn, generate_artist_chunk(seed, chunk_idx, start, min(artist_chunk, n_artists - start)))
+        print(f"   🎤 Artists & albums done ({time.time() - start_time:.1f}s)")
+
+        centres = sound_centres(seed)
+        loaded = 0
+        for chunk_idx, start in enumerate(range(0, total_tracks, CHUNK_SIZE)):
+            n = min(CHUNK_SIZE, total_tracks - start)
+            with conn:
+                insert_rows(conn, generate_track_chunk(seed, chunk_idx, start, n, n_artists, centres))
+            loaded += n
+            rate = loaded / max(time.time() - start_time, 1e-9)
+            print(f"   🎵 {loaded:,}/{total_tracks:,} tracks ({rate:,.0f} tracks/s)", flush=True)
+
+        if create_indexes:
+            print("📇 Creating indexes...")
+            for idx_name, table, column in INDEXES:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {idx_name} ON {table} ({column})")
+            conn.execute("ANALYZE")
+            conn.commit()
+    finally:
+        conn.close()
+
+    print(f"✅ Done in {(time.time() - start_time) / 60:.1f} minutes.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic spotify.sqlite-shaped database.")
+    parser.add_argument("--tracks", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--no-indexes", action="store_true", help="Skip index creation (faster, slower JOINs)")
+    args = parser.parse_args()
+    generate_database(args.output, args.tracks, args.seed, create_indexes=not args.no_indexes)
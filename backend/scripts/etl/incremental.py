@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+import polars as pl
+import psycopg
+from dotenv import load_dotenv
+
+# Allow `scripts.etl...` imports when run as a script from the project root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from scripts.etl.centroids import (
+    ensure_artist_centroid_schema, link_new_album_tracks, rebuild_artist_centroids, update_artist_centroids,
+    refresh_album_centroids,
+)
+from scripts.etl.ingest_data import COPY_TRACKS_SQL, format_copy_block, process_data
+
+"""
+Script: incremental.py
+Description:
+    Incremental refresh of `tracks` from a new dataset snapshot. Only rows that
+    actually changed are written, so there is no full reload / index rebuild.
+
+    1. The processed frame is COPYed into a staging table.
+    2. Each row's content hash (md5 of its data columns, computed by Postgres
+       so it is stable across clients) is compared with `tracks.content_hash`:
+         insert  id not in tracks
+         update  id in tracks, hash differs
+         delete  id in tracks but not in the snapshot (only with --delete-missing,
+                 i.e. when the snapshot is the complete catalogue)
+    3. The changes are applied in one transaction: DELETE, then
+       INSERT ... ON CONFLICT (track_id) DO UPDATE for inserts + updates.
+    4. Dependents get exactly the changed ids:
+       - artist centroids: changed / deleted tracks are folded out (-1) before
+         the write and inserted / updated ones folded in (+1) after;
+       - album centroids: albums linked to changed tracks are recomputed;
+       - `track_changes`: one row per (run_id, track_id, op), and a
+         `pg_notify('track_changes', {"run_id", counts})` on commit. The API
+         listens and evicts those ids from its caches (app/change_listener.py).
+
+Usage:
+    python backend/scripts/etl/incremental.py path/to/tracks.csv
+    python backend/scripts/etl/incremental.py path/to/tracks.csv --delete-missing
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+
+CHANGES_CHANNEL = "track_changes"
+STAGE_TABLE = "_stage_tracks"
+DATA_COLUMNS = ["name", "artist", "danceability", "energy", "valence", "tempo", "acousticness", "audio_embedding"]
+
+
+def content_hash(alias: str) -> str:
+    return "md5(ROW({})::text)".format(", ".join(f"{alias}.{c}" for c in DATA_COLUMNS))
+
+
+def upsert_sql() -> str:
+    """Inserts / overwrites the staged rows marked insert or update in `_changes`, with their new hash."""
+    return f"""
+        INSERT INTO tracks (track_id, {", ".join(DATA_COLUMNS)}, content_hash)
+        SELECT s.track_id, {", ".join(f"s.{c}" for c in DATA_COLUMNS)}, {content_hash('s')}
+        FROM {STAGE_TABLE} s
+        JOIN _changes c ON c.track_id = s.track_id AND c.op IN ('insert', 'update')
+        ON CONFLICT (track_id) DO UPDATE SET
+            {", ".join(f"{c} = EXCLUDED.{c}" for c in DATA_COLUMNS)},
+            content_hash = EXCLUDED.content_hash
+    """
+
+
+def ensure_incremental_schema(conn):
+    # Only ingest_data.init_db creates artist_centroids; the other seeders leave it
+    # missing, and a table created here is built in full once before updates apply
+    has_centroids = conn.execute("SELECT to_regclass('artist_centroids')").fetchone()[0] is not None
+    ensure_artist_centroid_schema(conn)
+    if not has_centroids:
+        rebuild_artist_centroids(conn)
+    conn.execute("ALTER TABLE tracks ADD COLUMN IF NOT EXISTS content_hash TEXT")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS track_changes (
+            change_id BIGSERIAL PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            track_id TEXT NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_track_changes_run ON track_changes (run_id)")
+    # Rows loaded by the full seeders have no hash yet; backfill once so they are not all "updates"
+    conn.execute(f"UPDATE tracks t SET content_hash = {content_hash('t')} WHERE t.content_hash IS NULL")
+
+
+def stage_snapshot(conn, df: pl.DataFrame):
+    conn.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+            track_id TEXT PRIMARY KEY, name TEXT, artist TEXT, danceability FLOAT, energy FLOAT,
+            valence FLOAT, tempo FLOAT, acousticness FLOAT, audio_embedding VECTOR(5)
+        ) ON COMMIT DROP
+    """)
+    with conn.cursor() as cur:
+        with cur.copy(COPY_TRACKS_SQL.format(table=STAGE_TABLE)) as copy:
+            copy.write(format_copy_block(df))
+    conn.execute(f"ANALYZE {STAGE_TABLE}")
+
+
+def diff_snapshot(conn, delete_missing: bool) -> dict:
+    """Fills the `_changes` temp table and returns {op: [track_id, ...]}."""
+    conn.execute("CREATE TEMP TABLE _changes (track_id TEXT PRIMARY KEY, op TEXT NOT NULL) ON COMMIT DROP")
+    conn.execute(f"""
+        INSERT INTO _changes (track_id, op)
+        SELECT s.track_id, CASE WHEN t.track_id IS NULL THEN 'insert' ELSE 'update' END
+        FROM {STAGE_TABLE} s
+        LEFT JOIN tracks t ON t.track_id = s.track_id
+        WHERE t.track_id IS NULL OR t.content_hash IS DISTINCT FROM {content_hash('s')}
+    """)
+    if delete_missing:
+        conn.execute(f"""
+            INSERT INTO _changes (track_id, op)
+            SELECT t.track_id, 'delete'
+            FROM tracks t
+            WHERE NOT EXISTS (SELECT 1 FROM {STAGE_TABLE} s WHERE s.track_id = t.track_id)
+        """)
+    changes = {"insert": [], "update": [], "delete": []}
+    for track_id, op in conn.execute("SELECT track_id, op FROM _changes"):
+        changes[op].append(track_id)
+    return changes
+
+
+def _linked_albums(conn, track_ids) -> list:
+    if not track_ids or conn.execute("SELECT to_regclass('album_tracks')").fetchone()[0] is None:
+        return []
+    return [r[0] for r in conn.execute(
+        "SELECT DISTINCT album_id FROM album_tracks WHERE track_id = ANY(%s)", (track_ids,)
+    )]
+
+
+def apply_changes(conn, changes: dict, run_id: str):
+    """Writes the diff and updates everything derived from the changed rows."""
+    removed = changes["update"] + changes["delete"]
+    written = changes["insert"] + changes["update"]
+    albums = _linked_albums(conn, removed)
+
+    # Fold the old versions out of the artist centroids while they are still readable
+    update_artist_centroids(conn, removed, sign=-1)
+
+    if changes["delete"]:
+        if albums:
+            conn.execute("DELETE FROM album_tracks WHERE track_id = ANY(%s)", (changes["delete"],))
+        conn.execute("DELETE FROM tracks WHERE track_id = ANY(%s)", (changes["delete"],))
+
+    conn.execute(upsert_sql())
+
+    update_artist_centroids(conn, written, sign=1)
+    refresh_album_centroids(conn, albums)
+    # Rows written with an album_id get linked and folded into their album
+    link_new_album_tracks(conn)
+
+    conn.execute("""
+        INSERT INTO track_changes (run_id, track_id, op)
+        SELECT %s, track_id, op FROM _changes
+    """, (run_id,))
+    payload = {"run_id": run_id, **{op: len(ids) for op, ids in changes.items()}}
+    conn.execute("SELECT pg_notify(%s, %s)", (CHANGES_CHANNEL, json.dumps(payload)))
+
+
+def run_incremental(df: pl.DataFrame, delete_missing: bool = False, run_id: str = None) -> dict:
+    run_id = run_id or uuid.uuid4().hex[:12]
+    start = time.time()
+    with psycopg.connect(PG_DSN) as conn:
+        ensure_incremental_schema(conn)
+        conn.commit()
+        print(f"📥 Staging {df.height:,} rows (run {run_id})...")
+        stage_snapshot(conn, df)
+        changes = diff_snapshot(conn, delete_missing)
+        print("🔍 " + ", ".join(f"{len(ids):,} {op}s" for op, ids in changes.items()))
+        if any(changes.values()):
+            apply_changes(conn, changes, run_id)
+        conn.commit()
+    print(f"✅ Incremental run {run_id} done in {time.time() - start:.1f}s")
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply only the changed rows of a new dataset snapshot.")
+    parser.add_argument("csv_path", nargs="?", default=None, help="Snapshot CSV (default: the Kaggle download)")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="Delete tracks absent from the snapshot (it must be the full catalogue)")
+    args = parser.parse_args()
+    try:
+        run_incremental(process_data(args.csv_path), args.delete_missing)
+    except Exception as e:
+        print(f"❌ Error: {e}")
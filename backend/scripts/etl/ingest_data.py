@@ -5,6 +5,18 @@ from dotenv import load_dotenv
 import psycopg
 from pgvector.psycopg import register_vector
 
+try:
+    from scripts.etl.centroids import ensure_artist_centroid_schema, refresh_after_load
+    from scripts.etl.parallel_copy import INGEST_WORKERS, run_partitions, worker_connection, print_summary
+    from scripts.etl.bulk_load import bulk_load
+    from scripts.etl.checkpoints import record_checkpoint, start_run
+except ImportError:
+    # Running as a script from within scripts/etl
+    from centroids import ensure_artist_centroid_schema, refresh_after_load
+    from parallel_copy import INGEST_WORKERS, run_partitions, worker_connection, print_summary
+    from bulk_load import bulk_load
+    from checkpoints import record_checkpoint, start_run
+
 """
 Script: ingest_data.py
 Description:
@@ -15,8 +27,12 @@ Description:
     
     This is the first step in populating the system if starting from scratch.
 
+    Each batch is checkpointed (scripts/etl/checkpoints.py); an interrupted
+    run continues with --resume instead of reloading everything.
+
 Usage:
     python backend/scripts/etl/ingest_data.py
+    python backend/scripts/etl/ingest_data.py --resume
     
     Requirements:
     - KAGGLE_USERNAME and KAGGLE_KEY environment variables.
@@ -62,6 +78,9 @@ def init_db():
             CREATE INDEX IF NOT EXISTS tracks_embedding_idx 
             ON tracks USING hnsw (audio_embedding vector_l2_ops)
         """)
+        
+        # Materialised per-artist centroids, built once the load is done (refresh_after_load)
+        ensure_artist_centroid_schema(conn)
     print("✅ Database Schema Initialized.")
 
 def download_dataset():
@@ -136,66 +155,79 @@ def process_data(csv_path: str = None):
     print(f"✅ Data Processed. Rows: {processed_df.height}")
     return processed_df
 
-def insert_data(df: pl.DataFrame):
+# COPY payloads are built column-wise by Polars (no per-row Python work) and
+# written as one block per batch. Each batch is committed so it is visible
+# while the rest loads. Artist centroids are built once at the end, not per
+# batch: concurrent batches would contend on the same popular-artist rows.
+BATCH_SIZE = 50_000
+COPY_COLUMNS = ["track_id", "name", "artist", "danceability", "energy", "valence", "tempo", "acousticness"]
+EMBEDDING_FEATURES = ["danceability", "energy", "valence", "tempo_norm", "acousticness"]
+COPY_TRACKS_SQL = f"COPY {{table}} ({', '.join(COPY_COLUMNS)}, audio_embedding) FROM STDIN"
+
+def _copy_field(df: pl.DataFrame, col: str) -> pl.Expr:
+    """A column as COPY text: strings escaped, NULL as \\N."""
+    expr = pl.col(col)
+    if df.schema[col] == pl.Utf8:
+        for raw, escaped in (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")):
+            expr = expr.str.replace_all(raw, escaped, literal=True)
+    return expr.cast(pl.Utf8).fill_null("\\N")
+
+def format_copy_block(df: pl.DataFrame, columns: list = COPY_COLUMNS) -> str:
+    """Formats `df` as a COPY text block (`columns` + audio_embedding), one line per row."""
+    if df.height == 0:
+        return ""
+    # pgvector text input: '[0.5,0.8,0.3,0.48,0.1]'
+    embedding = pl.concat_str(
+        [pl.lit("["), pl.concat_str([pl.col(c).cast(pl.Utf8) for c in EMBEDDING_FEATURES], separator=","), pl.lit("]")]
+    ).fill_null("\\N")
+    line = pl.concat_str([_copy_field(df, c) for c in columns] + [embedding], separator="\t")
+    return df.select(line.str.join("\n")).item() + "\n"
+
+def copy_tracks(cur, df: pl.DataFrame, table: str = "tracks", columns: list = COPY_COLUMNS):
+    sql = f"COPY {table} ({', '.join(columns)}, audio_embedding) FROM STDIN"
+    with cur.copy(sql) as copy:
+        copy.write(format_copy_block(df, columns))
+
+def load_partition(batch: pl.DataFrame, run_id: str = None, partition: str = None, last_key=None) -> int:
     """
-    Inserts data into PostgreSQL using high-performance COPY.
+    One batch in one transaction: COPY and, in a checkpointed run, record
+    `partition` as committed up to `last_key` (default: the batch's last track
+    id). Artist centroids are rebuilt after the load (refresh_after_load).
     """
-    print("💾 Starting DB Insert...")
-    
-    # We need to construct the embedding vector for each row
-    # Polars doesn't support 'list of floats' natively well for DB export without some conversion
-
-    print("⚙️  Preparing vectors...")
-    feature_cols = ["danceability", "energy", "valence", "tempo_norm", "acousticness"]
-    
-    rows = df.iter_rows(named=True)
-    
-    count = 0
-    BATCH_SIZE = 10000
-    
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            batch_buffer = []
-            
-            print(f"🔄 Starting Batched Insert (Commit every {BATCH_SIZE} rows)...")
-            
-            for row in rows:
-                # pgvector expects '[1.0,2.0,3.0]' string format for COPY
-                embedding = [row[c] for c in feature_cols]
-                embedding_str = str(embedding)
-                
-                batch_buffer.append((
-                   row["track_id"],
-                    row["name"],
-                    row["artist"],
-                    row["danceability"],
-                    row["energy"],
-                    row["valence"],
-                    row["tempo"], 
-                    row["acousticness"],
-                    embedding_str
-                ))
-                
-                if len(batch_buffer) >= BATCH_SIZE:
-                    with cur.copy("COPY tracks (track_id, name, artist, danceability, energy, valence, tempo, acousticness, audio_embedding) FROM STDIN") as copy:
-                        for item in batch_buffer:
-                            copy.write_row(item)
-                    conn.commit() # <--- Commit this batch so it's visible!
-                    count += len(batch_buffer)
-                    print(f"   ✅ Committed {count} rows...")
-                    batch_buffer = []
-
-            # Insert remaining
-            if batch_buffer:
-                with cur.copy("COPY tracks (track_id, name, artist, danceability, energy, valence, tempo, acousticness, audio_embedding) FROM STDIN") as copy:
-                        for item in batch_buffer:
-                            copy.write_row(item)
-                conn.commit()
-                count += len(batch_buffer)
-
-    print(f"✅ Insertion Complete. Total: {count}")
+    conn = worker_connection(DB_CONN_STRING)
+    with conn.cursor() as cur:
+        copy_tracks(cur, batch)
+    record_checkpoint(conn, run_id, partition, last_key or batch["track_id"][-1], batch.height)
+    conn.commit() # <--- Commit this batch so it's visible!
+    return batch.height
+
+def insert_data(df: pl.DataFrame, workers: int = INGEST_WORKERS, run=None):
+    """
+    Inserts data into PostgreSQL using high-performance COPY, over `workers`
+    concurrent connections (one batch per transaction, retried on failure).
+    With a checkpointed `run`, batches it already committed are skipped.
+    """
+    run_id = run.run_id if run else None
+    if run:
+        # Batch boundaries must be the same on every attempt of the run
+        df = df.sort("track_id")
+    batches = [(f"offset {offset}", df.slice(offset, BATCH_SIZE)) for offset in range(0, df.height, BATCH_SIZE)]
+    if run:
+        batches = run.pending(batches, key=lambda b: b[0])
+    print(f"💾 Starting DB Insert ({workers} workers, {BATCH_SIZE} rows per batch)...")
+    summary = run_partitions(lambda b: load_partition(b[1], run_id, b[0]), batches,
+                             workers=workers, key=lambda b: b[0])
+    print_summary(summary)
+    if run:
+        run.finish(summary)
+    return summary
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Download, clean and load the Kaggle tracks dataset.")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                        help="Resume the latest unfinished run (or RUN_ID) from its checkpoints")
+    args = parser.parse_args()
     try:
         # 1. Setup DB
         try:
@@ -212,8 +244,11 @@ if __name__ == "__main__":
         # 3. Process Data
         df = process_data()
         
-        # 4. Insert Data
-        insert_data(df)
+        # 4. Insert Data (indexes deferred and rebuilt afterwards, see bulk_load.py)
+        run = start_run(DB_CONN_STRING, "ingest", resume=args.resume, table="tracks")
+        with bulk_load(DB_CONN_STRING, "tracks"):
+            insert_data(df, run=run)
+        refresh_after_load(DB_CONN_STRING)
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -0,0 +1,178 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+import psycopg
+
+"""
+Script: parallel_copy.py
+Description:
+    Runs a bulk load as N concurrent COPY streams instead of one.
+
+    A single psycopg connection keeps one Postgres backend (one core) busy,
+    however fast the client is. Here the input is split into partitions (slices
+    of a processed frame, or rowid ranges of the SQLite source) and each worker
+    loads its partitions over its own connection:
+
+    - every partition is one transaction (COPY + any follow-up such as the
+      centroid update, then COMMIT), so a failed attempt leaves nothing behind
+      and is simply retried, with backoff, up to `retries` times;
+    - deadlocks between partitions (e.g. two updating the same artist centroid)
+      surface as errors and are retried the same way;
+    - partitions that still fail are reported by key at the end, the rest of
+      the load carries on.
+
+    Progress is printed as partitions finish; the summary has per-worker rows,
+    busy time and throughput.
+
+    Threads suit loaders whose heavy lifting releases the GIL (Polars
+    formatting, network I/O). Loaders that build Python rows (e.g. reading
+    SQLite) should use processes; their load function and partitions must
+    then be picklable (module-level function, plain tuples). Worker processes
+    are spawned, not forked: a fork of a process whose Polars thread pool is
+    already running can deadlock in the child.
+
+Usage (from a seeder):
+    summary = run_partitions(load_range, rowid_ranges(SQLITE_DB, "tracks", 100_000),
+                             workers=4, processes=True)
+"""
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+INGEST_RETRIES = int(os.getenv("INGEST_RETRIES", "3"))
+RETRY_BACKOFF_S = 0.5
+
+_local = threading.local()
+_opened: List[psycopg.Connection] = []
+_opened_lock = threading.Lock()
+
+
+def worker_connection(dsn: str) -> psycopg.Connection:
+    """This worker's connection (one per thread / process), reopened after a failure."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or conn.closed:
+        conn = _local.conn = psycopg.connect(dsn)
+        with _opened_lock:
+            _opened.append(conn)
+    return conn
+
+
+def close_worker_connections():
+    """Closes every worker connection opened in this process."""
+    with _opened_lock:
+        for conn in _opened:
+            if not conn.closed:
+                conn.close()
+        _opened.clear()
+
+
+def discard_worker_connection():
+    """Drops this worker's connection after an error so the retry starts clean."""
+    conn = getattr(_local, "conn", None)
+    _local.conn = None
+    if conn is not None and not conn.closed:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def rowid_ranges(sqlite_path: str, table: str, size: int) -> List[Tuple[int, int]]:
+    """[(first, last)] rowid ranges covering `table`, `size` rowids each."""
+    import sqlite3
+
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    finally:
+        conn.close()
+    if low is None:
+        return []
+    return [(start, min(start + size - 1, high)) for start in range(low, high + 1, size)]
+
+
+def _load_with_retry(load: Callable, partition, retries: int) -> dict:
+    """Runs in the worker: loads one partition, retrying failed attempts."""
+    worker = f"{os.getpid()}/{threading.current_thread().name}"
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        try:
+            rows = load(partition)
+            return {"worker": worker, "rows": rows, "seconds": time.perf_counter() - start,
+                    "attempts": attempt + 1, "error": None}
+        except Exception as e:
+            discard_worker_connection()
+            error = f"{type(e).__name__}: {e}"
+            if attempt < retries:
+                time.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+    return {"worker": worker, "rows": 0, "seconds": time.perf_counter() - start,
+            "attempts": retries + 1, "error": error}
+
+
+def run_partitions(load: Callable, partitions: Sequence, workers: int = INGEST_WORKERS,
+                   retries: int = INGEST_RETRIES, processes: bool = False,
+                   key: Optional[Callable[[object], Hashable]] = None) -> dict:
+    """
+    Loads `partitions` concurrently with `load(partition) -> rows loaded`.
+
+    `load` opens / reuses its connection via worker_connection() and commits
+    its own transaction. `key(partition)` names a partition in the report
+    (default: its index).
+
+    Returns:
+        {"rows", "seconds", "rows_per_s", "workers": {worker: stats}, "failed": [{"partition", "error"}]}
+    """
+    if processes:
+        pool = ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=multiprocessing.get_context("spawn"))
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+    start = time.perf_counter()
+    per_worker: dict = {}
+    failed = []
+    rows = 0
+    done = 0
+
+    with pool:
+        futures = {pool.submit(_load_with_retry, load, p, retries): i for i, p in enumerate(partitions)}
+        for future in as_completed(futures):
+            index = futures[future]
+            result = future.result()
+            done += 1
+            stats = per_worker.setdefault(result["worker"], {"partitions": 0, "rows": 0, "seconds": 0.0, "retries": 0})
+            stats["partitions"] += 1
+            stats["rows"] += result["rows"]
+            stats["seconds"] += result["seconds"]
+            stats["retries"] += result["attempts"] - 1
+            if result["error"]:
+                failed.append({"partition": key(partitions[index]) if key else index, "error": result["error"]})
+                print(f"   ❌ Partition {failed[-1]['partition']} failed after {result['attempts']} attempts: "
+                      f"{result['error']}", flush=True)
+            rows += result["rows"]
+            rate = rows / max(time.perf_counter() - start, 1e-9)
+            print(f"   🚀 {done}/{len(partitions)} partitions, {rows:,} rows ({rate:,.0f} rows/s)", flush=True)
+    # Thread workers share this process's connection list; process workers' close on exit
+    close_worker_connections()
+
+    elapsed = time.perf_counter() - start
+    for stats in per_worker.values():
+        stats["rows_per_s"] = round(stats["rows"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        stats["seconds"] = round(stats["seconds"], 3)
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0,
+        "workers": per_worker,
+        "failed": failed,
+    }
+
+
+def print_summary(summary: dict):
+    print(f"✅ Loaded {summary['rows']:,} rows in {summary['seconds']:.1f}s ({summary['rows_per_s']:,.0f} rows/s)")
+    for worker, stats in sorted(summary["workers"].items()):
+        print(f"   {worker:<28} {stats['partitions']:>4} partitions {stats['rows']:>12,} rows "
+              f"{stats['rows_per_s']:>12,.0f} rows/s  ({stats['retries']} retries)")
+    if summary["failed"]:
+        print(f"⚠️  {len(summary['failed'])} partitions failed; re-run them: "
+              f"{[f['partition'] for f in summary['failed']]}")
@@ -0,0 +1,240 @@
+import os
+import sqlite3
+import sys
+import time
+import psycopg
+from dotenv import load_dotenv
+
+# Allow `from app...` imports when run as a script from the project root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from app.partitions import (
+    POPULARITY_TIERS,
+    GENRE_PARTITION_LIMIT,
+    TIER_INDEX_PREFIX,
+    GENRE_INDEX_PREFIX,
+    tier_predicate,
+    genre_predicate,
+    genre_index_name,
+)
+
+"""
+Script: partition_indexes.py
+Description:
+    Maintains per-partition vector indexes on the `tracks` table.
+
+    Filtering a query on genre or popularity against the single global HNSW index
+    (`tracks_embedding_idx`) wrecks recall: the index returns the global nearest
+    neighbours and the WHERE clause discards most of them. This script builds one
+    PARTIAL HNSW index per popularity tier and per common genre, so the API can
+    route a filtered query straight to the matching partition.
+
+    1. Ensures the `popularity` and `genre` columns exist and fills them from
+       the SQLite dump when it is available: missing popularity values from its
+       `tracks`, and `genre` from its artist genres (r_artist_genre), where each
+       track gets the most widespread genre among its artists. Genres are
+       normalised to lowercase. Stops if no track has a popularity, since every
+       tier partition would be empty.
+    2. Creates one partial index per popularity tier (see app/partitions.py).
+    3. Creates one partial index for each of the top-N genres and drops indexes
+       for genres that fell out of the top-N.
+    4. Runs ANALYZE so the planner sees the new statistics.
+
+    Safe to re-run after every ingest; existing indexes are kept.
+
+Usage:
+    python backend/scripts/etl/partition_indexes.py
+    python backend/scripts/etl/partition_indexes.py --source backend/spotify.sqlite
+"""
+
+# Load environment variables
+load_dotenv()
+
+POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
+PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
+SQLITE_DB = os.getenv("SQLITE_DB", "spotify.sqlite")
+SOURCE_BATCH_SIZE = 100_000
+
+# One genre per track: of its artists' genres, the one most artists share, so
+# tracks land in the broad genres that get a partition
+TRACK_GENRES_SQL = """
+    WITH genre_size AS (
+        SELECT genre_id, COUNT(*) AS n FROM r_artist_genre GROUP BY genre_id
+    ),
+    ranked AS (
+        SELECT rta.track_id, rag.genre_id,
+               ROW_NUMBER() OVER (PARTITION BY rta.track_id ORDER BY gs.n DESC, rag.genre_id) AS rn
+        FROM r_track_artist rta
+        JOIN r_artist_genre rag ON rag.artist_id = rta.artist_id
+        JOIN genre_size gs ON gs.genre_id = rag.genre_id
+    )
+    SELECT track_id, lower(trim(genre_id)) FROM ranked WHERE rn = 1
+"""
+
+# The dump repeats some track rows; they carry the same popularity
+TRACK_POPULARITY_SQL = "SELECT id, MAX(popularity) FROM tracks WHERE popularity IS NOT NULL GROUP BY id"
+
+
+def ensure_partition_columns(conn):
+    """Adds the columns the partition predicates rely on."""
+    conn.execute("ALTER TABLE tracks ADD COLUMN IF NOT EXISTS popularity INTEGER")
+    conn.execute("ALTER TABLE tracks ADD COLUMN IF NOT EXISTS genre TEXT")
+    # Genre predicates are matched verbatim, so keep the stored values canonical
+    conn.execute("""
+        UPDATE tracks SET genre = lower(trim(genre))
+        WHERE genre IS NOT NULL AND genre <> lower(trim(genre))
+    """)
+
+
+def _source_batches(sqlite_path: str, sql: str, table: str):
+    """Yields batches of `sql`'s rows from the SQLite dump (nothing if it has no `table`)."""
+    conn = sqlite3.connect(f"file:{os.path.abspath(sqlite_path)}?mode=ro", uri=True)
+    conn.text_factory = lambda b: b.decode(errors="ignore")
+    try:
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not has_table:
+            return
+        cursor = conn.execute(sql)
+        while True:
+            rows = cursor.fetchmany(SOURCE_BATCH_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def track_genres(sqlite_path: str):
+    """Yields batches of (track_id, genre) from the SQLite dump (nothing if it has no genre tables)."""
+    yield from _source_batches(sqlite_path, TRACK_GENRES_SQL, "r_artist_genre")
+
+
+def track_popularity(sqlite_path: str):
+    """Yields batches of (track_id, popularity) from the SQLite dump."""
+    yield from _source_batches(sqlite_path, TRACK_POPULARITY_SQL, "tracks")
+
+
+def _fill_column(conn, column: str, column_type: str, batches, condition: str) -> int:
+    """Sets tracks.`column` from (track_id, value) batches, server-side from a COPYed staging table."""
+    with conn.transaction():
+        conn.execute(f"CREATE TEMP TABLE _track_values (track_id TEXT, value {column_type}) ON COMMIT DROP")
+        with conn.cursor() as cur:
+            with cur.copy("COPY _track_values (track_id, value) FROM STDIN") as copy:
+                for rows in batches:
+                    for row in rows:
+                        copy.write_row(row)
+            cur.execute(f"""
+                UPDATE tracks t SET {column} = v.value
+                FROM _track_values v
+                WHERE t.track_id = v.track_id AND {condition}
+            """)
+            updated = cur.rowcount
+    print(f"   ✅ {updated:,} tracks updated")
+    return updated
+
+
+def fill_genres(conn, sqlite_path: str = SQLITE_DB) -> int:
+    """Sets tracks.genre from the SQLite dump's artist genres."""
+    if not os.path.exists(sqlite_path):
+        print(f"⚠️  {sqlite_path} not found; genre partitions only cover tracks that already have a genre.")
+        return 0
+    print(f"🏷️  Filling genres from {sqlite_path}...")
+    return _fill_column(conn, "genre", "TEXT", track_genres(sqlite_path), "t.genre IS DISTINCT FROM v.value")
+
+
+def fill_popularity(conn, sqlite_path: str = SQLITE_DB) -> int:
+    """
+    Backfills missing tracks.popularity from the SQLite dump (loaders that do not
+    carry it, or a column just added by ensure_partition_columns), then checks
+    that the tier partitions will not be empty.
+    """
+    updated = 0
+    missing = conn.execute("SELECT EXISTS (SELECT 1 FROM tracks WHERE popularity IS NULL)").fetchone()[0]
+    if missing and os.path.exists(sqlite_path):
+        print(f"📈 Filling missing popularity from {sqlite_path}...")
+        updated = _fill_column(conn, "popularity", "INTEGER", track_popularity(sqlite_path),
+                               "t.popularity IS NULL")
+    empty = conn.execute("""
+        SELECT EXISTS (SELECT 1 FROM tracks) AND NOT EXISTS (SELECT 1 FROM tracks WHERE popularity IS NOT NULL)
+    """).fetchone()[0]
+    if empty:
+        raise RuntimeError(
+            f"No track has a popularity (source: {sqlite_path}); popularity tier partitions would be empty. "
+            "Load popularity or pass --source with the SQLite dump."
+        )
+    return updated
+
+
+def create_partial_index(conn, index_name: str, predicate: str):
+    print(f"   🧩 {index_name} WHERE {predicate}...", end="", flush=True)
+    start = time.time()
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {index_name}
+        ON tracks USING hnsw (audio_embedding vector_l2_ops)
+        WHERE {predicate}
+    """)
+    print(f" {time.time() - start:.1f}s")
+
+
+def build_tier_indexes(conn):
+    print("📊 Popularity tier partitions...")
+    for tier in POPULARITY_TIERS:
+        create_partial_index(conn, f"{TIER_INDEX_PREFIX}{tier}", tier_predicate(tier))
+
+
+def build_genre_indexes(conn, limit: int = GENRE_PARTITION_LIMIT):
+    print(f"🎸 Genre partitions (top {limit})...")
+    top_genres = [
+        r[0] for r in conn.execute("""
+            SELECT genre FROM tracks
+            WHERE genre IS NOT NULL AND genre <> ''
+            GROUP BY genre
+            ORDER BY COUNT(*) DESC
+            LIMIT %s
+        """, (limit,)).fetchall()
+    ]
+
+    wanted = {}
+    for genre in top_genres:
+        wanted[genre_index_name(genre)] = genre
+
+    for index_name, genre in wanted.items():
+        create_partial_index(conn, index_name, genre_predicate(genre))
+
+    # Drop partitions for genres that are no longer in the top-N
+    existing = [
+        r[0] for r in conn.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = 'tracks' AND indexname LIKE %s",
+            (f"{GENRE_INDEX_PREFIX}%",)
+        ).fetchall()
+    ]
+    for index_name in existing:
+        if index_name not in wanted:
+            print(f"   🗑️  Dropping stale partition {index_name}")
+            conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+def build_partition_indexes(sqlite_path: str = SQLITE_DB):
+    print("🐘 Building partitioned vector indexes...")
+    with psycopg.connect(PG_DSN, autocommit=True) as conn:
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        ensure_partition_columns(conn)
+        fill_popularity(conn, sqlite_path)
+        fill_genres(conn, sqlite_path)
+        build_tier_indexes(conn)
+        build_genre_indexes(conn)
+        conn.execute("ANALYZE tracks")
+    print("✅ Partition indexes ready.")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Fill genres and build per-partition vector indexes.")
+    parser.add_argument("--source", default=SQLITE_DB, help="SQLite dump to read popularity and artist genres from")
+    args = parser.parse_args()
+    try:
+        build_partition_indexes(args.source)
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,368 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import polars as pl
+
+try:
+    from scripts.etl.ingest_data import COPY_COLUMNS, copy_tracks
+    from scripts.etl.parallel_copy import (
+        INGEST_RETRIES, INGEST_WORKERS, RETRY_BACKOFF_S,
+        close_worker_connections, discard_worker_connection, worker_connection,
+    )
+    from scripts.etl.stage_parquet import connect_source
+except ImportError:
+    # Running as a script from within scripts/etl
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from ingest_data import COPY_COLUMNS, copy_tracks
+    from parallel_copy import (
+        INGEST_RETRIES, INGEST_WORKERS, RETRY_BACKOFF_S,
+        close_worker_connections, discard_worker_connection, worker_connection,
+    )
+    from stage_parquet import connect_source
+
+"""
+Script: pipeline.py
+Description:
+    The seeding engine shared by the seed scripts: extract -> transform -> load
+    as three concurrent stages connected by bounded queues, so reading the
+    source, transforming batches and COPYing into Postgres overlap instead of
+    taking turns.
+
+        source ──▶ [queue] ──▶ transform x T ──▶ [queue] ──▶ load x W ──▶ Postgres
+
+    source     an iterable of (key, DataFrame) batches (see SOURCES below):
+               sqlite_stream  one ordered query (full or flat dev DB)
+               sqlite_ranges  one query per rowid range, run by reader processes
+               lazy_batches   a Polars LazyFrame (Parquet stage, CSV) in chunks
+    transform  a vectorised DataFrame -> DataFrame function (thread(s))
+    load       `load(key, df) -> rows`, one transaction per batch, on W threads
+               with a connection each (copy_loader() builds the usual one);
+               failed batches are retried with backoff like parallel_copy.py
+
+    `key` travels with its batch so a loader can checkpoint it
+    (scripts/etl/checkpoints.py) in the same transaction as its rows.
+
+    The queues are bounded (PIPELINE_QUEUE batches), so a slow stage throttles
+    the ones before it instead of buffering the whole source in memory. Every
+    stage reports its throughput while busy and how long it waited for input
+    (starved) or for room downstream (blocked = back-pressure); the slowest
+    stage is named as the bottleneck.
+
+Settings (env):
+    PIPELINE_QUEUE   batches buffered between stages (default 4)
+    PIPELINE_BATCH   rows per batch for streamed sources (default 50000)
+
+Usage (from a seeder):
+    summary = run_pipeline(sqlite_ranges(SQLITE_DB, RANGE_QUERY, SCHEMA, ranges),
+                           transform_data, copy_loader(PG_DSN), load_workers=4)
+    print_pipeline_summary(summary)
+"""
+
+PIPELINE_QUEUE = int(os.getenv("PIPELINE_QUEUE", "4"))
+PIPELINE_BATCH = int(os.getenv("PIPELINE_BATCH", "50000"))
+PROGRESS_INTERVAL_S = 2.0
+
+# Defaults for missing source values, as the seeders have always used them
+TRACK_DEFAULTS = {
+    "artist": "Unknown", "album": "Unknown", "popularity": 0,
+    "danceability": 0.5, "energy": 0.5, "valence": 0.5, "tempo": 120.0, "acousticness": 0.5,
+}
+
+_DONE = object()
+
+Batch = Tuple[object, pl.DataFrame]
+
+
+# ==================== SOURCES ====================
+
+def sqlite_stream(path: str, sql: str, schema: dict, params: Sequence = (), batch: int = PIPELINE_BATCH,
+                  start: int = 0) -> Iterator[Batch]:
+    """One query, fetched in batches. Keys are positions: rows of the query consumed up to and including the batch."""
+    conn = connect_source(path)
+    try:
+        cursor = conn.execute(sql, params)
+        position = start
+        while True:
+            rows = cursor.fetchmany(batch)
+            if not rows:
+                break
+            position += len(rows)
+            yield position, pl.DataFrame(rows, schema=schema, orient="row")
+    finally:
+        conn.close()
+
+
+def _read_range(task) -> pl.DataFrame:
+    """Reader process: one rowid range of `sql`."""
+    path, sql, schema, bounds = task
+    conn = connect_source(path)
+    try:
+        rows = conn.execute(sql, bounds).fetchall()
+    finally:
+        conn.close()
+    return pl.DataFrame(rows, schema=schema, orient="row")
+
+
+def sqlite_ranges(path: str, sql: str, schema: dict, ranges: Sequence[Tuple[int, int]],
+                  processes: int = INGEST_WORKERS) -> Iterator[Batch]:
+    """
+    `sql` (with `rowid BETWEEN ? AND ?`) once per range, on `processes` reader
+    processes, since building Python rows from SQLite holds the GIL. Batches
+    are yielded in range order, keyed by their (first, last) rowids; at most
+    2 * `processes` ranges are read ahead.
+    """
+    pool = ProcessPoolExecutor(max_workers=max(processes, 1), mp_context=multiprocessing.get_context("spawn"))
+    pending = deque()
+    todo = iter(ranges)
+    try:
+        for bounds in todo:
+            pending.append((bounds, pool.submit(_read_range, (path, sql, schema, bounds))))
+            if len(pending) >= 2 * processes:
+                break
+        while pending:
+            bounds, future = pending.popleft()
+            df = future.result()
+            following = next(todo, None)
+            if following is not None:
+                pending.append((following, pool.submit(_read_range, (path, sql, schema, following))))
+            if df.height:
+                yield bounds, df
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def lazy_batches(frame: pl.LazyFrame, batch: int = PIPELINE_BATCH, start: int = 0) -> Iterator[Batch]:
+    """A LazyFrame (e.g. scan_parquet / scan_csv) streamed in chunks, skipping the first `start` rows. Keys are positions."""
+    position = start
+    for df in frame.slice(start).collect_batches(chunk_size=batch):
+        if df.height:
+            position += df.height
+            yield position, df
+
+
+def csv_batches(path: str, batch: int = PIPELINE_BATCH, start: int = 0) -> Iterator[Batch]:
+    return lazy_batches(pl.scan_csv(path, ignore_errors=True), batch, start)
+
+
+# ==================== TRANSFORM / LOAD ====================
+
+def fill_track_defaults(df: pl.DataFrame) -> pl.DataFrame:
+    """Missing values -> TRACK_DEFAULTS, features clipped to 0-1 and `tempo_norm` for the embedding."""
+    return df.with_columns(
+        [pl.col(c).fill_null(v) for c, v in TRACK_DEFAULTS.items() if c in df.columns]
+    ).with_columns(
+        (pl.col("tempo") / 250.0).clip(0, 1).alias("tempo_norm"),
+        *[pl.col(c).clip(0, 1) for c in ("danceability", "energy", "valence", "acousticness")],
+    )
+
+
+def copy_loader(dsn: str, table: str = "tracks", columns: List[str] = COPY_COLUMNS,
+                on_commit: Optional[Callable] = None) -> Callable[[object, pl.DataFrame], int]:
+    """
+    A load function: COPY the batch (`columns` + audio_embedding) over this
+    thread's connection, run `on_commit(conn, key, df)` (e.g. a checkpoint) in
+    the same transaction, COMMIT.
+    """
+    def load(key, df: pl.DataFrame) -> int:
+        conn = worker_connection(dsn)
+        with conn.cursor() as cur:
+            copy_tracks(cur, df, table, columns)
+        if on_commit:
+            on_commit(conn, key, df)
+        conn.commit()
+        return df.height
+    return load
+
+
+# ==================== ENGINE ====================
+
+class StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.batches = 0
+        self.rows = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self.max_queue = 0
+        self.lock = threading.Lock()
+
+    def add(self, **deltas):
+        with self.lock:
+            for field, value in deltas.items():
+                setattr(self, field, getattr(self, field) + value)
+
+    def summary(self) -> dict:
+        busy_per_worker = self.busy / self.workers
+        return {
+            "workers": self.workers,
+            "batches": self.batches,
+            "rows": self.rows,
+            "busy_s": round(self.busy, 3),
+            "rows_per_s": round(self.rows / busy_per_worker, 1) if busy_per_worker else 0.0,
+            "starved_s": round(self.starved, 3),
+            "blocked_s": round(self.blocked, 3),
+            "max_queue": self.max_queue,
+        }
+
+
+def run_pipeline(source: Iterable[Batch], transform: Callable[[pl.DataFrame], pl.DataFrame],
+                 load: Callable[[object, pl.DataFrame], int], transform_workers: int = 1,
+                 load_workers: int = INGEST_WORKERS, queue_size: int = PIPELINE_QUEUE,
+                 retries: int = INGEST_RETRIES) -> dict:
+    """
+    Runs source -> transform -> load concurrently. The first error in any
+    stage (after retries, for loads) stops the pipeline and is re-raised.
+
+    Returns:
+        {"rows", "seconds", "rows_per_s", "stages": {name: stats}, "bottleneck"}
+    """
+    stats = {
+        "extract": StageStats("extract", 1),
+        "transform": StageStats("transform", transform_workers),
+        "load": StageStats("load", load_workers),
+    }
+    to_transform: queue.Queue = queue.Queue(queue_size)
+    to_load: queue.Queue = queue.Queue(queue_size)
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    transformers_left = [transform_workers]
+    left_lock = threading.Lock()
+    progress = {"rows": 0, "printed": time.perf_counter()}
+    start = time.perf_counter()
+
+    def fail(e: BaseException):
+        errors.append(e)
+        stop.set()
+
+    def put(q: queue.Queue, item, stage: StageStats):
+        waited = time.perf_counter()
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stage.add(blocked=time.perf_counter() - waited)
+        stage.max_queue = max(stage.max_queue, q.qsize())
+
+    def get(q: queue.Queue, stage: StageStats):
+        waited = time.perf_counter()
+        while not stop.is_set():
+            try:
+                item = q.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        else:
+            item = _DONE
+        stage.add(starved=time.perf_counter() - waited)
+        return item
+
+    def extract():
+        stage = stats["extract"]
+        try:
+            batches = iter(source)
+            while not stop.is_set():
+                began = time.perf_counter()
+                item = next(batches, _DONE)
+                stage.add(busy=time.perf_counter() - began)
+                if item is _DONE:
+                    break
+                stage.add(batches=1, rows=item[1].height)
+                put(to_transform, item, stage)
+        except BaseException as e:
+            fail(e)
+        finally:
+            for _ in range(transform_workers):
+                put(to_transform, _DONE, stage)
+
+    def transformer():
+        stage = stats["transform"]
+        try:
+            while True:
+                item = get(to_transform, stage)
+                if item is _DONE:
+                    break
+                key, df = item
+                began = time.perf_counter()
+                df = transform(df)
+                stage.add(busy=time.perf_counter() - began, batches=1, rows=df.height)
+                put(to_load, (key, df), stage)
+        except BaseException as e:
+            fail(e)
+        finally:
+            with left_lock:
+                transformers_left[0] -= 1
+                last = transformers_left[0] == 0
+            if last:
+                for _ in range(load_workers):
+                    put(to_load, _DONE, stage)
+
+    def loader():
+        stage = stats["load"]
+        try:
+            while True:
+                item = get(to_load, stage)
+                if item is _DONE:
+                    break
+                key, df = item
+                began = time.perf_counter()
+                for attempt in range(retries + 1):
+                    try:
+                        rows = load(key, df)
+                        break
+                    except Exception:
+                        discard_worker_connection()
+                        if attempt == retries:
+                            raise
+                        time.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+                stage.add(busy=time.perf_counter() - began, batches=1, rows=rows)
+                with left_lock:
+                    progress["rows"] += rows
+                    now = time.perf_counter()
+                    if now - progress["printed"] >= PROGRESS_INTERVAL_S:
+                        progress["printed"] = now
+                        print(f"   🚀 {progress['rows']:,} rows ({progress['rows'] / (now - start):,.0f} rows/s)",
+                              flush=True)
+        except BaseException as e:
+            fail(e)
+
+    threads = [threading.Thread(target=extract, name="extract")]
+    threads += [threading.Thread(target=transformer, name=f"transform-{i}") for i in range(transform_workers)]
+    threads += [threading.Thread(target=loader, name=f"load-{i}") for i in range(load_workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    close_worker_connections()
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    stages = {name: stage.summary() for name, stage in stats.items()}
+    rows = stages["load"]["rows"]
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else 0.0,
+        "stages": stages,
+        # The stage with the least capacity (per-worker busy time) limits the rest
+        "bottleneck": max(stages, key=lambda name: stages[name]["busy_s"] / stages[name]["workers"]),
+    }
+
+
+def print_pipeline_summary(summary: dict):
+    print(f"✅ Loaded {summary['rows']:,} rows in {summary['seconds']:.1f}s ({summary['rows_per_s']:,.0f} rows/s)")
+    for name, stage in summary["stages"].items():
+        print(f"   {name:<10} x{stage['workers']:<2} {stage['rows']:>12,} rows {stage['rows_per_s']:>12,.0f} rows/s busy"
+              f"  starved {stage['starved_s']:.1f}s  blocked {stage['blocked_s']:.1f}s  (queue max {stage['max_queue']})")
+    print(f"   🐢 Bottleneck: {summary['bottleneck']}")
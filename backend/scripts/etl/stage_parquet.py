@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from typing import Iterator, List, Tuple
+
+import polars as pl
+
+try:
+    from scripts.etl.parallel_copy import INGEST_WORKERS, rowid_ranges, run_partitions, print_summary
+except ImportError:
+    # Running as a script from within scripts/etl
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    from parallel_copy import INGEST_WORKERS, rowid_ranges, run_partitions, print_summary
+
+"""
+Script: stage_parquet.py
+Description:
+    Converts the normalised spotify.sqlite dump ONCE into a columnar Parquet
+    staging layer, so seeders no longer repeat the expensive SQLite join.
+
+    <stage>/tracks/popularity_bucket=N/*.parquet
+        One row per track (deduplicated on track_id), flattened with the same
+        join the seeders used to run: artists (comma-joined), album, popularity
+        and audio features. Hive-partitioned by popularity // 10, so "top
+        popular" reads only open the highest buckets.
+    <stage>/artists.parquet, albums.parquet
+        Artist / album dimensions, deduplicated on id.
+    <stage>/track_artists.parquet, album_tracks.parquet
+        The link tables, deduplicated.
+    <stage>/_manifest.json
+        Row counts and the source file it was built from.
+
+    Tracks are extracted in parallel (one process per rowid range, see
+    parallel_copy.py), then deduplicated and partitioned in one Polars pass.
+
+    Readers use scan_tracks() / scan_top_popular() / scan_dimension(), which
+    are lazy: only the columns, partitions and row groups a query needs are read.
+
+Usage:
+    python backend/scripts/etl/stage_parquet.py                        # spotify.sqlite -> staging/
+    python backend/scripts/etl/stage_parquet.py --source backend/spotify.sqlite --output backend/staging
+"""
+
+SOURCE_DB = os.getenv("SQLITE_DB", "spotify.sqlite")
+STAGE_DIR = os.getenv("STAGE_DIR", "staging")
+EXTRACT_ROWS = 250_000  # tracks rowids per extraction partition
+ROW_GROUP_SIZE = 100_000  # rows per Parquet row group (the unit readers can skip / slice)
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(1 << 30)))  # per reader connection
+SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", str(256 * 1024)))
+
+# The flattened track: one row per track id. Shared by every SQLite reader
+# (this stage, create_dev_db.py and the seeders' no-stage fallback).
+# MAX(...) because of GROUP BY t.id; GROUP_CONCAT handles multi-artist tracks.
+FLATTENED_COLUMNS = [
+    "track_id", "name", "artist", "album", "popularity",
+    "danceability", "energy", "valence", "tempo", "acousticness",
+]
+FLATTENED_TRACKS_SQL = """
+    SELECT
+        t.id AS track_id,
+        t.name AS name,
+        GROUP_CONCAT(DISTINCT a.name) AS artist,
+        MAX(alb.name) AS album,
+        MAX(t.popularity) AS popularity,
+        MAX(af.danceability) AS danceability,
+        MAX(af.energy) AS energy,
+        MAX(af.valence) AS valence,
+        MAX(af.tempo) AS tempo,
+        MAX(af.acousticness) AS acousticness
+    FROM tracks t
+    JOIN audio_features af ON t.id = af.id
+    JOIN r_track_artist rta ON t.id = rta.track_id
+    JOIN artists a ON rta.artist_id = a.id
+    LEFT JOIN r_albums_tracks rtalb ON t.id = rtalb.track_id
+    LEFT JOIN albums alb ON rtalb.album_id = alb.id
+    {where}
+    GROUP BY t.id
+    {tail}
+"""
+TRACKS_SCHEMA = {
+    "track_id": pl.Utf8, "name": pl.Utf8, "artist": pl.Utf8, "album": pl.Utf8, "popularity": pl.Int64,
+    "danceability": pl.Float64, "energy": pl.Float64, "valence": pl.Float64, "tempo": pl.Float64,
+    "acousticness": pl.Float64,
+}
+
+# name -> (query, schema, dedupe key)
+DIMENSIONS = {
+    "artists": ("SELECT id, name, popularity, followers FROM artists",
+                {"id": pl.Utf8, "name": pl.Utf8, "popularity": pl.Int64, "followers": pl.Int64}, ["id"]),
+    "albums": ("SELECT id, name, album_type, release_date, popularity FROM albums",
+               {"id": pl.Utf8, "name": pl.Utf8, "album_type": pl.Utf8, "release_date": pl.Int64,
+                "popularity": pl.Int64}, ["id"]),
+    "track_artists": ("SELECT track_id, artist_id FROM r_track_artist",
+                      {"track_id": pl.Utf8, "artist_id": pl.Utf8}, ["track_id", "artist_id"]),
+    "album_tracks": ("SELECT album_id, track_id FROM r_albums_tracks",
+                     {"album_id": pl.Utf8, "track_id": pl.Utf8}, ["album_id", "track_id"]),
+}
+
+
+def flattened_tracks_sql(where: str = "", tail: str = "") -> str:
+    return FLATTENED_TRACKS_SQL.format(where=where, tail=tail)
+
+
+def connect_source(path: str) -> sqlite3.Connection:
+    """
+    A read-only connection for one extraction worker: memory-mapped I/O and a
+    large page cache, so concurrent readers share the OS page cache instead of
+    each copying pages through read().
+    """
+    conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+    conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    # 🛠️ Fix Encoding Issues: Ignore bad bytes
+    conn.text_factory = lambda b: b.decode(errors="ignore")
+    return conn
+
+
+def _frames(conn, sql: str, schema: dict, params=(), batch: int = 500_000) -> Iterator[pl.DataFrame]:
+    cursor = conn.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(batch)
+        if not rows:
+            break
+        yield pl.DataFrame(rows, schema=schema, orient="row")
+
+
+# ==================== BUILD ====================
+
+def extract_range(task) -> int:
+    """Worker: one rowid range of the flattened join -> one Parquet part file."""
+    source, parts_dir, (first, last) = task
+    conn = connect_source(source)
+    try:
+        frames = list(_frames(conn, flattened_tracks_sql("WHERE t.rowid BETWEEN ? AND ?"),
+                              TRACKS_SCHEMA, (first, last)))
+    finally:
+        conn.close()
+    if not frames:
+        return 0
+    df = pl.concat(frames)
+    df.write_parquet(os.path.join(parts_dir, f"{first:012d}.parquet"))
+    return df.height
+
+
+def stage_tracks(source: str, output: str, workers: int) -> int:
+    parts_dir = os.path.join(output, "_parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    ranges = rowid_ranges(source, "tracks", EXTRACT_ROWS)
+    print(f"⚡ Extracting {len(ranges)} rowid ranges with {workers} workers...")
+    summary = run_partitions(extract_range, [(source, parts_dir, r) for r in ranges], workers=workers,
+                             processes=True, key=lambda task: f"rowid {task[2][0]}-{task[2][1]}")
+    print_summary(summary)
+    if summary["failed"]:
+        raise RuntimeError(f"{len(summary['failed'])} extraction ranges failed")
+
+    tracks_dir = os.path.join(output, "tracks")
+    shutil.rmtree(tracks_dir, ignore_errors=True)
+    tracks = (
+        pl.scan_parquet(os.path.join(parts_dir, "*.parquet"))
+        .unique(subset=["track_id"], keep="first")
+        .with_columns(popularity_bucket=(pl.col("popularity").fill_null(0) // 10).clip(0, 10).cast(pl.Int32))
+        .collect(engine="streaming")
+    )
+    tracks.write_parquet(tracks_dir, partition_by="popularity_bucket", row_group_size=ROW_GROUP_SIZE, mkdir=True)
+    shutil.rmtree(parts_dir)
+    print(f"   🎵 tracks: {tracks.height:,} rows")
+    return tracks.height
+
+
+def stage_dimension(source: str, output: str, name: str) -> int:
+    sql, schema, key = DIMENSIONS[name]
+    conn = connect_source(source)
+    try:
+        frames = list(_frames(conn, sql, schema))
+    finally:
+        conn.close()
+    df = pl.concat(frames) if frames else pl.DataFrame(schema=schema)
+    df = df.unique(subset=key, keep="first")
+    df.write_parquet(os.path.join(output, f"{name}.parquet"), row_group_size=ROW_GROUP_SIZE)
+    print(f"   📚 {name}: {df.height:,} rows")
+    return df.height
+
+
+def build_stage(source: str = SOURCE_DB, output: str = STAGE_DIR, workers: int = INGEST_WORKERS) -> dict:
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"❌ Could not find {source}.")
+    start = time.time()
+    print(f"🚀 Staging {source} -> {output}/")
+    os.makedirs(output, exist_ok=True)
+    counts = {"tracks": stage_tracks(source, output, workers)}
+    for name in DIMENSIONS:
+        counts[name] = stage_dimension(source, output, name)
+    manifest = {
+        "source": os.path.abspath(source),
+        "source_mtime": os.path.getmtime(source),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "rows": counts,
+    }
+    with open(os.path.join(output, "_manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"🏁 Staged in {time.time() - start:.1f}s")
+    return manifest
+
+
+# ==================== READ ====================
+
+def stage_available(stage_dir: str = STAGE_DIR) -> bool:
+    return os.path.exists(os.path.join(stage_dir, "_manifest.json"))
+
+
+def scan_tracks(stage_dir: str = STAGE_DIR) -> pl.LazyFrame:
+    """The staged tracks, lazily (filters on popularity_bucket prune whole partitions)."""
+    return pl.scan_parquet(os.path.join(stage_dir, "tracks", "**", "*.parquet"), hive_partitioning=True)
+
+
+def scan_dimension(name: str, stage_dir: str = STAGE_DIR) -> pl.LazyFrame:
+    return pl.scan_parquet(os.path.join(stage_dir, f"{name}.parquet"))
+
+
+def scan_top_popular(limit: int, stage_dir: str = STAGE_DIR) -> pl.LazyFrame:
+    """
+    The `limit` most popular tracks (ties by track_id), reading only the
+    highest popularity buckets that together hold at least `limit` rows.
+    """
+    tracks = scan_tracks(stage_dir)
+    counts = tracks.group_by("popularity_bucket").len().sort("popularity_bucket", descending=True).collect()
+    buckets, total = [], 0
+    for bucket, n in counts.iter_rows():
+        buckets.append(bucket)
+        total += n
+        if total >= limit:
+            break
+    return (
+        tracks
+        .filter(pl.col("popularity_bucket").is_in(buckets))
+        .sort(["popularity", "track_id"], descending=[True, False], nulls_last=True)
+        .head(limit)
+    )
+
+
+def track_slices(stage_dir: str = STAGE_DIR, size: int = ROW_GROUP_SIZE) -> List[Tuple[str, int, int]]:
+    """[(file, offset, length)] covering the staged tracks, for parallel loaders."""
+    slices = []
+    for root, _, files in sorted(os.walk(os.path.join(stage_dir, "tracks"))):
+        for name in sorted(files):
+            if not name.endswith(".parquet"):
+                continue
+            path = os.path.join(root, name)
+            rows = pl.scan_parquet(path).select(pl.len()).collect().item()
+            slices.extend((path, offset, min(size, rows - offset)) for offset in range(0, rows, size))
+    return slices
+
+
+def read_track_slice(task: Tuple[str, int, int]) -> pl.DataFrame:
+    path, offset, length = task
+    return pl.scan_parquet(path).slice(offset, length).collect()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert spotify.sqlite into the Parquet staging layer.")
+    parser.add_argument("--source", default=SOURCE_DB)
+    parser.add_argument("--output", default=STAGE_DIR)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    args = parser.parse_args()
+    try:
+        build_stage(args.source, args.output, args.workers)
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -1,15 +1,37 @@
 import sqlite3
 import psycopg
 import os
+import sys
 from dotenv import load_dotenv
-from tqdm import tqdm
+
+try:
+    from backend.scripts.etl.centroids import refresh_after_load
+    from backend.scripts.etl.checkpoints import record_checkpoint, start_run
+    from backend.scripts.etl.pipeline import (
+        copy_loader, fill_track_defaults, lazy_batches, print_pipeline_summary, run_pipeline, sqlite_stream,
+    )
+    from backend.scripts.etl.stage_parquet import (
+        FLATTENED_COLUMNS, TRACKS_SCHEMA, flattened_tracks_sql, stage_available, scan_top_popular,
+    )
+except ImportError:
+    # Fallback if running from within scripts folder
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'etl'))
+    from centroids import refresh_after_load
+    from checkpoints import record_checkpoint, start_run
+    from pipeline import copy_loader, fill_track_defaults, lazy_batches, print_pipeline_summary, run_pipeline, sqlite_stream
+    from stage_parquet import FLATTENED_COLUMNS, TRACKS_SCHEMA, flattened_tracks_sql, stage_available, scan_top_popular
 
 """
 Script: dev_seed.py
 Description:
     Seeds the Postgres database from a local SQLite source.
     
-    It supports TWO modes of operation automatically:
+    It supports THREE modes of operation automatically:
+    0. STAGE MODE: Uses the Parquet staging layer (`staging/`, built once by
+       scripts/etl/stage_parquet.py) when it exists.
+       - Source: Flattened, deduplicated tracks, read lazily with Polars; only
+         the top popularity partitions are opened.
+       - Speed: Fastest, no SQLite join at all.
     1. DEV MODE (Default): Uses `spotify_dev.sqlite`.
        - Source: A flattened, single-table (`dev_tracks`) subset of data.
        - Speed: Extremely fast.
@@ -23,8 +45,16 @@ Description:
     The script automatically detects the schema of the provided SQLite file and adapts 
     its query strategy.
 
+    Extraction, cleaning (vectorised, scripts/etl/pipeline.py) and COPY run
+    as concurrent stages, so Postgres is loading one batch while the next is
+    read.
+
+    Every committed batch is checkpointed with its position in the (ordered)
+    extraction. `--resume` keeps the existing table and continues after the
+    last committed row instead of dropping it and starting over.
+
 Usage:
-    python backend/scripts/seeding/dev_seed.py
+    python backend/scripts/seeding/dev_seed.py [--resume [RUN_ID]]
 """
 
 # Load env vars
@@ -37,18 +67,22 @@ load_dotenv()
 # No, let's assume it's run from project root: python backend/scripts/seeding/dev_seed.py
 # The file path "spotify_dev.sqlite" is relative to CWD (root).
 SQLITE_DB = "backend/spotify_dev.sqlite"  # Adjusted specific path to match root execution
+STAGE_DIR = "backend/staging"  # Parquet stage (scripts/etl/stage_parquet.py), preferred when present
 
 POSTGRES_HOST = os.getenv('POSTGRES_HOST', 'localhost')
 PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@{POSTGRES_HOST}:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
 BATCH_SIZE = 1000  # Commit every N rows
 ROW_LIMIT = 100000  # Total rows to seed check
 
-def run_dev_seed():
+STREAM_PARTITION = "stream"  # a single ordered extraction, checkpointed by position
+
+def run_dev_seed(resume: str = None):
     print(f"🌱 Starting SEEDING Process...")
     print(f"   Target: Postgres at {POSTGRES_HOST}")
-    print(f"   Source: {SQLITE_DB}")
+    use_stage = stage_available(STAGE_DIR)
+    print(f"   Source: {STAGE_DIR if use_stage else SQLITE_DB}")
     
-    if not os.path.exists(SQLITE_DB):
+    if not use_stage and not os.path.exists(SQLITE_DB):
         print(f"❌ ERROR: Source database {SQLITE_DB} not found in {os.getcwd()}")
         print(f"   Run 'python backend/scripts/etl/create_dev_db.py' to generate it.")
         return
@@ -57,29 +91,35 @@ def run_dev_seed():
     # We check if we are working with the "Flattened" Dev DB or the "Normalized" Full DB.
     is_flattened = False
     
-    try:
-        tmp_conn = sqlite3.connect(SQLITE_DB)
-        cursor = tmp_conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='dev_tracks'")
-        if cursor.fetchone():
-            is_flattened = True
-            print("📦 Detected FLATTENED Dev Schema (Single Table). using fast path.")
-        else:
-            print("🔗 Detected NORMALIZED Schema (Full DB). using complex JOINs.")
-        tmp_conn.close()
-    except Exception as e:
-        print(f"⚠️ Error checking schema: {e}")
-        return
+    if use_stage:
+        print("📦 Using the Parquet STAGE (flattened, partitioned by popularity).")
+    else:
+        try:
+            tmp_conn = sqlite3.connect(SQLITE_DB)
+            cursor = tmp_conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='dev_tracks'")
+            if cursor.fetchone():
+                is_flattened = True
+                print("📦 Detected FLATTENED Dev Schema (Single Table). using fast path.")
+            else:
+                print("🔗 Detected NORMALIZED Schema (Full DB). using complex JOINs.")
+            tmp_conn.close()
+        except Exception as e:
+            print(f"⚠️ Error checking schema: {e}")
+            return
 
     # 2. Connect to Postgres & Init Schema
     try:
+        run = start_run(PG_DSN, "dev_seed", resume=resume, table="tracks")
+        offset = int(run.last_key(STREAM_PARTITION) or 0)
         pg_conn = psycopg.connect(PG_DSN, autocommit=False)
         print("✅ Connected to Postgres.")
         
         with pg_conn.cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
             
-            # Re-create table
-            cur.execute("DROP TABLE IF EXISTS tracks CASCADE")
+            # Re-create table (a resumed run keeps the rows it already committed)
+            if not run.resumed:
+                cur.execute("DROP TABLE IF EXISTS tracks CASCADE")
             
             create_query = """
                 CREATE TABLE IF NOT EXISTS tracks (
@@ -102,132 +142,52 @@ def run_dev_seed():
         print(f"❌ Postgres Connection Error: {e}")
         return
 
-    # 3. Extract Data from SQLite
-    try:
-        sqlite_conn = sqlite3.connect(SQLITE_DB)
-        sqlite_conn.text_factory = lambda b: b.decode(errors="ignore")
-        
+    pg_conn.close()
+
+    # 3. Extract Data (Parquet stage or SQLite), as a stream of batches keyed by position
+    if use_stage:
+        # --- STAGE PATH ---
+        # Lazy scan: only the needed columns and top popularity partitions are read.
+        print(f"⚡ Reading the Parquet stage (Limit: {ROW_LIMIT}, from row {offset})...")
+        batches = lazy_batches(scan_top_popular(ROW_LIMIT, STAGE_DIR).select(FLATTENED_COLUMNS), BATCH_SIZE, offset)
+    else:
         if is_flattened:
             # --- FAST PATH (Dev DB) ---
             # Data is already joined and clean.
             query = f"""
-                SELECT 
-                    track_id, 
-                    name, 
-                    artist,
-                    album, 
-                    popularity,
-                    danceability, 
-                    energy, 
-                    valence, 
-                    tempo, 
-                    acousticness
+                SELECT {", ".join(FLATTENED_COLUMNS)}
                 FROM dev_tracks
-                LIMIT {ROW_LIMIT}
+                ORDER BY rowid
+                LIMIT {ROW_LIMIT - offset} OFFSET {offset}
             """
         else:
             # --- SLOW PATH (Full DB) ---
-            # We must join manually.
-            # Handle missing tables/columns gracefully if needed
-            query = f"""
-                SELECT 
-                    t.id, 
-                    t.name, 
-                    GROUP_CONCAT(distinct a.name) as artist,
-                    MAX(alb.name) as album,
-                    MAX(t.popularity) as popularity,
-                    MAX(af.danceability), 
-                    MAX(af.energy), 
-                    MAX(af.valence), 
-                    MAX(af.tempo), 
-                    MAX(af.acousticness)
-                FROM tracks t
-                JOIN audio_features af ON t.id = af.id
-                JOIN r_track_artist rta ON t.id = rta.track_id
-                JOIN artists a ON rta.artist_id = a.id
-                LEFT JOIN r_albums_tracks rtalb ON t.id = rtalb.track_id
-                LEFT JOIN albums alb ON rtalb.album_id = alb.id
-                GROUP BY t.id
-                ORDER BY MAX(t.popularity) DESC
-                LIMIT {ROW_LIMIT}
-            """
-            
-        print(f"⚡ Executing SQLite Extraction (Limit: {ROW_LIMIT})...")
-        cursor = sqlite_conn.cursor()
-        cursor.execute(query)
-        
-        # 4. Stream & Insert
-        total_inserted = 0
-        pbar = tqdm(total=ROW_LIMIT, unit="rows", desc="🚀 Seeding")
-
-        while True:
-            rows = cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-            
-            clean_rows = []
-            for r in rows:
-                # r = (id, name, artist, album, popularity, dance, energy, valence, tempo, acoustic)
-                
-                # Unpack carefully
-                track_id = r[0]
-                name = r[1]
-                artist = r[2] or "Unknown"
-                album = r[3] or "Unknown"
-                popularity = r[4] or 0
-                
-                dance = r[5] or 0.5
-                energy = r[6] or 0.5
-                valence = r[7] or 0.5
-                tempo = r[8] or 120.0
-                acoustic = r[9] or 0.5
-                
-                # Normalize tempo for embedding (0-250 range implied)
-                tempo_norm = min(max(tempo / 250.0, 0.0), 1.0)
-                embedding = [dance, energy, valence, tempo_norm, acoustic]
-                
-                row_data = (
-                    track_id, 
-                    name, 
-                    artist, 
-                    album, 
-                    popularity,
-                    dance, 
-                    energy, 
-                    valence, 
-                    tempo, 
-                    acoustic, 
-                    str(embedding)
-                )
-                
-                clean_rows.append(row_data)
-            
-            # Insert Batch
-            with pg_conn.cursor() as cur:
-                cols = "track_id, name, artist, album, popularity, danceability, energy, valence, tempo, acousticness, audio_embedding"
-                
-                with cur.copy(f"COPY tracks ({cols}) FROM STDIN") as copy:
-                    for row in clean_rows:
-                        copy.write_row(row)
-            
-            pg_conn.commit()
-            total_inserted += len(rows)
-            pbar.update(len(rows))
-            
-            if total_inserted >= ROW_LIMIT:
-                break
-
-        pbar.close()
+            # We must join manually (the same join the stage is built from).
+            query = flattened_tracks_sql(
+                tail=f"ORDER BY MAX(t.popularity) DESC, t.id LIMIT {ROW_LIMIT - offset} OFFSET {offset}"
+            )
+        print(f"⚡ Executing SQLite Extraction (Limit: {ROW_LIMIT}, from row {offset})...")
+        batches = sqlite_stream(SQLITE_DB, query, TRACKS_SCHEMA, batch=BATCH_SIZE, start=offset)
 
+    # 4. Stream & Insert: extraction, defaults and COPY overlap (see scripts/etl/pipeline.py).
+    # One loader, so batches commit in order and the checkpointed position is exact.
+    load = copy_loader(PG_DSN, columns=FLATTENED_COLUMNS, on_commit=lambda conn, position, df: record_checkpoint(
+        conn, run.run_id, STREAM_PARTITION, position, df.height))
+    try:
+        summary = run_pipeline(batches, fill_track_defaults, load, load_workers=1)
+        print_pipeline_summary(summary)
+        run.finish()
+        refresh_after_load(PG_DSN)
+        print(f"\n🏁 Finished. Total Rows Inserted: {offset + summary['rows']}")
     except Exception as e:
         print(f"\n❌ Error during seed: {e}")
         import traceback
         traceback.print_exc()
-        if 'pg_conn' in locals(): pg_conn.rollback()
-    finally:
-        if 'sqlite_conn' in locals(): sqlite_conn.close()
-        if 'pg_conn' in locals(): pg_conn.close()
-        print(f"\n🏁 Finished. Total Rows Inserted: {total_inserted}")
+        print(f"   Resume with --resume {run.run_id}")
 
 if __name__ == "__main__":
-    run_dev_seed()
+    import argparse
+    parser = argparse.ArgumentParser(description="Seed Postgres from a local SQLite source.")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                        help="Resume the latest unfinished run (or RUN_ID) from its checkpoints")
+    run_dev_seed(parser.parse_args().resume)
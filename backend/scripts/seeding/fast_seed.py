@@ -1,8 +1,26 @@
-import sqlite3
 import psycopg
+import polars as pl
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from backend.scripts.etl.bulk_load import bulk_load
+    from backend.scripts.etl.centroids import refresh_after_load
+    from backend.scripts.etl.parallel_copy import INGEST_WORKERS, rowid_ranges
+    from backend.scripts.etl.pipeline import copy_loader, print_pipeline_summary, run_pipeline, sqlite_ranges
+    from backend.scripts.etl.checkpoints import record_checkpoint, start_run
+except ImportError:
+    # Fallback if running from within scripts folder
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'etl'))
+    from bulk_load import bulk_load
+    from centroids import refresh_after_load
+    from parallel_copy import INGEST_WORKERS, rowid_ranges
+    from pipeline import copy_loader, print_pipeline_summary, run_pipeline, sqlite_ranges
+    from checkpoints import record_checkpoint, start_run
+
 """
 Script: fast_seed.py
 Description:
@@ -16,8 +34,14 @@ Description:
     - Testing search performance (with dummy data)
     - Quickly resetting the environment
 
+    Rowid ranges of the source are read by INGEST_WORKERS processes and
+    COPYed by INGEST_WORKERS connections, concurrently (see
+    scripts/etl/pipeline.py).
+    Committed ranges are checkpointed, so `--resume` only loads what is missing
+    (see scripts/etl/checkpoints.py).
+
 Usage:
-    python backend/scripts/seeding/fast_seed.py
+    python backend/scripts/seeding/fast_seed.py [--resume [RUN_ID]]
 """
 
 # Load env vars
@@ -26,9 +50,27 @@ load_dotenv()
 # Config
 SQLITE_DB = "spotify.sqlite"
 PG_DSN = f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin')}@localhost:5432/{os.getenv('POSTGRES_DB', 'music_discovery')}"
-BATCH_SIZE = 5000  # Smaller batch = faster initial feedback
+BATCH_SIZE = 50_000  # rowids per partition (one COPY + commit each)
+
+# Mock Data for missing columns
+MOCK_FEATURES = {"danceability": 0.5, "energy": 0.5, "valence": 0.5, "tempo_norm": 0.5, "acousticness": 0.5}
+MOCK_TEMPO = 120.0
+
+def range_key(bounds) -> str:
+    return f"rowid {bounds[0]}-{bounds[1]}"
 
-def run_seed():
+# ULTRA FAST QUERY (No Joins)
+RANGE_QUERY = "SELECT id, name FROM tracks WHERE rowid BETWEEN ? AND ?"
+RANGE_SCHEMA = {"track_id": pl.Utf8, "name": pl.Utf8}
+
+def mock_features(df: pl.DataFrame) -> pl.DataFrame:
+    return df.with_columns(
+        pl.lit("Unknown Artist").alias("artist"),
+        pl.lit(MOCK_TEMPO).alias("tempo"),
+        *[pl.lit(v).alias(c) for c, v in MOCK_FEATURES.items()],
+    )
+
+def run_seed(resume: str = None):
     print(f"🚀 Starting FAST SEED...")
     print(f"   SQLite: {SQLITE_DB}")
     print(f"   Postgres: {PG_DSN.split('@')[1]}") # Print host only for privacy
@@ -39,104 +81,49 @@ def run_seed():
 
     # 1. Connect to Postgres & Init Schema
     try:
-        pg_conn = psycopg.connect(PG_DSN, autocommit=True)
-        print("✅ Connected to Postgres.")
-        
-        # Ensure extension and table exist
-        pg_conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
-        pg_conn.execute("""
-            CREATE TABLE IF NOT EXISTS tracks (
-                track_id TEXT PRIMARY KEY,
-                name TEXT,
-                artist TEXT,
-                danceability FLOAT,
-                energy FLOAT,
-                valence FLOAT,
-                tempo FLOAT,
-                acousticness FLOAT,
-                audio_embedding VECTOR(5)
-            )
-        """)
-        # Drop index for faster insertion, recreate later if needed? 
-        # Actually keeping it is fine for COPY usually, but purely for speed we could drop/recreate.
-        # Let's leave it for now.
-        print("✅ Schema Verified.")
+        with psycopg.connect(PG_DSN, autocommit=True) as pg_conn:
+            print("✅ Connected to Postgres.")
+            
+            # Ensure extension and table exist
+            pg_conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            pg_conn.execute("""
+                CREATE TABLE IF NOT EXISTS tracks (
+                    track_id TEXT PRIMARY KEY,
+                    name TEXT,
+                    artist TEXT,
+                    danceability FLOAT,
+                    energy FLOAT,
+                    valence FLOAT,
+                    tempo FLOAT,
+                    acousticness FLOAT,
+                    audio_embedding VECTOR(5)
+                )
+            """)
+            print("✅ Schema Verified.")
         
     except Exception as e:
         print(f"❌ Postgres Error: {e}")
         return
 
-    # 2. Connect to SQLite
-    try:
-        sqlite_conn = sqlite3.connect(SQLITE_DB)
-        # Avoid full scan, just stream
-        sqlite_conn.text_factory = lambda b: b.decode(errors="ignore")
-        print("✅ Connected to SQLite.")
-        
-        # ULTRA FAST QUERY (No Joins)
-        # We query ONLY the tracks table to ensure instant start.
-        # Audio features will be mocked as 0.5 temporarily so we can test the Search API.
-        query = "SELECT id, name FROM tracks"
-        
-        print(f"⚡ Executing Query (Stream mode, SINGLE TABLE)...")
-        cursor = sqlite_conn.cursor()
-        cursor.execute(query)
-        
-        count = 0
-        total_batches = 0
-        
-        while True:
-            # Fetch Batch
-            rows = cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-                
-            clean_rows = []
-            for r in rows:
-                # r = (id, name)
-                track_id = r[0]
-                name = r[1]
-                
-                # Mock Data for missing columns
-                artist = "Unknown Artist" 
-                dance = 0.5
-                energy = 0.5
-                valence = 0.5
-                tempo_norm = 0.5
-                acoustic = 0.5
-                tempo_raw = 120.0
-                
-                embedding = [dance, energy, valence, tempo_norm, acoustic]
-                
-                clean_rows.append((
-                    track_id, 
-                    name, 
-                    artist, 
-                    dance, 
-                    energy, 
-                    valence, 
-                    tempo_raw, 
-                    acoustic, 
-                    str(embedding)
-                ))
-            
-            # Insert Batch
-            with pg_conn.cursor() as cur:
-                with cur.copy("COPY tracks (track_id, name, artist, danceability, energy, valence, tempo, acousticness, audio_embedding) FROM STDIN") as copy:
-                    for row in clean_rows:
-                        copy.write_row(row)
-                        
-            count += len(rows)
-            total_batches += 1
-            if total_batches % 1 == 0: # Print every batch
-                print(f"   🚀 Inserted {count} rows... (Last valid: {clean_rows[0][1]})", flush=True)
-
-    except Exception as e:
-        print(f"❌ Error during seed: {e}")
-    finally:
-        if 'sqlite_conn' in locals(): sqlite_conn.close()
-        if 'pg_conn' in locals(): pg_conn.close()
-        print(f"🏁 Finished. Total Rows: {count}")
+    # 2. Stream SQLite -> Postgres: read, mock and COPY rowid ranges concurrently
+    # Audio features are mocked as 0.5 temporarily so we can test the Search API.
+    run = start_run(PG_DSN, "fast_seed", resume=resume, table="tracks")
+    ranges = run.pending(rowid_ranges(SQLITE_DB, "tracks", BATCH_SIZE), key=range_key)
+    print(f"⚡ Copying {len(ranges)} rowid ranges with {INGEST_WORKERS} workers (SINGLE TABLE)...")
+    # Each range is checkpointed in the transaction that COPYs it
+    load = copy_loader(PG_DSN, on_commit=lambda conn, bounds, df: record_checkpoint(
+        conn, run.run_id, range_key(bounds), bounds[1], df.height))
+    # Indexes are dropped for the load and rebuilt once at the end (see etl/bulk_load.py)
+    with bulk_load(PG_DSN, "tracks"):
+        summary = run_pipeline(sqlite_ranges(SQLITE_DB, RANGE_QUERY, RANGE_SCHEMA, ranges), mock_features, load)
+    print_pipeline_summary(summary)
+    run.finish()
+    refresh_after_load(PG_DSN)
+    print(f"🏁 Finished. Total Rows: {summary['rows']}")
 
 if __name__ == "__main__":
-    run_seed()
+    import argparse
+    parser = argparse.ArgumentParser(description="Fast seed of track ids and names (mocked features).")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                        help="Resume the latest unfinished run (or RUN_ID) from its checkpoints")
+    run_seed(parser.parse_args().resume)
@@ -1,4 +1,3 @@
-import sqlite3
 import polars as pl
 import os
 import sys
@@ -15,11 +14,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Let's try to fix the import dynamically
 try:
-    from backend.scripts.etl.ingest_data import insert_data, init_db
+    from backend.scripts.etl.ingest_data import load_partition, init_db, DB_CONN_STRING
+    from backend.scripts.etl.bulk_load import bulk_load
+    from backend.scripts.etl.centroids import refresh_after_load
+    from backend.scripts.etl.parallel_copy import INGEST_WORKERS, rowid_ranges
+    from backend.scripts.etl.pipeline import print_pipeline_summary, run_pipeline, sqlite_ranges
+    from backend.scripts.etl.checkpoints import start_run
+    from backend.scripts.etl.stage_parquet import (
+        TRACKS_SCHEMA, flattened_tracks_sql, stage_available, track_slices, read_track_slice,
+    )
 except ImportError:
     # Fallback if running from within scripts folder
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'etl'))
-    from ingest_data import insert_data, init_db
+    from ingest_data import load_partition, init_db, DB_CONN_STRING
+    from bulk_load import bulk_load
+    from centroids import refresh_after_load
+    from parallel_copy import INGEST_WORKERS, rowid_ranges
+    from pipeline import print_pipeline_summary, run_pipeline, sqlite_ranges
+    from checkpoints import start_run
+    from stage_parquet import TRACKS_SCHEMA, flattened_tracks_sql, stage_available, track_slices, read_track_slice
 
 """
 Script: seed.py
@@ -29,91 +42,92 @@ Description:
     
     It performs a complex JOIN on tracks, artists, and audio_features.
 
+    The source is split into rowid ranges of `tracks`. Reading, transforming
+    and COPYing run as concurrent pipeline stages (see scripts/etl/pipeline.py):
+    INGEST_WORKERS processes (default 4) read ranges while INGEST_WORKERS
+    connections load the ranges already read. A failed range is retried; one
+    that keeps failing stops the run, which `--resume` then continues.
+
+    If the Parquet staging layer exists (`staging/`, see
+    scripts/etl/stage_parquet.py) it is read instead of SQLite: partitions are
+    row-group slices of the staged files and no join runs at all.
+
+    Every committed range is checkpointed in the same transaction
+    (scripts/etl/checkpoints.py); `--resume` continues an interrupted run with
+    the ranges that are still missing.
+
 Usage:
     This is the "Heavy" seeder. 
+    python backend/scripts/seeding/seed.py [--resume [RUN_ID]]
     For quick development, use `dev_seed.py` instead.
 """
 
 # Configuration
 SQLITE_DB_PATH = "spotify.sqlite"
+STAGE_DIR = "staging"
+PARTITION_ROWS = 100_000  # tracks rowids per partition (one transaction each)
+
+# FULL FIDELITY QUERY
+# Joins Tracks, Artists, Albums and Audio Features (shared with the stage, see
+# stage_parquet.py), one rowid range at a time.
+RANGE_QUERY = flattened_tracks_sql("WHERE t.rowid BETWEEN ? AND ?")
+
+def range_key(bounds) -> str:
+    return f"rowid {bounds[0]}-{bounds[1]}"
 
-def read_sqlite_data():
+def slice_key(task) -> str:
+    path, offset, length = task
+    return f"{os.path.relpath(path, STAGE_DIR)}@{offset}"
+
+def stage_slices(parts):
+    """Pipeline source: the row-group slices of the Parquet stage, keyed by slice."""
+    for part in parts:
+        df_chunk = read_track_slice(part)
+        if df_chunk.height:
+            yield part, df_chunk
+
+def read_stage_data(workers: int = INGEST_WORKERS, run=None):
+    """Loads the staged tracks, one slice per batch, over `workers` connections."""
+    print(f"📦 Reading the Parquet stage: {STAGE_DIR}/")
+    parts = track_slices(STAGE_DIR)
+    if run:
+        parts = run.pending(parts, key=slice_key)
+    run_id = run.run_id if run else None
+    print(f"⚡ Loading {len(parts)} slices with {workers} workers...")
+    # COPY + checkpoint, one transaction per slice
+    summary = run_pipeline(stage_slices(parts), transform_data,
+                           lambda part, df: load_partition(df, run_id, slice_key(part)), load_workers=workers)
+    print_pipeline_summary(summary)
+    if run:
+        run.finish()
+    return summary
+
+def read_sqlite_data(workers: int = INGEST_WORKERS, run=None):
     """
-    Reads data from SQLite into a Polars DataFrame.
-    Handles JOINs and text encoding issues.
+    Streams the SQLite source into Postgres, one rowid range per batch: read by
+    `workers` processes, loaded over `workers` connections. Ranges `run`
+    already committed are skipped.
     """
     print(f"📂 Connecting to SQLite: {SQLITE_DB_PATH}...")
     
     if not os.path.exists(SQLITE_DB_PATH):
         raise FileNotFoundError(f"❌ Could not find {SQLITE_DB_PATH}. Please download it (check README.md) and place it in the backend/ directory.")
 
-    conn = sqlite3.connect(SQLITE_DB_PATH)
-    
-    # 🛠️ Fix Encoding Issues: Ignore bad bytes
-    conn.text_factory = lambda b: b.decode(errors="ignore")
-    
-    # JOIN Query
-    # Based on schema:
-    # tracks(id, name, ...)
-    # audio_features(id, danceability, ...)
-    # r_track_artist(track_id, artist_id)
-    # artists(id, name)
-    
-    # Note: We take the first artist for simplicity if multiple exist
-    # FULL FIDELITY QUERY
-    # Joins Tracks, Artists, and Audio Features for complete data.
-    # Note: This might take 1-2 minutes to start streaming due to the large JOIN.
-    query = """
-    SELECT 
-        t.id as track_id,
-        t.name as name,
-        a.name as artist,
-        af.danceability,
-        af.energy,
-        af.valence,
-        af.tempo,
-        af.acousticness
-    FROM tracks t
-    JOIN audio_features af ON t.id = af.id
-    JOIN r_track_artist rta ON t.id = rta.track_id
-    JOIN artists a ON rta.artist_id = a.id
-    GROUP BY t.id
-    """
-    
-    print("⚡ Reading data from SQLite (fetching via cursor for safe encoding)...")
-    
-    # Instead of loading everything into memory (8M is too big for simple lists), 
-    # we will stream: SQLite -> Chunk -> Polars -> Insert -> Repeat
-    
-    print("⚡ Streaming data from SQLite (Querying 8M rows with JOINs, please wait)...")
-    cursor = conn.cursor()
-    
-    try:
-        cursor.execute(query)
-        
-        columns = ["track_id", "name", "artist", "danceability", "energy", "valence", "tempo", "acousticness"]
-        BATCH_SIZE = 10000
-        total_processed = 0
-        
-        while True:
-            rows = cursor.fetchmany(BATCH_SIZE)
-            if not rows:
-                break
-                
-            # Create small DF for transformation
-            df_chunk = pl.DataFrame(rows, schema=columns, orient="row")
-            
-            # Transform
-            df_clean = transform_data(df_chunk)
-            
-            # Insert (We call insert_data per chunk)
-            insert_data(df_clean)
-            
-            total_processed += len(rows)
-            print(f"   🚀 Processed total: {total_processed} rows...")
-
-    finally:
-        conn.close()
+    ranges = rowid_ranges(SQLITE_DB_PATH, "tracks", PARTITION_ROWS)
+    if run:
+        ranges = run.pending(ranges, key=range_key)
+    run_id = run.run_id if run else None
+    print(f"⚡ Loading {len(ranges)} rowid ranges with {workers} workers...")
+    summary = run_pipeline(
+        sqlite_ranges(SQLITE_DB_PATH, RANGE_QUERY, TRACKS_SCHEMA, ranges, processes=workers),
+        transform_data,
+        lambda bounds, df: load_partition(df, run_id, range_key(bounds), last_key=bounds[1]),
+        load_workers=workers,
+    )
+    print_pipeline_summary(summary)
+    if run:
+        run.finish()
+    return summary
 
 def transform_data(df: pl.DataFrame):
     """
@@ -134,6 +148,11 @@ def transform_data(df: pl.DataFrame):
     )
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Seed Postgres from the full spotify.sqlite dump.")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                        help="Resume the latest unfinished run (or RUN_ID) from its checkpoints")
+    args = parser.parse_args()
     try:
         # 1. Init DB
         try:
@@ -141,8 +160,14 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"⚠️  DB Init warning: {e}")
 
-        # 2. Pipeline: Read -> Transform -> Insert (Streamed)
-        read_sqlite_data()
+        # 2. Pipeline: Read -> Transform -> Insert (Streamed), indexes built afterwards
+        run = start_run(DB_CONN_STRING, "seed", resume=args.resume, table="tracks")
+        with bulk_load(DB_CONN_STRING, "tracks"):
+            if stage_available(STAGE_DIR):
+                read_stage_data(run=run)
+            else:
+                read_sqlite_data(run=run)
+        refresh_after_load(DB_CONN_STRING)
         
     except Exception as e:
         print(f"❌ Seeding Failed: {e}")
@@ -0,0 +1,63 @@
+from benchmarks.stats import summarize
+from benchmarks.compare import compare
+
+
+def test_summarize_percentiles_and_qps():
+    stats = summarize([float(ms) for ms in range(1, 101)], elapsed_s=2.0, errors=3)
+
+    assert stats["count"] == 100
+    assert stats["errors"] == 3
+    assert stats["qps"] == 50.0
+    assert stats["p50_ms"] == 50.5
+    assert stats["max_ms"] == 100.0
+
+
+def test_summarize_without_successes():
+    assert summarize([], elapsed_s=1.0, errors=5) == {"count": 0, "errors": 5, "qps": 0.0}
+
+
+def test_compare_flags_p95_and_qps_regressions():
+    def run(p95, qps):
+        return {"count": 100, "p50_ms": 5.0, "p95_ms": p95, "p99_ms": 20.0, "qps": qps}
+
+    old = {"results": {"similar": run(10.0, 200.0), "search": run(10.0, 200.0)}}
+    new = {"results": {"similar": run(12.0, 200.0), "search": run(10.5, 150.0)}}
+
+    regressed = {(scenario, metric) for scenario, metric, *_, flag in compare(old, new, 10.0) if flag}
+
+    assert regressed == {("similar", "p95_ms"), ("search", "qps")}
+
+
+def test_loadtest_counts_queueing_against_response_time():
+    """With one slot and a slow server, queued journeys must show it in their latency."""
+    import asyncio
+    import httpx
+    from benchmarks.loadtest import JourneyData, run_load, render_html
+
+    track = {"id": "t1", "name": "blue night"}
+
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        if request.url.path == "/tracks/search":
+            return httpx.Response(200, json={"tracks": [track]})
+        if request.url.path.endswith("/similar"):
+            return httpx.Response(200, json=[{"id": "t2"}, {"id": "t3"}])
+        if request.url.path == "/recommendations/tracks":
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=track)
+
+    async def go():
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await run_load(client, JourneyData(["blue"], 3), rate=40, concurrency=1, duration=0.5, warmup=0)
+
+    results = asyncio.run(go())
+
+    assert results["journeys"] > 0
+    search = results["steps"]["search"]
+    assert search["errors"] == 0
+    # Service time is ~10ms, but arrivals (40/s) outpace one slot doing 5 x 10ms journeys
+    assert search["p99_ms"] > 3 * search["service_p99_ms"]
+
+    html = render_html({"meta": {"commit": "abc"}, "results": results})
+    assert "recommend" in html and "<svg" in html
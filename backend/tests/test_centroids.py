@@ -0,0 +1,188 @@
+import re
+from types import SimpleNamespace
+
+import polars as pl
+from fastapi.testclient import TestClient
+
+from app import database
+from app.main import app
+from scripts.etl import centroids
+
+
+class FakeCopy:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def write_row(self, row):
+        self.sink.append(tuple(row))
+
+    def write(self, data):
+        self.sink.extend(tuple(line.split(",")) for line in data.splitlines())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    """Records statements and COPYed rows; to_regclass() answers from `tables`, the link counts from `counts`."""
+
+    def __init__(self, tables=(), columns=(), counts=(0, 0)):
+        self.tables = set(tables)
+        self.columns = set(columns)
+        self.counts = counts
+        self.statements = []
+        self.copied = []
+        self.row = None
+        self.rowcount = counts[0]
+        self.committed = False
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self.row = self.counts
+        match = re.search(r"to_regclass\('(\w+)'\)", sql)
+        if match:
+            column = re.search(r"table_name = '(\w+)' AND column_name = '(\w+)'", sql)
+            self.row = (match.group(1) in self.tables and (not column or column.groups() in self.columns),)
+        return self
+
+    def fetchone(self):
+        return self.row
+
+    def copy(self, sql):
+        self.statements.append(sql)
+        return FakeCopy(self.copied)
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.committed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_centroid_from_sum_divides_element_wise_in_order():
+    sql = centroids.CENTROID_FROM_SUM.format(sum="a.embedding_sum", count="a.track_count")
+    assert sql == ("ARRAY(SELECT x / a.track_count FROM unnest((a.embedding_sum)::real[]) "
+                   "WITH ORDINALITY AS u(x, i) ORDER BY i)::vector")
+
+
+def test_album_centroids_only_fold_in_links_that_were_inserted():
+    conn = FakeConnection(counts=(2, 1))
+    assert centroids.add_album_tracks(conn, [("al1", "t1"), ("al1", "t2")]) == (2, 1)
+    assert conn.copied == [("al1", "t1"), ("al1", "t2")]
+
+    apply = conn.statements[-1]
+    assert "ON CONFLICT DO NOTHING RETURNING album_id, track_id" in apply
+    assert "FROM inserted i JOIN tracks t ON t.track_id = i.track_id" in apply
+    assert "track_count = a.track_count + d.n" in apply
+
+    frames = FakeConnection(counts=(3, 2))
+    batches = [pl.DataFrame({"album_id": ["al1", "al2"], "track_id": ["t1", "t2"]}),
+               pl.DataFrame({"track_id": ["t3"], "album_id": ["al2"]})]
+    assert centroids.add_album_track_frames(frames, batches) == (3, 2)
+    assert frames.copied == [("al1", "t1"), ("al2", "t2"), ("al2", "t3")]
+    assert frames.statements[-1] == apply
+
+
+def test_linking_after_a_load_skips_schemas_without_albums():
+    bare = FakeConnection(tables={"tracks"})
+    assert centroids.link_new_album_tracks(bare) == (0, 0)
+    assert not any("album_tracks (" in s or "ALTER TABLE" in s for s in bare.statements)
+
+    albums = FakeConnection(tables={"album_tracks"}, columns={("tracks", "album_id")}, counts=(5, 2))
+    assert centroids.link_new_album_tracks(albums) == (5, 2)
+    assert any("ADD COLUMN IF NOT EXISTS embedding_sum" in s for s in albums.statements)
+    assert "t.album_id IS NOT NULL" in " ".join(albums.statements)
+
+
+def test_artist_centroids_fold_tracks_in_and_out_by_sign():
+    assert centroids.update_artist_centroids(FakeConnection(), []) == 0
+
+    added = FakeConnection(counts=(4, 0))
+    assert centroids.update_artist_centroids(added, ["t1", "t2"]) == 4
+    assert len(added.statements) == 1
+    assert "SELECT d.artist, 1 * d.n, d.s," in added.statements[0]
+
+    removed = FakeConnection()
+    centroids.update_artist_centroids(removed, ["t1"], sign=-1)
+    assert f"SELECT d.artist, -1 * d.n, ({centroids.ZERO_VECTOR} - d.s)," in removed.statements[0]
+    assert removed.statements[1].startswith("DELETE FROM artist_centroids WHERE track_count <= 0")
+
+
+def test_every_load_ends_with_a_full_artist_centroid_build(monkeypatch):
+    conn = FakeConnection(tables={"tracks"}, counts=(7, 0))
+    monkeypatch.setattr(centroids.psycopg, "connect", lambda dsn: conn)
+    centroids.refresh_after_load("postgresql://test")
+
+    truncate = conn.statements.index("TRUNCATE artist_centroids")
+    assert any("CREATE TABLE IF NOT EXISTS artist_centroids" in s for s in conn.statements[:truncate])
+    assert conn.statements[truncate + 1].startswith(
+        "INSERT INTO artist_centroids (artist, track_count, embedding_sum, centroid)")
+    assert "GROUP BY trim(a)" in conn.statements[truncate + 1]
+    assert conn.committed
+
+
+class FakeSession:
+    """Answers each db.execute() in turn from `results` (a row or a list of rows)."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        result = self.results.pop(0) if self.results and not str(statement).startswith("SET") else None
+        return SimpleNamespace(fetchone=lambda: result, fetchall=lambda: result)
+
+
+def call(path, session, **kwargs):
+    app.dependency_overrides[database.get_db] = lambda: session
+    try:
+        client = TestClient(app)
+        return client.post(path, **kwargs) if "json" in kwargs else client.get(path, **kwargs)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_similar_albums_skip_albums_without_a_centroid():
+    assert call("/albums/missing/similar", FakeSession(None)).status_code == 404
+    assert call("/albums/empty/similar", FakeSession(SimpleNamespace(avg_embedding=None))).json() == []
+
+    row = SimpleNamespace(album_id="al2", name="Second", artist="X", popularity=40, track_count=3, distance=0.5)
+    session = FakeSession(SimpleNamespace(avg_embedding="[0.5,0.5,0.5,0.5,0.5]"), [row])
+    response = call("/albums/al1/similar", session)
+
+    assert response.json() == [{"id": "al2", "name": "Second", "artist": "X", "popularity": 40,
+                                "track_count": 3, "similarity": 0.75}]
+    assert "avg_embedding IS NOT NULL" in session.statements[-1]
+
+
+def test_albums_like_tracks_need_valid_seed_tracks():
+    assert call("/albums/similar", FakeSession(), json={"track_ids": []}).status_code == 400
+    assert call("/albums/similar", FakeSession(SimpleNamespace(centroid=None)),
+                json={"track_ids": ["t1"]}).status_code == 404
+
+    session = FakeSession(SimpleNamespace(centroid="[0.5,0.5,0.5,0.5,0.5]"), [])
+    assert call("/albums/similar", session, json={"track_ids": ["t1"]}).json() == []
+    assert "a.avg_embedding IS NOT NULL" in session.statements[-1]
+
+
+def test_similar_artists_are_read_from_the_centroid_table():
+    assert call("/artists/Nobody/similar", FakeSession(None)).status_code == 404
+    assert call("/artists/Empty/similar", FakeSession(SimpleNamespace(centroid=None))).status_code == 404
+
+    row = SimpleNamespace(artist="Other", track_count=12, distance=0.2)
+    session = FakeSession(SimpleNamespace(centroid="[0.5,0.5,0.5,0.5,0.5]"), [row])
+    response = call("/artists/Someone/similar", session, params={"limit": 5})
+
+    assert response.json() == [{"artist": "Other", "track_count": 12, "similarity": 0.9}]
+    assert "FROM artist_centroids WHERE artist != :artist" in session.statements[-1]
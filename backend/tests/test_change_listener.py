@@ -0,0 +1,34 @@
+import json
+
+from app import change_listener
+from app.cache import TTLCache, trending_cache, hot_tracks_cache, autocomplete_cache
+
+
+def test_ttl_cache_pop():
+    cache = TTLCache("pop_test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    assert len(cache) == 0
+
+
+def test_parse_notification():
+    payload = json.dumps({"run_id": "abc", "insert": 1, "update": 2, "delete": 0})
+    assert change_listener.parse_notification(payload)["run_id"] == "abc"
+    assert change_listener.parse_notification("not json") == {}
+    assert change_listener.parse_notification(json.dumps({"insert": 1})) == {}
+
+
+def test_evict_changed_drops_changed_tracks_and_listings():
+    hot_tracks_cache.clear()
+    hot_tracks_cache.set("t1", {"id": "t1"})
+    hot_tracks_cache.set("t2", {"id": "t2"})
+    trending_cache.set(10, [{"id": "t1"}])
+    autocomplete_cache.set(("ta", 5), [])
+
+    assert change_listener.evict_changed(["t1", "t3"]) == 1
+    assert hot_tracks_cache.get("t1") is None
+    assert hot_tracks_cache.get("t2") == {"id": "t2"}
+    assert len(trending_cache) == 0
+    assert len(autocomplete_cache) == 0
+    hot_tracks_cache.clear()
@@ -0,0 +1,31 @@
+from scripts.etl.checkpoints import EtlRun, record_checkpoint
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((" ".join(sql.split()), params))
+
+
+def test_record_checkpoint_accumulates_rows_and_is_a_noop_without_a_run():
+    conn = RecordingConnection()
+    record_checkpoint(conn, None, "rowid 1-100", 100, 100)
+    assert conn.statements == []
+
+    record_checkpoint(conn, "seed-1", "rowid 1-100", 100, 100)
+    sql, params = conn.statements[0]
+    assert "ON CONFLICT (run_id, partition) DO UPDATE" in sql
+    assert "rows = etl_checkpoints.rows + EXCLUDED.rows" in sql
+    assert params == ("seed-1", "rowid 1-100", "100", 100)
+
+
+def test_resumed_run_exposes_committed_keys():
+    fresh = EtlRun("postgresql://unused", "seed-1", "seed", {})
+    assert not fresh.resumed
+    assert fresh.last_key("stream") is None
+
+    resumed = EtlRun("postgresql://unused", "seed-1", "seed", {"stream": "3000"})
+    assert resumed.resumed
+    assert int(resumed.last_key("stream")) == 3000
@@ -0,0 +1,45 @@
+import os
+import sqlite3
+
+from scripts.etl import create_dev_db
+from scripts.etl.generate_synthetic_db import generate_database
+
+
+def test_sharded_extraction_merges_in_order_and_stops_at_the_limit(tmp_path, monkeypatch):
+    source = str(tmp_path / "spotify.sqlite")
+    generate_database(source, total_tracks=6000, seed=5)
+    monkeypatch.setattr(create_dev_db, "SHARD_ROWS", 1000)
+
+    dst = sqlite3.connect(str(tmp_path / "dev.sqlite"))
+    dst.execute(create_dev_db.DEV_TRACKS_DDL)
+    count = create_dev_db.extract_sharded(source, dst, limit=2500, workers=2)
+
+    ids = [r[0] for r in dst.execute("SELECT track_id FROM dev_tracks ORDER BY rowid")]
+    expected = [r[0] for r in sqlite3.connect(source).execute(
+        "SELECT id FROM tracks WHERE rowid <= 3000 ORDER BY rowid"
+    )]
+    assert count == len(ids) == 2500
+    assert set(ids) <= set(expected)
+    # Shards are merged in rowid order: all of the first two shards, half of the third
+    assert set(expected[:2000]) <= set(ids)
+    assert not [f for f in os.listdir(tmp_path) if f.startswith("dev_db_shards_")]
+
+
+def test_stage_extraction_takes_the_most_popular_tracks(tmp_path, monkeypatch):
+    from scripts.etl import stage_parquet
+
+    source = str(tmp_path / "spotify.sqlite")
+    generate_database(source, total_tracks=3000, seed=7)
+    stage = str(tmp_path / "staging")
+    stage_parquet.build_stage(source, stage, workers=2)
+    target = str(tmp_path / "dev.sqlite")
+    monkeypatch.setattr(create_dev_db, "TARGET_DB", target)
+    monkeypatch.setattr(create_dev_db, "LIMIT", 200)
+
+    create_dev_db.create_dev_db_from_stage(stage)
+
+    rows = sqlite3.connect(target).execute("SELECT track_id, popularity FROM dev_tracks ORDER BY rowid").fetchall()
+    expected = (stage_parquet.scan_tracks(stage)
+                .sort(["popularity", "track_id"], descending=[True, False], nulls_last=True)
+                .head(200).select("track_id", "popularity").collect())
+    assert rows == expected.rows()
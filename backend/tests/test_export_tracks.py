@@ -0,0 +1,64 @@
+import os
+
+import polars as pl
+import pytest
+
+from scripts.etl import export_tracks
+
+COLUMNS = {
+    "track_id": "text", "name": "text", "genre": "text", "popularity": "integer",
+    "energy": "double precision", "audio_embedding": "USER-DEFINED",
+}
+
+
+def test_spec_binds_filters_and_skips_vectors_by_default():
+    spec = export_tracks.build_spec(COLUMNS, filters=["popularity>=50", "genre = rock"])
+    sql, params = export_tracks.range_query(spec, (8, 16))
+
+    assert list(spec["schema"]) == ["track_id", "name", "genre", "popularity", "energy"]
+    assert sql == ("SELECT track_id, name, genre, popularity, energy FROM tracks "
+                   "WHERE popularity >= %s AND genre = %s AND ctid >= %s::tid AND ctid < %s::tid")
+    assert params == [50, "rock", "(8,0)", "(16,0)"]
+
+    vectors = export_tracks.build_spec(COLUMNS, ["track_id", "audio_embedding"])
+    assert vectors["select"] == "track_id, audio_embedding::text AS audio_embedding"
+
+
+def test_spec_rejects_unknown_columns_and_malformed_filters():
+    with pytest.raises(ValueError, match="Unknown columns"):
+        export_tracks.build_spec(COLUMNS, ["track_id; DROP TABLE tracks"])
+    with pytest.raises(ValueError, match="Unknown column in filter"):
+        export_tracks.build_spec(COLUMNS, filters=["1=1 OR popularity>0"])
+    with pytest.raises(ValueError, match="Bad filter"):
+        export_tracks.build_spec(COLUMNS, filters=["popularity"])
+
+
+def test_page_ranges_cover_the_table_and_leave_the_end_open():
+    assert export_tracks.page_ranges(10, 3) == [(0, 4), (4, 8), (8, None)]
+    assert export_tracks.page_ranges(0, 4) == [(0, None)]
+
+
+def test_partitioned_batches_read_back_as_one_hive_dataset(tmp_path):
+    output = str(tmp_path / "export")
+    first = pl.DataFrame({"track_id": ["a", "b", "c"], "genre": ["rock", "pop", None]})
+    second = pl.DataFrame({"track_id": ["d"], "genre": ["rock"]})
+    export_tracks.write_batch(first, "parquet", output, "part-00000-00000", "genre")
+    export_tracks.write_batch(second, "parquet", output, "part-00000-00001", "genre")
+
+    assert sorted(os.listdir(output)) == ["genre=__HIVE_DEFAULT_PARTITION__", "genre=pop", "genre=rock"]
+    df = pl.scan_parquet(os.path.join(output, "**", "*.parquet"), hive_partitioning=True).collect()
+    assert sorted(df.filter(pl.col("genre") == "rock")["track_id"].to_list()) == ["a", "d"]
+
+    export_tracks.write_batch(first, "ipc", output, "part-00001-00000")
+    assert pl.read_ipc(os.path.join(output, "part-00001-00000.arrow")).equals(first)
+
+
+def test_partition_values_are_escaped_and_stay_inside_the_output(tmp_path):
+    output = str(tmp_path / "export")
+    df = pl.DataFrame({"track_id": ["a", "b", "c"], "artist": ["AC/DC", "../../escape", "50% = half"]})
+    export_tracks.write_batch(df, "parquet", output, "part-00000-00000", "artist")
+
+    assert sorted(os.listdir(output)) == ["artist=..%2F..%2Fescape", "artist=50%25 %3D half", "artist=AC%2FDC"]
+    assert not os.path.exists(tmp_path / "escape")
+    back = pl.scan_parquet(os.path.join(output, "**", "*.parquet"), hive_partitioning=True).collect()
+    assert sorted(back.rows()) == sorted(df.rows())
@@ -0,0 +1,84 @@
+import re
+
+from scripts.etl import incremental
+
+
+class FakeResult:
+    def __init__(self, row=None):
+        self.row = row
+
+    def fetchone(self):
+        return self.row
+
+    def __iter__(self):
+        return iter([])
+
+
+class FakeConnection:
+    """Records statements; to_regclass() answers from `tables`, everything else returns no rows."""
+
+    def __init__(self, tables=()):
+        self.tables = set(tables)
+        self.statements = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        match = re.search(r"to_regclass\('(\w+)'\)", sql)
+        if match:
+            return FakeResult((match.group(1) if match.group(1) in self.tables else None,))
+        return FakeResult()
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_content_hash_covers_every_data_column():
+    assert incremental.content_hash("s") == (
+        "md5(ROW(s.name, s.artist, s.danceability, s.energy, s.valence, s.tempo, s.acousticness, "
+        "s.audio_embedding)::text)"
+    )
+
+
+def test_upsert_inserts_and_updates_the_same_columns():
+    sql = " ".join(incremental.upsert_sql().split())
+    insert_columns = re.search(r"INSERT INTO tracks \((.*?)\) SELECT", sql).group(1).split(", ")
+    select_list = re.search(r"SELECT (.*?) FROM _stage_tracks", sql).group(1)
+    updated = re.findall(r"(\w+) = EXCLUDED\.(\w+)", sql)
+
+    assert insert_columns == ["track_id", *incremental.DATA_COLUMNS, "content_hash"]
+    assert select_list.startswith("s.track_id, " + ", ".join(f"s.{c}" for c in incremental.DATA_COLUMNS))
+    assert select_list.endswith(incremental.content_hash("s"))
+    assert updated == [(c, c) for c in incremental.DATA_COLUMNS + ["content_hash"]]
+
+
+def test_schema_creates_and_builds_missing_artist_centroids():
+    conn = FakeConnection()
+    incremental.ensure_incremental_schema(conn)
+    assert any("CREATE TABLE IF NOT EXISTS artist_centroids" in s for s in conn.statements)
+    assert "TRUNCATE artist_centroids" in conn.statements
+
+    existing = FakeConnection(tables={"artist_centroids"})
+    incremental.ensure_incremental_schema(existing)
+    assert "TRUNCATE artist_centroids" not in existing.statements
+
+
+def test_changes_fold_old_rows_out_before_writing_and_new_rows_in_after():
+    conn = FakeConnection()
+    incremental.apply_changes(conn, {"insert": ["a"], "update": ["b"], "delete": ["c"]}, "run-1")
+
+    def position(fragment):
+        return next(i for i, s in enumerate(conn.statements) if fragment in s)
+
+    fold_out = position("SELECT d.artist, -1 * d.n")
+    delete = position("DELETE FROM tracks")
+    upsert = position("INSERT INTO tracks")
+    fold_in = position("SELECT d.artist, 1 * d.n")
+    assert fold_out < delete < upsert < fold_in < position("pg_notify")
@@ -2,7 +2,7 @@ import os
 import pytest
 import polars as pl
 import tempfile
-from scripts.ingest_data import process_data
+from scripts.etl.ingest_data import process_data, format_copy_block
 
 # Sample CSV content mimicking the Kaggle dataset structure
 SAMPLE_CSV_CONTENT = """track_id,name,artist,danceability,energy,valence,tempo,acousticness,instrumentalness,liveness,speechiness,garage
@@ -45,3 +45,63 @@ def test_process_data_missing_file():
     """Verifies that FileNotFoundError is raised for non-existent path."""
     with pytest.raises(Exception): # polars might raise ComputeError or we raise FileNotFoundError
         process_data(csv_path="non_existent.csv")
+
+def test_copy_block_escapes_text_and_formats_embedding(temp_csv_file):
+    """COPY text payload: tab-separated, escaped strings, \\N for NULL, pgvector literal last."""
+    df = process_data(csv_path=temp_csv_file).sort("track_id")
+    df = df.with_columns(
+        pl.when(pl.col("track_id") == "t1").then(pl.lit("Tab\tand\\slash")).otherwise(pl.col("name")).alias("name"),
+        pl.when(pl.col("track_id") == "t2").then(None).otherwise(pl.col("artist")).alias("artist"),
+    )
+
+    lines = format_copy_block(df).split("\n")
+
+    assert len(lines) == 4 and lines[-1] == ""
+    assert lines[0].split("\t") == [
+        "t1", "Tab\\tand\\\\slash", "Artist A", "0.5", "0.8", "0.3", "120.0", "0.1", "[0.5,0.8,0.3,0.48,0.1]",
+    ]
+    assert lines[1].split("\t")[2] == "\\N"
+    assert format_copy_block(df.head(0)) == ""
+
+def test_load_partition_only_copies_and_checkpoints(temp_csv_file, monkeypatch):
+    """Batches commit concurrently, so they must not upsert shared artist_centroids rows."""
+    from scripts.etl import ingest_data
+
+    class FakeConnection:
+        def __init__(self):
+            self.copies, self.statements, self.commits = [], [], 0
+
+        def cursor(self):
+            return self
+
+        def copy(self, sql):
+            self.copies.append(sql)
+            return self
+
+        def write(self, data):
+            pass
+
+        def execute(self, sql, params=None):
+            self.statements.append(sql)
+
+        def commit(self):
+            self.commits += 1
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    conn = FakeConnection()
+    checkpoints = []
+    monkeypatch.setattr(ingest_data, "worker_connection", lambda dsn: conn)
+    monkeypatch.setattr(ingest_data, "record_checkpoint", lambda *args: checkpoints.append(args[1:]))
+
+    df = process_data(csv_path=temp_csv_file).sort("track_id")
+    assert ingest_data.load_partition(df, "run-1", "offset 0") == 3
+
+    assert len(conn.copies) == 1 and conn.copies[0].startswith("COPY tracks (")
+    assert conn.statements == []
+    assert checkpoints == [("run-1", "offset 0", "t3", 3)]
+    assert conn.commits == 1
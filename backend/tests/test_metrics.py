@@ -0,0 +1,59 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app import metrics
+
+
+def make_app():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+
+    app = FastAPI()
+    app.middleware("http")(metrics.metrics_middleware)
+
+    @app.get("/things/{thing_id}")
+    def get_thing(thing_id: str):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {"id": thing_id}
+
+    return app
+
+
+def sample(rendered: str, prefix: str) -> float:
+    for line in rendered.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{prefix} not found")
+
+
+def test_requests_and_db_time_are_labelled_by_route_template():
+    client = TestClient(make_app())
+    before = metrics.render()
+    client.get("/things/a")
+    client.get("/things/b")
+    client.get("/missing")
+    rendered = metrics.render()
+
+    def delta(prefix):
+        try:
+            old = sample(before, prefix)
+        except AssertionError:
+            old = 0.0
+        return sample(rendered, prefix) - old
+
+    assert delta('http_requests_total{method="GET",route="/things/{thing_id}",status="200"}') == 2
+    assert delta('http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert delta('db_queries_total{route="/things/{thing_id}"}') == 4
+    assert delta('db_time_per_request_seconds_count{route="/things/{thing_id}"}') == 2
+    assert delta('http_request_duration_seconds_bucket{method="GET",route="/things/{thing_id}",le="+Inf"}') == 2
+    assert sample(rendered, 'http_requests_in_flight{method="GET"}') == 0
+
+
+def test_cache_hit_ratio():
+    for hit in (True, True, True, False):
+        metrics.record_cache_lookup("test_cache", hit)
+
+    assert sample(metrics.render(), 'cache_hit_ratio{cache="test_cache"}') == 0.75
@@ -0,0 +1,51 @@
+import sqlite3
+import threading
+
+from scripts.etl import parallel_copy
+from scripts.etl.parallel_copy import rowid_ranges, run_partitions
+
+
+def square_rows(partition):
+    return partition * partition
+
+
+def test_partitions_are_retried_and_failures_reported(monkeypatch):
+    monkeypatch.setattr(parallel_copy, "RETRY_BACKOFF_S", 0)
+    attempts = {}
+    lock = threading.Lock()
+
+    def load(partition):
+        with lock:
+            attempts[partition] = attempts.get(partition, 0) + 1
+        if partition == "flaky" and attempts[partition] == 1:
+            raise RuntimeError("deadlock detected")
+        if partition == "broken":
+            raise RuntimeError("bad row")
+        return 10
+
+    summary = run_partitions(load, ["a", "flaky", "broken", "b"], workers=2, retries=2, key=str.upper)
+
+    assert summary["rows"] == 30
+    assert attempts == {"a": 1, "flaky": 2, "broken": 3, "b": 1}
+    assert summary["failed"] == [{"partition": "BROKEN", "error": "RuntimeError: bad row"}]
+    assert sum(w["partitions"] for w in summary["workers"].values()) == 4
+    assert sum(w["retries"] for w in summary["workers"].values()) == 3
+
+
+def test_process_pool_reports_per_worker_rows():
+    summary = run_partitions(square_rows, [1, 2, 3], workers=2, processes=True)
+
+    assert summary["rows"] == 14
+    assert summary["failed"] == []
+    assert sum(w["rows"] for w in summary["workers"].values()) == 14
+
+
+def test_rowid_ranges_cover_the_table(tmp_path):
+    path = str(tmp_path / "src.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE tracks (id TEXT)")
+    conn.executemany("INSERT INTO tracks VALUES (?)", [(str(i),) for i in range(25)])
+    conn.commit()
+    conn.close()
+
+    assert rowid_ranges(path, "tracks", 10) == [(1, 10), (11, 20), (21, 25)]
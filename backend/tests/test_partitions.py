@@ -0,0 +1,128 @@
+import sqlite3
+
+import pytest
+
+from app.partitions import GENRE_INDEX_PREFIX, genre_index_name, partition_filter
+from scripts.etl import partition_indexes
+
+
+def test_genre_index_names_are_distinct_stable_identifiers():
+    names = [genre_index_name(g) for g in ("hip hop", "hip-hop", "hip_hop", "a" * 100)]
+
+    assert len(set(names)) == len(names)
+    assert names[0] == genre_index_name("hip hop")
+    assert names[0].startswith(GENRE_INDEX_PREFIX + "hip_hop_")
+    assert all(len(n) <= 63 and n.replace("_", "").isalnum() for n in names)
+
+
+def test_partition_filter_inlines_predicates_and_checks_the_schema():
+    assert partition_filter() == ""
+    assert partition_filter(" Rock'n'Roll ", "hits") == (
+        " AND popularity BETWEEN 70 AND 100 AND genre = 'rock''n''roll'"
+    )
+    with pytest.raises(ValueError, match="Unknown popularity_tier"):
+        partition_filter(popularity_tier="viral")
+
+    columns = {"track_id", "audio_embedding", "popularity"}
+    assert partition_filter(popularity_tier="niche", columns=columns) == " AND popularity BETWEEN 15 AND 39"
+    with pytest.raises(ValueError, match="no 'genre' column"):
+        partition_filter(genre="rock", columns=columns)
+
+
+def test_track_genres_picks_the_most_widespread_artist_genre(tmp_path):
+    path = str(tmp_path / "spotify.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE r_track_artist (track_id TEXT, artist_id TEXT);
+        CREATE TABLE r_artist_genre (genre_id TEXT, artist_id TEXT);
+        INSERT INTO r_track_artist VALUES ('t1', 'a1'), ('t1', 'a2'), ('t2', 'a3'), ('t3', 'a4');
+        INSERT INTO r_artist_genre VALUES
+            ('Rock', 'a1'), ('Rock', 'a3'), ('Rock', 'a5'),
+            ('garage rock', 'a1'), ('garage rock', 'a2'), ('indie', 'a2');
+    """)
+    conn.commit()
+    conn.close()
+
+    rows = [row for batch in partition_indexes.track_genres(path) for row in batch]
+    assert sorted(rows) == [("t1", "rock"), ("t2", "rock")]
+
+    empty = str(tmp_path / "no_genres.sqlite")
+    sqlite3.connect(empty).close()
+    assert list(partition_indexes.track_genres(empty)) == []
+
+
+def test_similar_tracks_refuses_a_genre_filter_without_the_column(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import database
+    from app.main import app
+
+    monkeypatch.setattr(database, "_load_schema", lambda: {"tracks": [{"name": "track_id", "type": "text"}]})
+    database.invalidate_schema()
+    app.dependency_overrides[database.get_db] = lambda: None
+    try:
+        response = TestClient(app).get("/tracks/t1/similar", params={"genre": "rock"})
+    finally:
+        app.dependency_overrides.clear()
+        database.invalidate_schema()
+
+    assert response.status_code == 400
+    assert "genre" in response.json()["detail"]
+
+
+class FakeConnection:
+    """Answers the EXISTS checks from `missing` / `empty`, records statements and COPYed rows."""
+
+    def __init__(self, missing, empty):
+        self.answers = {"popularity IS NULL)": missing, "popularity IS NOT NULL)": empty}
+        self.statements, self.copied, self.rowcount = [], [], 0
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.statements.append(sql)
+        self.row = next(((v,) for k, v in self.answers.items() if sql.endswith(k)), None)
+        return self
+
+    def fetchone(self):
+        return self.row
+
+    def transaction(self):
+        return self
+
+    def cursor(self):
+        return self
+
+    def copy(self, sql):
+        return self
+
+    def write_row(self, row):
+        self.copied.append(row)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_missing_popularity_is_backfilled_or_fails_loudly(tmp_path):
+    path = str(tmp_path / "spotify.sqlite")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tracks (id TEXT, popularity INTEGER);
+        INSERT INTO tracks VALUES ('t1', 50), ('t1', 50), ('t2', NULL), ('t3', 7);
+    """)
+    conn.commit()
+    conn.close()
+
+    missing = FakeConnection(missing=True, empty=False)
+    partition_indexes.fill_popularity(missing, path)
+    assert sorted(missing.copied) == [("t1", 50), ("t3", 7)]
+    assert any(s.startswith("UPDATE tracks t SET popularity") and "t.popularity IS NULL" in s
+               for s in missing.statements)
+
+    complete = FakeConnection(missing=False, empty=False)
+    assert partition_indexes.fill_popularity(complete, path) == 0
+    assert complete.copied == []
+
+    with pytest.raises(RuntimeError, match="tier partitions would be empty"):
+        partition_indexes.fill_popularity(FakeConnection(missing=True, empty=True), str(tmp_path / "absent.sqlite"))
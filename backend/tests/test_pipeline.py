@@ -0,0 +1,89 @@
+import sqlite3
+import threading
+import time
+
+import polars as pl
+import pytest
+
+from scripts.etl import pipeline
+from scripts.etl.generate_synthetic_db import generate_database
+
+
+def frames(n, size=10):
+    for i in range(n):
+        yield i, pl.DataFrame({"track_id": [f"t{i}-{j}" for j in range(size)], "tempo": [125.0] * size})
+
+
+def test_pipeline_loads_every_batch_through_the_transform():
+    loaded = {}
+    lock = threading.Lock()
+
+    def load(key, df):
+        with lock:
+            loaded[key] = df
+        return df.height
+
+    summary = pipeline.run_pipeline(frames(20), lambda df: df.with_columns(pl.col("tempo") / 250.0), load,
+                                    transform_workers=2, load_workers=3, queue_size=2)
+
+    assert summary["rows"] == 200
+    assert sorted(loaded) == list(range(20))
+    assert all((df["tempo"] == 0.5).all() for df in loaded.values())
+    assert {name: s["batches"] for name, s in summary["stages"].items()} == {"extract": 20, "transform": 20, "load": 20}
+
+
+def test_a_slow_loader_backs_up_the_queues_and_is_reported_as_the_bottleneck():
+    def load(key, df):
+        time.sleep(0.02)
+        return df.height
+
+    summary = pipeline.run_pipeline(frames(15), lambda df: df, load, load_workers=1, queue_size=2)
+
+    stages = summary["stages"]
+    assert summary["bottleneck"] == "load"
+    assert stages["extract"]["blocked_s"] > 0.05
+    assert stages["transform"]["max_queue"] <= 2
+
+
+def test_a_failing_load_is_retried_then_stops_the_pipeline(monkeypatch):
+    monkeypatch.setattr(pipeline, "RETRY_BACKOFF_S", 0)
+    attempts = []
+
+    def load(key, df):
+        if key == 3:
+            attempts.append(key)
+            raise RuntimeError("copy failed")
+        return df.height
+
+    with pytest.raises(RuntimeError, match="copy failed"):
+        pipeline.run_pipeline(frames(1000), lambda df: df, load, load_workers=1, retries=2)
+    assert len(attempts) == 3
+
+
+def test_sqlite_stream_and_lazy_batches_key_batches_by_position(tmp_path):
+    source = str(tmp_path / "spotify.sqlite")
+    generate_database(source, total_tracks=500, seed=1)
+    schema = {"track_id": pl.Utf8, "name": pl.Utf8}
+
+    batches = list(pipeline.sqlite_stream(source, "SELECT id, name FROM tracks ORDER BY rowid", schema,
+                                          batch=200, start=100))
+    assert [key for key, _ in batches] == [300, 500, 600]
+    streamed = pl.concat([df for _, df in batches])["track_id"].to_list()
+    assert streamed == [r[0] for r in sqlite3.connect(source).execute("SELECT id FROM tracks ORDER BY rowid")]
+
+    lazy = list(pipeline.lazy_batches(pl.concat([df for _, df in batches]).lazy(), batch=200, start=450))
+    assert lazy[-1][0] == 500
+    assert pl.concat([df for _, df in lazy])["track_id"].to_list() == streamed[450:]
+
+
+def test_fill_track_defaults_is_vectorised_over_missing_values():
+    df = pl.DataFrame({
+        "track_id": ["a", "b"], "artist": [None, "X"], "popularity": [None, 40],
+        "danceability": [None, 1.4], "energy": [0.2, None], "valence": [0.3, 0.3],
+        "tempo": [None, 500.0], "acousticness": [0.1, None],
+    })
+    out = pipeline.fill_track_defaults(df)
+    assert out["artist"].to_list() == ["Unknown", "X"]
+    assert out["popularity"].to_list() == [0, 40]
+    assert out["danceability"].to_list() == [0.5, 1.0]
+    assert out["tempo_norm"].to_list() == [0.48, 1.0]
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from app.profiling import sample_stacks, collapsed, top_functions, memory_diff
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_cpu_sampler_finds_the_busy_function():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        stacks = sample_stacks(0.3, interval=0.002)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = {stack: n for stack, n in stacks.items() if stack.startswith("busy;")}
+    assert busy and all("busy_loop" in stack for stack in busy)
+    # Collapsed format: "frame;frame;frame count"
+    line = collapsed(busy).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit() and " " not in line.rsplit(" ", 1)[0]
+    assert any("busy_loop" in row["function"] or "genexpr" in row["function"] for row in top_functions(busy))
+
+
+def test_memory_diff_reports_growth():
+    leak = []
+
+    async def run():
+        task = asyncio.ensure_future(memory_diff(0.2, limit=5))
+        await asyncio.sleep(0.05)
+        leak.extend(bytearray(1024) for _ in range(2000))
+        return await task
+
+    result = asyncio.run(run())
+
+    assert result["tracing_started_for_window"]
+    assert result["top"][0]["size_diff_kb"] > 1000
@@ -0,0 +1,47 @@
+from sqlalchemy import create_engine, text
+
+from app import query_log
+from app.query_log import SlowQueryLog, format_params
+
+
+def test_slow_statements_are_logged_with_params(monkeypatch):
+    log = SlowQueryLog(threshold_ms=0.0001, sample_rate=1.0, explains_per_minute=6, size=2)
+    monkeypatch.setattr(query_log, "slow_query_log", log)
+    engine = create_engine("sqlite://")
+    query_log.instrument_engine(engine)
+
+    with engine.connect() as conn:
+        for i in range(3):
+            conn.execute(text("SELECT :x"), {"x": i})
+
+    snapshot = log.snapshot()
+    assert snapshot["total_slow"] == 3
+    # Ring buffer keeps the newest entries, newest first (sqlite binds positionally)
+    assert [e["params"] for e in snapshot["entries"]] == [["2"], ["1"]]
+    assert snapshot["entries"][0]["explain_skipped"] == "not Postgres"
+
+
+def test_explains_are_limited_to_sampled_selects_within_budget():
+    log = SlowQueryLog(threshold_ms=100, sample_rate=1.0, explains_per_minute=1, size=10)
+
+    assert log.explain_decision("UPDATE tracks SET popularity = 1") == "not a SELECT"
+    assert log.explain_decision("  select 1") is None
+    assert log.explain_decision("SELECT 1") == "rate limited"
+
+    assert SlowQueryLog(100, 0.0, 60, 10).explain_decision("SELECT 1") == "not sampled"
+
+
+def test_read_only_ctes_are_explained_but_data_modifying_ones_are_not():
+    log = SlowQueryLog(threshold_ms=100, sample_rate=1.0, explains_per_minute=60, size=10)
+
+    assert log.explain_decision("WITH top AS (SELECT track_id FROM tracks) SELECT * FROM top") is None
+    assert log.explain_decision(
+        "WITH moved AS (DELETE FROM tracks WHERE popularity = 0 RETURNING *) SELECT count(*) FROM moved"
+    ) == "not a SELECT"
+
+
+def test_long_params_are_truncated():
+    params = format_params({"centroids": ["[0.1,0.2,0.3,0.4,0.5]"] * 50, "limit": 12})
+
+    assert params["limit"] == "12"
+    assert len(params["centroids"]) < 300 and params["centroids"].endswith("chars)")
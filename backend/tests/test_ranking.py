@@ -0,0 +1,91 @@
+import time
+import numpy as np
+from app.services.ranking import mmr_rerank, profile_centroids, allocate_quotas, interleave
+
+
+def test_mmr_pure_relevance_keeps_score_order():
+    """With lambda=1 MMR degenerates to sorting by relevance."""
+    rng = np.random.default_rng(0)
+    embeddings = rng.random((20, 5))
+    relevance = rng.random(20)
+
+    order = mmr_rerank(embeddings, relevance, k=5, lambda_=1.0)
+
+    assert order == list(np.argsort(-relevance)[:5])
+
+
+def test_mmr_demotes_near_duplicates():
+    """A remaster (near-identical vector) should lose its slot to a distinct track."""
+    embeddings = np.array([
+        [0.5, 0.5, 0.5, 0.5, 0.5],     # original
+        [0.5, 0.5, 0.5, 0.5, 0.501],   # remaster of the original
+        [0.9, 0.1, 0.2, 0.7, 0.1],     # different but still relevant
+    ])
+    relevance = np.array([0.95, 0.94, 0.80])
+
+    order = mmr_rerank(embeddings, relevance, k=2, lambda_=0.5)
+
+    assert order == [0, 2]
+
+
+def test_mmr_handles_small_candidate_sets():
+    """k larger than the candidate set returns every candidate exactly once."""
+    embeddings = np.eye(3, 5)
+    relevance = np.array([0.1, 0.3, 0.2])
+
+    order = mmr_rerank(embeddings, relevance, k=10)
+
+    assert sorted(order) == [0, 1, 2]
+    assert mmr_rerank(np.empty((0, 5)), np.empty(0), k=5) == []
+
+
+def test_mmr_latency_budget_for_500_candidates():
+    """Re-ranking 500 candidates down to a page of 12 stays around a millisecond."""
+    rng = np.random.default_rng(1)
+    embeddings = rng.random((500, 5)).astype(np.float32)
+    relevance = rng.random(500).astype(np.float32)
+    mmr_rerank(embeddings, relevance, k=12)  # warm-up
+
+    runs = 50
+    start = time.perf_counter()
+    for _ in range(runs):
+        mmr_rerank(embeddings, relevance, k=12)
+    per_call_ms = (time.perf_counter() - start) / runs * 1000
+
+    # Generous bound so shared CI runners don't flake; typical is ~0.3 ms
+    assert per_call_ms < 5
+
+
+def test_profile_splits_heterogeneous_seeds():
+    """Ambient + metal seeds yield two centroids instead of one in-between average."""
+    rng = np.random.default_rng(2)
+    ambient = rng.normal([0.2, 0.2, 0.2, 0.3, 0.9], 0.02, (4, 5))
+    metal = rng.normal([0.4, 0.95, 0.3, 0.7, 0.05], 0.02, (2, 5))
+
+    centroids, weights = profile_centroids(np.vstack([ambient, metal]))
+
+    assert centroids.shape == (2, 5)
+    assert sorted(weights.tolist()) == [2, 4]
+
+
+def test_profile_keeps_single_centroid_for_coherent_seeds():
+    """Tightly clustered seeds fall back to the plain average (ALGORITHM_RULES step 1)."""
+    rng = np.random.default_rng(3)
+    seeds = rng.normal([0.5, 0.5, 0.5, 0.5, 0.5], 0.02, (5, 5))
+
+    centroids, weights = profile_centroids(seeds)
+
+    assert np.allclose(centroids[0], seeds.mean(axis=0))
+    assert weights.tolist() == [5]
+
+
+def test_interleave_respects_quotas_and_dedupes():
+    """Each list gets its share, shared items appear once, and dry lists are backfilled."""
+    quotas = allocate_quotas([2, 1], 6)
+    lists = [["a1", "a2", "a3", "a4", "a5"], ["b1", "a2"]]
+
+    merged = interleave(lists, quotas, 6)
+
+    assert quotas == [4, 2]
+    assert merged[:3] == ["a1", "b1", "a2"]
+    assert len(merged) == len(set(merged)) == 6
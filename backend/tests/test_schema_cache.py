@@ -0,0 +1,30 @@
+from app import database
+
+SCHEMA = {
+    "tracks": [{"name": "track_id", "type": "text"}, {"name": "name", "type": "text"},
+               {"name": "artist", "type": "text"}, {"name": "popularity", "type": "integer"}],
+}
+
+
+def test_schema_is_loaded_once_per_generation(monkeypatch):
+    calls = []
+    monkeypatch.setattr(database, "_load_schema", lambda: calls.append(1) or SCHEMA)
+    database.invalidate_schema()
+
+    assert database.get_table_schema() == SCHEMA
+    assert database.table_columns("tracks") == {"track_id", "name", "artist", "popularity"}
+    database.get_table_schema()
+    assert len(calls) == 1
+
+    database.invalidate_schema()
+    database.table_columns("tracks")
+    assert len(calls) == 2
+
+
+def test_select_columns_nulls_missing_optional_columns(monkeypatch):
+    monkeypatch.setattr(database, "_load_schema", lambda: SCHEMA)
+    database.invalidate_schema()
+
+    assert (database.select_columns("tracks", ["track_id", "name"], ["album", "popularity"])
+            == "track_id, name, NULL AS album, popularity")
+    assert database.select_columns("missing", ["id"], ["album"]) == "id, NULL AS album"
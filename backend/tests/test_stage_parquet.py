@@ -0,0 +1,48 @@
+import os
+import sqlite3
+
+import polars as pl
+
+from scripts.etl import stage_parquet
+from scripts.etl.generate_synthetic_db import generate_database
+
+
+def build(tmp_path, monkeypatch, tracks=3000):
+    source = str(tmp_path / "spotify.sqlite")
+    generate_database(source, total_tracks=tracks, seed=3)
+    # A duplicated track row, as found in the real dump
+    conn = sqlite3.connect(source)
+    conn.execute("INSERT INTO tracks SELECT * FROM tracks WHERE rowid = 1")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(stage_parquet, "EXTRACT_ROWS", 1000)
+    output = str(tmp_path / "staging")
+    return source, output, stage_parquet.build_stage(source, output, workers=2)
+
+
+def test_stage_matches_the_sqlite_join_and_is_deduplicated(tmp_path, monkeypatch):
+    source, output, manifest = build(tmp_path, monkeypatch)
+
+    assert stage_parquet.stage_available(output)
+    assert manifest["rows"]["tracks"] == 3000
+    tracks = stage_parquet.scan_tracks(output).collect()
+    assert tracks["track_id"].n_unique() == tracks.height == 3000
+    assert (tracks["popularity_bucket"] == tracks["popularity"] // 10).all()
+
+    conn = sqlite3.connect(source)
+    expected = conn.execute(stage_parquet.flattened_tracks_sql(tail="ORDER BY MAX(t.popularity) DESC, t.id LIMIT 50")).fetchall()
+    conn.close()
+    top = stage_parquet.scan_top_popular(50, output).select(stage_parquet.FLATTENED_COLUMNS).collect()
+    assert top.rows() == expected
+
+
+def test_top_popular_prunes_buckets_and_slices_cover_the_stage(tmp_path, monkeypatch):
+    _, output, _ = build(tmp_path, monkeypatch)
+
+    plan = stage_parquet.scan_top_popular(10, output).explain()
+    assert "popularity_bucket" in plan
+
+    slices = stage_parquet.track_slices(output, size=400)
+    assert all(os.path.exists(path) and length <= 400 for path, _, length in slices)
+    ids = pl.concat([stage_parquet.read_track_slice(s) for s in slices])["track_id"]
+    assert ids.len() == ids.n_unique() == 3000
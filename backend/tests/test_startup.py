@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Cumulative import time of app.main; generous enough for a cold CI runner
+STARTUP_IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", "2.5"))
+
+# Only needed by specific endpoints or by the data-loading scripts. sqlalchemy is
+# not listed: route signatures (`db: Session`) and the User model need it while
+# app.main is imported; only its engines (dialects) and DB drivers are deferred.
+LAZY_MODULES = ["passlib", "jose", "psycopg2", "psycopg", "polars", "sklearn", "kaggle",
+                "sqlalchemy.dialects.postgresql", "sqlalchemy.dialects.sqlite"]
+
+
+def import_times():
+    """{module: cumulative µs} from `python -X importtime -c "import app.main"`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_is_lazy_and_within_budget():
+    times = import_times()
+
+    eager = [m for m in LAZY_MODULES if m in times]
+    assert eager == [], f"imported at startup: {eager}"
+    assert times["app.main"] / 1e6 < STARTUP_IMPORT_BUDGET_S
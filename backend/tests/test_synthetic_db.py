@@ -0,0 +1,64 @@
+import sqlite3
+from scripts.etl.generate_synthetic_db import generate_database
+
+
+def test_generated_db_supports_the_seeder_joins(tmp_path):
+    path = str(tmp_path / "synthetic.sqlite")
+    generate_database(path, total_tracks=5000, seed=1)
+    conn = sqlite3.connect(path)
+
+    ids = [r[0] for r in conn.execute("SELECT id FROM tracks")]
+    assert len(ids) == 5000 == len(set(ids))
+    assert all(len(i) == 22 for i in ids)
+
+    # Same join shape as create_dev_db.py / dev_seed.py
+    rows = conn.execute("""
+        SELECT t.id, GROUP_CONCAT(DISTINCT a.name), MAX(alb.name), MAX(af.tempo)
+        FROM tracks t
+        JOIN audio_features af ON t.id = af.id
+        JOIN r_track_artist rta ON t.id = rta.track_id
+        JOIN artists a ON rta.artist_id = a.id
+        LEFT JOIN r_albums_tracks rtalb ON t.id = rtalb.track_id
+        LEFT JOIN albums alb ON rtalb.album_id = alb.id
+        GROUP BY t.id
+    """).fetchall()
+    assert len(rows) == 5000
+    assert all(album is not None for _, _, album, _ in rows)
+
+    multi_artist = sum(1 for _, artists, _, _ in rows if "," in artists)
+    assert 0.05 < multi_artist / 5000 < 0.15
+
+    album_artists = conn.execute("""
+        SELECT COUNT(*) FROM albums alb
+        JOIN r_albums_artists raa ON alb.id = raa.album_id
+        JOIN artists a ON raa.artist_id = a.id
+    """).fetchone()[0]
+    assert album_artists == conn.execute("SELECT COUNT(*) FROM albums").fetchone()[0]
+
+
+def test_generation_is_deterministic(tmp_path):
+    a, b = str(tmp_path / "a.sqlite"), str(tmp_path / "b.sqlite")
+    generate_database(a, total_tracks=2000, seed=7, create_indexes=False)
+    generate_database(b, total_tracks=2000, seed=7, create_indexes=False)
+
+    query = "SELECT * FROM tracks ORDER BY id"
+    assert sqlite3.connect(a).execute(query).fetchall() == sqlite3.connect(b).execute(query).fetchall()
+
+
+def test_generated_artist_genres_fill_track_genres(tmp_path):
+    from scripts.etl import partition_indexes
+    from scripts.etl.generate_synthetic_db import GENRES
+
+    path = str(tmp_path / "synthetic.sqlite")
+    generate_database(path, total_tracks=3000, seed=2)
+    conn = sqlite3.connect(path)
+
+    assert sorted(r[0] for r in conn.execute("SELECT id FROM genres")) == sorted(GENRES)
+    n_artists = conn.execute("SELECT COUNT(*) FROM artists").fetchone()[0]
+    per_artist = dict(conn.execute("SELECT artist_id, COUNT(*) FROM r_artist_genre GROUP BY artist_id"))
+    assert len(per_artist) == n_artists
+    assert 0.1 < sum(n == 2 for n in per_artist.values()) / n_artists < 0.4
+
+    track_genres = dict(row for batch in partition_indexes.track_genres(path) for row in batch)
+    assert len(track_genres) == 3000
+    assert set(track_genres.values()) <= set(GENRES)
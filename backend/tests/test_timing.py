@@ -0,0 +1,34 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.timing import span, server_timing_middleware
+
+
+def test_server_timing_header_lists_spans_and_total():
+    app = FastAPI()
+    app.middleware("http")(server_timing_middleware)
+
+    @app.get("/work")
+    async def work():
+        with span("db-knn"):
+            time.sleep(0.01)
+        with span("serialize"):
+            pass
+        with span("db-knn"):
+            time.sleep(0.01)
+        return {}
+
+    header = TestClient(app).get("/work").headers["server-timing"]
+
+    durations = dict(part.split(";dur=") for part in header.split(", "))
+    assert list(durations) == ["db-knn", "serialize", "total"]
+    # Repeated spans are summed
+    assert float(durations["db-knn"]) >= 20
+    assert float(durations["total"]) >= float(durations["db-knn"])
+
+
+def test_span_outside_a_request_is_a_no_op():
+    with span("db-knn"):
+        pass
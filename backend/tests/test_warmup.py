@@ -0,0 +1,156 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app import database, metrics, warmup
+from app.cache import TTLCache
+
+
+def test_ttl_cache_expires_evicts_and_counts_lookups():
+    cache = TTLCache("ttl_test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    expired = TTLCache("ttl_test", maxsize=2, ttl=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None
+    assert len(expired) == 0
+
+    assert metrics.CACHE_LOOKUPS.values[("ttl_test", "hit")] == 2
+    assert metrics.CACHE_LOOKUPS.values[("ttl_test", "miss")] == 2
+
+
+def test_autocomplete_terms_are_artist_prefixes():
+    tracks = [{"artist": "Taylor Swift"}, {"artist": "Tame Impala"}, {"artist": "X"}, {"artist": None}]
+    assert warmup.autocomplete_terms(tracks, 10) == ["ta", "tay", "taylor swift", "tam", "tame impala"]
+    assert warmup.autocomplete_terms(tracks, 2) == ["ta", "tay"]
+
+
+def test_fill_caches_loads_trending_and_hot_tracks(monkeypatch):
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE tracks (track_id TEXT, name TEXT, artist TEXT, popularity INT, danceability REAL,
+                                 energy REAL, valence REAL, tempo REAL, acousticness REAL)
+        """))
+        for i in range(5):
+            conn.execute(text("INSERT INTO tracks (track_id, name, artist, popularity) VALUES (:id, :id, 'a', :p)"),
+                         {"id": f"t{i}", "p": i})
+    monkeypatch.setattr(warmup, "WARMUP_TRENDING_LIMITS", [2])
+    monkeypatch.setattr(warmup, "WARMUP_HOT_TRACKS", 3)
+    monkeypatch.setattr(database, "_load_schema", lambda: {})
+    database.invalidate_schema()
+
+    from app.cache import trending_cache, hot_tracks_cache
+    trending_cache.clear()
+    hot_tracks_cache.clear()
+    detail = warmup.fill_caches(sessionmaker(bind=engine))
+
+    assert detail == "1 trending, 3 hot tracks"
+    assert [t["id"] for t in trending_cache.get(2)] == ["t4", "t3"]
+    assert hot_tracks_cache.get("t2")["id"] == "t2"
+    assert hot_tracks_cache.get("t1") is None
+
+
+def test_failed_step_is_reported_and_worker_becomes_ready():
+    state = warmup.WarmupState(["bogus"])
+    asyncio.run(warmup.run_warmup(state))
+
+    assert state.ready
+    assert state.results["bogus"] == {"status": "failed", "error": "unknown step"}
+
+
+def test_slow_autocomplete_prefill_does_not_block_readiness(monkeypatch):
+    import threading
+
+    release = threading.Event()
+    monkeypatch.setattr(database, "get_sessionmaker", lambda: None)
+    monkeypatch.setattr(warmup, "fill_caches", lambda sessionmaker: "caches")
+    monkeypatch.setattr(warmup, "fill_autocomplete", lambda sessionmaker: "done" if release.wait(5) else "timeout")
+    state = warmup.WarmupState(["autocomplete", "caches"])
+
+    async def main():
+        task = asyncio.create_task(warmup.run_warmup(state))
+        for _ in range(200):
+            if state.ready:
+                break
+            await asyncio.sleep(0.01)
+        ready_while_filling = state.ready and state.results["autocomplete"]["status"] == "pending"
+        release.set()
+        await task
+        return ready_while_filling
+
+    assert asyncio.run(main())
+    assert state.results["caches"]["detail"] == "caches"
+    assert state.results["autocomplete"]["detail"] == "done"
+
+
+def test_autocomplete_prefill_stops_at_its_time_budget(monkeypatch):
+    from app.cache import autocomplete_cache
+    from app.routes import tracks
+
+    class Session:
+        def close(self):
+            pass
+
+    popular = [{"artist": "Taylor Swift"}, {"artist": "Tame Impala"}]
+    monkeypatch.setattr(tracks, "load_trending", lambda db, limit: popular[:limit])
+    monkeypatch.setattr(tracks, "load_search", lambda db, term, limit: [{"id": term}])
+    monkeypatch.setattr(warmup, "WARMUP_AUTOCOMPLETE_TERMS", 4)
+    autocomplete_cache.clear()
+    try:
+        assert warmup.fill_autocomplete(Session, budget_s=60) == "4 autocomplete"
+        assert autocomplete_cache.get(("tay", warmup.AUTOCOMPLETE_PAGE_SIZE)) == [{"id": "tay"}]
+        assert warmup.fill_autocomplete(Session, budget_s=0) == "0/4 autocomplete (time budget reached)"
+    finally:
+        autocomplete_cache.clear()
+
+
+def test_ready_endpoint_follows_warmup_state(monkeypatch):
+    from app.main import app
+
+    monkeypatch.setattr(warmup, "state", warmup.WarmupState([]))
+    client = TestClient(app)  # no lifespan: warm-up never runs
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+    warmup.state.ready = True
+    assert client.get("/ready").json() == {"ready": True, "steps": {}}
+
+
+def test_search_queries_differing_in_case_or_spaces_get_their_own_rows(monkeypatch):
+    from app.main import app
+    from app.cache import autocomplete_cache
+    from app.database import get_db
+    from app.routes import tracks
+
+    rows = [{"id": "1", "name": "Rock Lobster", "artist": "a"}, {"id": "2", "name": "Bedrock", "artist": "b"},
+            {"id": "3", "name": "Pop", "artist": "c"}]
+    searched = []
+
+    def fake_search(db, q, limit, offset=0):
+        searched.append(q)
+        return [r for r in rows if q.lower() in r["name"].lower()][offset:offset + limit]
+
+    monkeypatch.setattr(tracks, "load_search", fake_search)
+    app.dependency_overrides[get_db] = lambda: None
+    autocomplete_cache.clear()
+    client = TestClient(app)
+    try:
+        def ids(q):
+            return [t["id"] for t in client.get("/tracks/search", params={"q": q}).json()["tracks"]]
+
+        assert ids("ROCK ") == ["1", "2"]
+        assert ids("rock") == ["1", "2"]
+        assert ids(" pop") == ["3"]
+        # The term that is matched is the term that is cached
+        assert searched == ["rock", "pop"]
+    finally:
+        app.dependency_overrides.clear()
+        autocomplete_cache.clear()